@@ -0,0 +1,156 @@
+"""Admission control for the expensive routes.
+
+Each pool caps how many requests run at once, globally and per user, and
+holds a bounded FIFO queue of requests waiting for a slot. Interactive
+queries and bulk ingestion use separate pools, so uploads cannot starve chat.
+Rejections carry a Retry-After header:
+
+- 429 when the user already has too many requests running or queued;
+- 503 when the queue is full or a request waited longer than the timeout.
+
+Limits apply per worker process.
+"""
+
+import asyncio
+import logging
+import math
+from collections import Counter, deque
+from typing import Deque, Tuple
+
+from fastapi import Depends, HTTPException, status
+
+from .auth import User, get_current_user
+from .config import settings
+from .metrics import ADMISSION_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_per_user: int,
+        max_queue: int,
+        queue_timeout: float,
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        # Running plus queued requests per user
+        self._per_user: Counter = Counter()
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+
+    def _reject(self, status_code: int, detail: str):
+        ADMISSION_REJECTIONS.labels(pool=self.name, status=str(status_code)).inc()
+        logger.warning("Admission to %s pool rejected: %s", self.name, detail)
+        raise AdmissionRejected(status_code, detail, max(1.0, self.queue_timeout))
+
+    async def acquire(self, user: str):
+        """Wait for a slot, or raise AdmissionRejected."""
+        if self.max_per_user and self._per_user[user] >= self.max_per_user:
+            self._reject(
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                f"Too many concurrent {self.name} requests for this user",
+            )
+
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self._per_user[user] += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._reject(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                f"Server busy: {self.name} queue is full",
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (user, future)
+        self._waiters.append(waiter)
+        self._per_user[user] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                return  # Admitted just as the timeout fired
+            self._waiters.remove(waiter)
+            self._release_user(user)
+            self._reject(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                f"Server busy: timed out waiting for a {self.name} slot",
+            )
+        except asyncio.CancelledError:
+            # Client went away while queued
+            if future.done():
+                self.release(user)
+            else:
+                self._waiters.remove(waiter)
+                self._release_user(user)
+            raise
+
+    def release(self, user: str):
+        self._release_user(user)
+        if self._waiters:
+            # Hand the slot straight to the next waiter; active stays the same
+            _, future = self._waiters.popleft()
+            future.set_result(None)
+        else:
+            self.active -= 1
+
+    def _release_user(self, user: str):
+        self._per_user[user] -= 1
+        if self._per_user[user] <= 0:
+            del self._per_user[user]
+
+
+query_pool = AdmissionPool(
+    "query",
+    max_concurrent=settings.QUERY_MAX_CONCURRENT,
+    max_per_user=settings.QUERY_MAX_PER_USER,
+    max_queue=settings.QUERY_MAX_QUEUE,
+    queue_timeout=settings.QUERY_QUEUE_TIMEOUT_SECONDS,
+)
+ingest_pool = AdmissionPool(
+    "ingest",
+    max_concurrent=settings.INGEST_MAX_CONCURRENT,
+    max_per_user=settings.INGEST_MAX_PER_USER,
+    max_queue=settings.INGEST_MAX_QUEUE,
+    queue_timeout=settings.INGEST_QUEUE_TIMEOUT_SECONDS,
+)
+
+
+def retry_after_header(seconds: float) -> dict:
+    return {"Retry-After": str(math.ceil(seconds))}
+
+
+def admit(pool: AdmissionPool):
+    """Dependency that holds a slot in ``pool`` for the whole request."""
+
+    async def dependency(current_user: User = Depends(get_current_user)):
+        try:
+            await pool.acquire(current_user.username)
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=e.detail,
+                headers=retry_after_header(e.retry_after),
+            )
+        try:
+            yield
+        finally:
+            pool.release(current_user.username)
+
+    return dependency
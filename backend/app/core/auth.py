@@ -1,11 +1,19 @@
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Mapping
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterator, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from .config import settings
+from .metrics import record_cache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
@@ -29,54 +37,157 @@ DOCUMENT_CATEGORIES = {
 }
 
 
-# In-memory user store (replace with database in production)
-fake_users_db = {
+class UserStore(ABC):
+    """Source of user records used for login and token claims.
+
+    A record is a dict with ``username``, ``hashed_password``, ``roles``,
+    ``access_categories`` and ``disabled``.
+    """
+
+    @abstractmethod
+    def get_user(self, username: str) -> Optional[Dict]:
+        """Return the user record, or None if there is no such user."""
+
+    @abstractmethod
+    def list_usernames(self) -> List[str]:
+        pass
+
+
+# Demo users; they all share settings.USER_PASSWORD
+DEMO_USERS = {
     "admin@demo.com": {
-        "username": "admin@demo.com",
-        "hashed_password": get_password_hash(settings.USER_PASSWORD),
         "roles": ["admin"],
         "access_categories": list(DOCUMENT_CATEGORIES.values()),
-        "disabled": False,
     },
     "hr@demo.com": {
-        "username": "hr@demo.com",
-        "hashed_password": get_password_hash(settings.USER_PASSWORD),
         "roles": [],
         "access_categories": [
             DOCUMENT_CATEGORIES["HR_DOCS"],
         ],
-        "disabled": False,
     },
     "operator@demo.com": {
-        "username": "operator@demo.com",
-        "hashed_password": get_password_hash(settings.USER_PASSWORD),
         "roles": [],
         "access_categories": [
             DOCUMENT_CATEGORIES["OPERATIONS"],
         ],
-        "disabled": False,
     },
     "safetyinspector@demo.com": {
-        "username": "safetyinspector@demo.com",
-        "hashed_password": get_password_hash(settings.USER_PASSWORD),
         "roles": [],
         "access_categories": [
             DOCUMENT_CATEGORIES["SAFETY"],
         ],
-        "disabled": False,
     },
     "fieldtechnician@demo.com": {
-        "username": "fieldtechnician@demo.com",
-        "hashed_password": get_password_hash(settings.USER_PASSWORD),
         "roles": [],
         "access_categories": [
             DOCUMENT_CATEGORIES["TECHNICAL"],
         ],
-        "disabled": False,
     },
 }
 
 
+class DemoUserStore(UserStore, Mapping):
+    """In-memory demo users (replace with a database in production).
+
+    The shared password is hashed once, on first use, unless a precomputed
+    USER_PASSWORD_HASH is configured. Also behaves as a read-only dict of
+    user records for code written against the old ``fake_users_db``.
+    """
+
+    def __init__(self, users: Dict[str, Dict]):
+        self._users = users
+        self._password_hash: Optional[str] = settings.USER_PASSWORD_HASH or None
+        self._lock = threading.Lock()
+
+    def _hashed_password(self) -> str:
+        with self._lock:
+            if self._password_hash is None:
+                self._password_hash = get_password_hash(settings.USER_PASSWORD)
+            return self._password_hash
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        user = self._users.get(username)
+        if user is None:
+            return None
+        return {
+            "username": username,
+            "hashed_password": self._hashed_password(),
+            "roles": list(user["roles"]),
+            "access_categories": list(user["access_categories"]),
+            "disabled": user.get("disabled", False),
+        }
+
+    def list_usernames(self) -> List[str]:
+        return list(self._users)
+
+    def __getitem__(self, username: str) -> Dict:
+        user = self.get_user(username)
+        if user is None:
+            raise KeyError(username)
+        return user
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._users)
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+class FileUserStore(UserStore):
+    """Users with precomputed bcrypt hashes, read from a JSON file on demand.
+
+    The file maps usernames to records::
+
+        {"jane@example.com": {"hashed_password": "$2b$12$...",
+                              "roles": [], "access_categories": ["hr_docs"]}}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._users: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict]:
+        with self._lock:
+            if self._users is None:
+                with open(self.path, encoding="utf-8") as f:
+                    raw = json.load(f)
+                self._users = {
+                    username: {
+                        "username": username,
+                        "hashed_password": record["hashed_password"],
+                        "roles": record.get("roles", []),
+                        "access_categories": record.get("access_categories", []),
+                        "disabled": record.get("disabled", False),
+                    }
+                    for username, record in raw.items()
+                }
+            return self._users
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        user = self._load().get(username)
+        return dict(user) if user else None
+
+    def list_usernames(self) -> List[str]:
+        return list(self._load())
+
+
+fake_users_db = DemoUserStore(DEMO_USERS)
+
+
+def create_user_store() -> UserStore:
+    """Build the user store selected by USER_STORE_BACKEND."""
+    backend = settings.USER_STORE_BACKEND.lower()
+    if backend == "demo":
+        return fake_users_db
+    if backend == "file":
+        return FileUserStore(settings.USER_STORE_PATH)
+    raise ValueError(f"Unknown user store backend: {settings.USER_STORE_BACKEND}")
+
+
+user_store = create_user_store()
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -101,7 +212,7 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     # Ensure access_categories is included in the token
     if "access_categories" not in to_encode and "sub" in to_encode:
-        user = fake_users_db.get(to_encode["sub"])
+        user = user_store.get_user(to_encode["sub"])
         if user and "access_categories" in user:
             to_encode["access_categories"] = user["access_categories"]
     encoded_jwt = jwt.encode(
@@ -110,7 +221,55 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
+class VerifiedTokenCache:
+    """Bounded LRU of verified tokens, keyed by SHA-256 of the token.
+
+    Entries expire at the token's ``exp`` claim, so a cached token is never
+    accepted past the point where ``jwt.decode`` would reject it.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[User]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user
+
+    def put(self, token: str, expires_at: float, user: User):
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (expires_at, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    cached_user = token_cache.get(token)
+    record_cache("jwt", cached_user is not None)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -139,9 +298,32 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     )
     if user is None:
         raise credentials_exception
+    if "exp" in payload:
+        token_cache.put(token, float(payload["exp"]), user)
     return user
 
 
+def can_access_document(user: User, metadata: Dict) -> bool:
+    """Whether ``user`` may read a document with the given metadata."""
+    # Admin has access to all documents
+    is_admin = any(role.lower() == "admin" for role in user.roles)
+
+    # Check if user has access to any of the document's categories
+    allowed_categories = metadata.get("allowed_categories", [])
+    if allowed_categories:
+        has_category_access = any(
+            cat in user.access_categories for cat in allowed_categories
+        )
+    else:
+        # If no categories are specified, default to true for admin
+        has_category_access = is_admin
+
+    # Check if username matches
+    has_user_access = user.username in metadata.get("allowed_users", [])
+
+    return is_admin or has_category_access or has_user_access
+
+
 def check_access_category(required_categories: List[str]):
     """Check if user has access to required document categories."""
 
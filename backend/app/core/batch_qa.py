@@ -0,0 +1,447 @@
+"""Batch question answering for RFP questionnaires.
+
+A questionnaire is answered as one job instead of hundreds of separate
+queries:
+
+- all questions are embedded with batched ``get_embeddings`` calls, once per
+  embedding size in use by the searched indexes;
+- searches run concurrently in the thread pool, and identical questions
+  (after normalization) are searched and answered once;
+- chunks retrieved by several questions are access-checked once and shared;
+- completions run with bounded parallelism and are reported as they finish.
+
+Job state is kept as a JSON file per job, saved at most once per save
+interval and when the job ends, so an interrupted job resumes where it
+stopped and a reconnecting client is sent the answers it already has. A
+running job is also saved periodically while no answers arrive, as a
+heartbeat that tells other workers it is still alive. A
+question that failed is reported with its error, marks the job "partial",
+and is asked again when the job is resumed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from .auth import User, can_access_document
+from .citations import SourceSelector
+from .config import settings
+from .llm_client import LLMClient
+from .llm_providers import LLMRateLimitError
+from .single_flight import normalize_query
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Leading numbering such as "1.", "12)", "Q3:", "3.2" or a bullet
+_NUMBERING = re.compile(r"^\s*(?:[-*•]|Q?\d+(?:\.\d+)*[.):]?)\s+", re.IGNORECASE)
+
+NO_SOURCES_ANSWER = "No relevant documents found."
+
+
+def extract_questions(text: str) -> List[str]:
+    """Pull questions out of a questionnaire's text.
+
+    A question is a line ending in "?", or a numbered item; numbering is
+    stripped. Lines wrapped inside a numbered item are joined to it.
+    """
+    questions: List[str] = []
+    # True while the last question is a numbered item that may wrap
+    open_item = False
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            open_item = False
+            continue
+        numbered = _NUMBERING.match(line)
+        if numbered:
+            questions.append(line[numbered.end() :].strip())
+        elif open_item:
+            questions[-1] = f"{questions[-1]} {line}"
+        elif line.endswith("?"):
+            questions.append(line)
+        open_item = (numbered is not None or open_item) and not line.endswith("?")
+    return [q for q in questions if len(q.split()) >= 2]
+
+
+class BatchJobStore:
+    """Batch jobs persisted as one JSON file each under ``root``."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def create(self, user: User, questions: List[str], index_name: Optional[str]):
+        job = {
+            "id": uuid.uuid4().hex,
+            "owner": user.model_dump(),
+            "index_name": index_name,
+            "questions": questions,
+            "answers": {},
+            "status": "running",
+            "error": None,
+            "created_at": time.time(),
+            "updated_at": time.time(),
+        }
+        self.save(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        if not re.fullmatch(r"[0-9a-f]{32}", job_id):
+            return None
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, job: Dict):
+        job["updated_at"] = time.time()
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(job["id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+
+class BatchAnswerer:
+    """Answers a set of questions for one user against one index (or all)."""
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        llm_client: LLMClient,
+        user: User,
+        index_name: Optional[str] = None,
+        max_parallel_searches: int = 8,
+        max_parallel_completions: int = 4,
+        limit: int = 5,
+        max_rate_limit_retries: int = 3,
+        selector: Optional[SourceSelector] = None,
+    ):
+        self.vector_store = vector_store
+        self.llm_client = llm_client
+        self.user = user
+        self.index_name = index_name
+        self.limit = limit
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.selector = selector or SourceSelector()
+        self._search_slots = asyncio.Semaphore(max_parallel_searches)
+        self._completion_slots = asyncio.Semaphore(max_parallel_completions)
+        # Chunks seen by any question: key -> shared source, or None if denied
+        self._chunks: Dict[Tuple, Optional[Dict]] = {}
+
+    def _embed(self, questions: List[str]) -> Dict[str, List[List[float]]]:
+        """Batch-embed the questions once per embedding size in use.
+
+        Returns collection name -> one vector per question.
+        """
+        if self.index_name:
+            collections = [self.index_name]
+        else:
+            collections = self.vector_store.list_collections()
+
+        by_dimensions: Dict[Optional[int], List[List[float]]] = {}
+        vectors = {}
+        for collection in collections:
+            dimensions = self.vector_store.get_embedding_dimensions(collection)
+            if dimensions not in by_dimensions:
+                by_dimensions[dimensions] = self.llm_client.get_embeddings(
+                    questions, dimensions=dimensions
+                )
+            vectors[collection] = by_dimensions[dimensions]
+        return vectors
+
+    def _share(self, result: Dict) -> Optional[Dict]:
+        """Access-check a retrieved chunk once and reuse it across questions."""
+        metadata = result["metadata"]
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        key = (metadata.get("filename"), metadata.get("chunk_index"), result["text"])
+        if key not in self._chunks:
+            self._chunks[key] = (
+                {"text": result["text"], "metadata": metadata}
+                if can_access_document(self.user, metadata)
+                else None
+            )
+        chunk = self._chunks[key]
+        if chunk is None:
+            return None
+        source = {**chunk, "relevance": result.get("relevance", 0)}
+        if "collection" in result:
+            source["collection"] = result["collection"]
+        return source
+
+    async def _search(self, vectors: Dict[str, List[float]]) -> List[Dict]:
+        async with self._search_slots:
+            if self.index_name:
+                results = await run_in_threadpool(
+                    self.vector_store.search,
+                    self.index_name,
+                    vectors[self.index_name],
+                    None,
+                    self.limit,
+                )
+            else:
+                results = await run_in_threadpool(
+                    self.vector_store.search_all_collections,
+                    None,
+                    None,
+                    self.limit,
+                    vectors,
+                )
+        sources = [s for s in map(self._share, results) if s is not None]
+        sources.sort(key=lambda s: s["relevance"], reverse=True)
+        return sources
+
+    async def _complete(self, question: str, sources: List[Dict]) -> str:
+        async with self._completion_slots:
+            for attempt in range(self.max_rate_limit_retries + 1):
+                try:
+                    return await run_in_threadpool(
+                        self.llm_client.get_completion, question, sources
+                    )
+                except LLMRateLimitError as e:
+                    if attempt == self.max_rate_limit_retries:
+                        raise
+                    await asyncio.sleep(e.retry_after or 2**attempt)
+
+    async def _answer(self, question: str, search) -> Dict:
+        try:
+            sources = await search
+            if not sources:
+                return {"answer": NO_SOURCES_ANSWER, "sources": []}
+            answer = await self._complete(question, sources)
+            return {
+                "answer": answer,
+                "sources": self.selector.select(answer, sources, self.index_name),
+            }
+        except Exception as e:
+            logger.warning("Batch question failed: %s: %s", type(e).__name__, e)
+            return {"error": str(e)}
+
+    async def answer(self, questions: Dict[int, str]) -> AsyncIterator[Dict]:
+        """Yield ``{"index", "question", ...answer}`` as each answer finishes."""
+        # Identical questions are searched and answered once
+        distinct: Dict[str, List[int]] = {}
+        for index, question in questions.items():
+            distinct.setdefault(normalize_query(question), []).append(index)
+        if not distinct:
+            return
+        representatives = [questions[indexes[0]] for indexes in distinct.values()]
+
+        vectors = await run_in_threadpool(self._embed, representatives)
+
+        async def answer_group(position: int, question: str, indexes: List[int]):
+            search = self._search({name: vectors[name][position] for name in vectors})
+            return indexes, await self._answer(question, search)
+
+        tasks = [
+            asyncio.ensure_future(answer_group(position, question, indexes))
+            for position, (question, indexes) in enumerate(
+                zip(representatives, distinct.values())
+            )
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                indexes, result = await finished
+                for index in indexes:
+                    yield {"index": index, "question": questions[index], **result}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class BatchJobRunner:
+    """Runs batch jobs in the background and follows their progress.
+
+    Progress is saved at most once per ``save_interval`` seconds (and when the
+    job ends), so a job interrupted by a restart loses little work. Without
+    new answers, for instance while completions wait out a rate limit, the
+    job is still saved every third of ``stale_after`` so other workers do not
+    judge it interrupted. Followers in this process are woken on every
+    answer; followers in other worker processes poll the job file.
+    """
+
+    def __init__(
+        self, store: BatchJobStore, save_interval: float = 1.0, stale_after=300.0
+    ):
+        self.store = store
+        self.save_interval = save_interval
+        self.stale_after = stale_after
+        self._jobs: Dict[str, Dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._updates: Dict[str, asyncio.Event] = {}
+
+    def is_running(self, job_id: str) -> bool:
+        return job_id in self._tasks
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self._jobs.get(job_id) or self.store.get(job_id)
+
+    def is_interrupted(self, job: Dict) -> bool:
+        """Whether a job marked running has stopped making progress.
+
+        That happens when the process running it exits. A job running in
+        another worker saves as answers finish and as a heartbeat in between,
+        so it is only judged interrupted after ``stale_after`` seconds without
+        a save.
+        """
+        if job["status"] != "running" or self.is_running(job["id"]):
+            return False
+        return time.time() - job["updated_at"] > self.stale_after
+
+    def start(
+        self,
+        job: Dict,
+        vector_store: VectorStore,
+        llm_client: LLMClient,
+        selector: Optional[SourceSelector] = None,
+    ):
+        """Answer the job's unanswered questions in a background task."""
+        job_id = job["id"]
+        if job_id in self._tasks:
+            return
+        # Running from now on, so a follower never sees the previous status;
+        # questions that failed last time are asked again
+        job["status"] = "running"
+        job["error"] = None
+        job["answers"] = {
+            index: result
+            for index, result in job["answers"].items()
+            if "error" not in result
+        }
+        self._jobs[job_id] = job
+        self._updates[job_id] = asyncio.Event()
+        task = asyncio.ensure_future(
+            self._run(job, vector_store, llm_client, selector)
+        )
+        self._tasks[job_id] = task
+
+        def forget(_):
+            self._tasks.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+            self._notify(job_id)
+            self._updates.pop(job_id, None)
+
+        task.add_done_callback(forget)
+
+    async def _save_progress(self, job: Dict, done: asyncio.Event):
+        """Save snapshots of a running job until ``done`` is set."""
+        saved_answers = len(job["answers"])
+        last_saved = time.monotonic()
+        while not done.is_set():
+            try:
+                await asyncio.wait_for(done.wait(), self.save_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            heartbeat_due = time.monotonic() - last_saved >= self.stale_after / 3
+            if len(job["answers"]) == saved_answers and not heartbeat_due:
+                continue
+            # Save a snapshot; answers keep arriving while it is written
+            snapshot = {**job, "answers": dict(job["answers"])}
+            saved_answers = len(snapshot["answers"])
+            await run_in_threadpool(self.store.save, snapshot)
+            last_saved = time.monotonic()
+
+    def _notify(self, job_id: str):
+        event = self._updates.get(job_id)
+        if event is not None:
+            event.set()
+            self._updates[job_id] = asyncio.Event()
+
+    async def _run(
+        self,
+        job: Dict,
+        vector_store: VectorStore,
+        llm_client: LLMClient,
+        selector: Optional[SourceSelector],
+    ):
+        pending = {
+            index: question
+            for index, question in enumerate(job["questions"])
+            if str(index) not in job["answers"]
+        }
+        answerer = BatchAnswerer(
+            vector_store,
+            llm_client,
+            User(**job["owner"]),
+            index_name=job["index_name"],
+            max_parallel_searches=settings.RFP_MAX_PARALLEL_SEARCHES,
+            max_parallel_completions=settings.RFP_MAX_PARALLEL_COMPLETIONS,
+            selector=selector,
+        )
+        await run_in_threadpool(self.store.save, job)
+        done = asyncio.Event()
+        saver = asyncio.ensure_future(self._save_progress(job, done))
+        logger.info("Batch job %s: answering %d questions", job["id"], len(pending))
+        try:
+            try:
+                async for result in answerer.answer(pending):
+                    index = result.pop("index")
+                    result.pop("question")
+                    # Answers are kept in completion order
+                    job["answers"][str(index)] = result
+                    self._notify(job["id"])
+            finally:
+                # Let a snapshot being written finish before the final status
+                # is set, so it cannot replace the final state
+                done.set()
+                await asyncio.gather(saver, return_exceptions=True)
+            failed = sum(1 for result in job["answers"].values() if "error" in result)
+            if failed:
+                job["status"] = "partial"
+                job["error"] = f"{failed} of {len(job['questions'])} questions failed"
+            else:
+                job["status"] = "completed"
+        except Exception as e:
+            logger.exception("Batch job %s failed: %s", job["id"], e)
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            # Runs on cancellation too, so shutdown keeps the finished answers
+            self.store.save(job)
+
+    async def follow(self, job_id: str, poll_interval: float = 1.0):
+        """Yield each answer (replaying earlier ones), then the final status."""
+        sent = 0
+        while True:
+            # Take the event before reading, so no update is missed in between
+            event = self._updates.get(job_id)
+            job = self._jobs.get(job_id) or await run_in_threadpool(
+                self.store.get, job_id
+            )
+            if job is None:
+                # Deleted while being followed
+                yield {"status": "failed", "error": "Batch job not found"}
+                return
+            answers = list(job["answers"].items())
+            for index, result in answers[sent:]:
+                yield {
+                    "index": int(index),
+                    "question": job["questions"][int(index)],
+                    **result,
+                }
+            sent = len(answers)
+            if job["status"] != "running" or self.is_interrupted(job):
+                status = "interrupted" if job["status"] == "running" else job["status"]
+                yield {"status": status, "error": job.get("error")}
+                return
+            if event is None:
+                await asyncio.sleep(poll_interval)
+            else:
+                try:
+                    await asyncio.wait_for(event.wait(), poll_interval)
+                except asyncio.TimeoutError:
+                    pass
@@ -0,0 +1,122 @@
+"""Selection of the sources shown under an answer.
+
+The model cites its contexts with superscript numbers. ``get_completion``
+numbers the contexts by document, in the order documents first appear in the
+sources, so a citation ``n`` refers to the n-th distinct file. A
+``SourceSelector`` maps the citations of an answer back to those files in a
+single pass over the sources, keeping each file's most relevant chunk and
+dropping files below the relevance threshold of their index.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Set
+
+# Phrases the model uses when the contexts do not answer the question
+NO_INFORMATION_PHRASES = (
+    "no relevant information",
+    "do not contain information",
+    "not contain information",
+)
+
+DEFAULT_RELEVANCE_THRESHOLD = 0.85  # Higher threshold for more relevant sources
+
+# Runs of superscript digits, e.g. "¹", "²" or "¹²"
+CITATION_PATTERN = re.compile("[⁰¹²³⁴⁵⁶⁷⁸⁹]+")
+SUPERSCRIPT_DIGITS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+
+
+def parse_citations(answer: str, count: int) -> Set[int]:
+    """Numbers of the contexts cited in ``answer``, out of ``count``.
+
+    A run of superscript digits is read as one number when that context
+    exists ("¹²" is context 12 of 15), and as adjacent single-digit citations
+    otherwise ("¹²" is contexts 1 and 2 of 5).
+    """
+    citations = set()
+    for run in CITATION_PATTERN.findall(answer):
+        digits = run.translate(SUPERSCRIPT_DIGITS)
+        number = int(digits)
+        if len(digits) > 1 and not 1 <= number <= count:
+            citations.update(int(digit) for digit in digits if digit != "0")
+        else:
+            citations.add(number)
+    return citations
+
+
+class SourceSelector:
+    """Picks the cited sources of an answer.
+
+    ``thresholds`` looks up the relevance threshold recorded for an index
+    (None if it has none); sources from indexes without one, or with no
+    known index, use ``default_threshold``. ``max_sources`` caps the number
+    of sources returned (0 for no cap).
+    """
+
+    def __init__(
+        self,
+        default_threshold: float = DEFAULT_RELEVANCE_THRESHOLD,
+        thresholds: Optional[Callable[[str], Optional[float]]] = None,
+        max_sources: int = 0,
+    ):
+        self.default_threshold = default_threshold
+        self.thresholds = thresholds
+        self.max_sources = max_sources
+
+    def _threshold_lookup(self) -> Callable[[Optional[str]], float]:
+        """Threshold per index, looked up once per selection."""
+        cache: Dict[Optional[str], float] = {}
+
+        def threshold(collection: Optional[str]) -> float:
+            if collection not in cache:
+                value = None
+                if collection and self.thresholds is not None:
+                    value = self.thresholds(collection)
+                cache[collection] = self.default_threshold if value is None else value
+            return cache[collection]
+
+        return threshold
+
+    def select(
+        self, answer: str, sources: List[Dict], collection: Optional[str] = None
+    ) -> List[Dict]:
+        """Return the sources cited in ``answer``, most relevant first.
+
+        ``sources`` are the contexts the answer was generated from, in the
+        order they were given to the model; ``collection`` is the index they
+        came from when they do not say. Each cited file is listed once, with
+        its most relevant chunk. If nothing relevant was cited, the most
+        relevant file above its threshold is returned instead.
+        """
+        lowered = answer.lower()
+        if any(phrase in lowered for phrase in NO_INFORMATION_PHRASES):
+            return []
+
+        # File -> [citation number, best chunk, relevance]
+        files: Dict[str, list] = {}
+        for source in sources:
+            filename = source["metadata"].get("filename")
+            relevance = source.get("relevance", 0)
+            entry = files.get(filename)
+            if entry is None:
+                files[filename] = [len(files) + 1, source, relevance]
+            elif relevance > entry[2]:
+                entry[1], entry[2] = source, relevance
+        if not files:
+            return []
+
+        citations = parse_citations(answer, len(files))
+        threshold = self._threshold_lookup()
+        cited = []
+        best = None
+        for number, source, relevance in files.values():
+            if relevance < threshold(source.get("collection") or collection):
+                continue
+            if number in citations:
+                cited.append(source)
+            if best is None or relevance > best.get("relevance", 0):
+                best = source
+        if not cited:
+            return [best] if best is not None else []
+
+        cited.sort(key=lambda source: source.get("relevance", 0), reverse=True)
+        return cited[: self.max_sources] if self.max_sources else cited
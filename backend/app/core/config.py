@@ -1,23 +1,136 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     # Authentication Settings
     SECRET_KEY: str
     USER_PASSWORD: str
+    # bcrypt hash of USER_PASSWORD; skips hashing it at startup when set
+    USER_PASSWORD_HASH: str = ""
+    USER_STORE_BACKEND: str = "demo"  # "demo" or "file" (JSON, precomputed hashes)
+    USER_STORE_PATH: str = "users.json"  # Used by the file backend
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_SIZE: int = 1024  # Verified bearer tokens kept in memory; 0 disables
 
-    # Azure OpenAI Settings
-    AZURE_OPENAI_API_KEY: str
-    AZURE_OPENAI_ENDPOINT: str
+    # LLM Provider Settings
+    LLM_PROVIDER: str = "azure"  # "azure" or "fake" (deterministic, offline)
+
+    # Azure OpenAI Settings (required when LLM_PROVIDER is "azure")
+    AZURE_OPENAI_API_KEY: str = ""
+    AZURE_OPENAI_ENDPOINT: str = ""
     AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME: str = "text-embedding-ada-002"
+    # Embedding size recorded for new indexes when using text-embedding-3
+    # deployments (e.g. 256 or 512); None keeps the model's native size.
+    # Requires API version 2024-02-01 or later.
+    AZURE_OPENAI_EMBEDDING_DIMENSIONS: Optional[int] = None
     AZURE_OPENAI_CHAT_DEPLOYMENT_NAME: str = "gpt-4"
     AZURE_OPENAI_API_VERSION: str = "2023-05-15"
 
+    # Fake LLM Settings (used when LLM_PROVIDER is "fake")
+    FAKE_LLM_EMBEDDING_DIMENSIONS: int = 1536  # Matches text-embedding-ada-002
+    FAKE_LLM_COMPLETION_TEMPLATE: str = ""  # Empty uses the built-in template
+    FAKE_LLM_EMBEDDING_LATENCY_MS: float = 0
+    FAKE_LLM_CHAT_LATENCY_MS: float = 0
+    FAKE_LLM_REQUESTS_PER_MINUTE: int = 0  # 0 disables the simulated rate limit
+
+    # Vector Store Settings
+    VECTOR_STORE_BACKEND: str = "weaviate"  # "weaviate" or "local" (in-process)
+    LOCAL_VECTOR_STORE_PATH: str = "data/vector_store"  # Used by the local backend
+
+    # Document Extraction Settings (preference lists; later entries are
+    # fallbacks, and backends that are not installed are skipped)
+    PDF_EXTRACTORS: str = "pypdfium2,pypdf,pdfminer,pypdf2"
+    DOCX_EXTRACTORS: str = "docx2txt,python-docx"
+    PDF_EXTRACT_WORKERS: int = 0  # Processes per PDF; 0 or 1 extracts inline
+    PDF_PARALLEL_MIN_PAGES: int = 50  # Smaller PDFs are always extracted inline
+
+    # Chunking Settings (in tokens; compare settings on your own documents
+    # with benchmarks/chunking.py)
+    CHUNK_SIZE_TOKENS: int = 500
+    CHUNK_OVERLAP_TOKENS: int = 50  # Must be smaller than the chunk size
+
+    # Ingest Cleaning Settings
+    INGEST_STRIP_BOILERPLATE: bool = True  # Drop lines repeated across pages
+    BOILERPLATE_MIN_PAGE_FRACTION: float = 0.5  # Share of pages a line repeats on
+    INGEST_DEDUP_CHUNKS: bool = True  # Drop near-duplicate chunks (SimHash)
+    NEAR_DUPLICATE_MAX_DISTANCE: int = 3  # Differing fingerprint bits, 0-3
+
+    # Source Selection Settings (indexes may record their own threshold)
+    RELEVANCE_THRESHOLD: float = 0.85  # Minimum relevance of a cited source
+    MAX_CITED_SOURCES: int = 0  # Sources listed under an answer; 0 for no cap
+
     # Weaviate Settings
     WEAVIATE_URL: str = "http://weaviate:8080"  # Docker internal network URL
+    WEAVIATE_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    WEAVIATE_QUERY_TIMEOUT_SECONDS: float = 10.0  # Reads on the request path
+    WEAVIATE_WRITE_TIMEOUT_SECONDS: float = 60.0  # Batch imports, schema changes
+    WEAVIATE_POOL_CONNECTIONS: int = 10  # Pooled keep-alive sessions per client
+    WEAVIATE_POOL_MAXSIZE: int = 40  # Matches the default request threadpool
+    WEAVIATE_READ_ATTEMPTS: int = 3  # Tries per read, with jittered backoff
+    WEAVIATE_RETRY_BASE_DELAY_SECONDS: float = 0.1  # Doubled on each retry
+    WEAVIATE_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures to open
+    WEAVIATE_CIRCUIT_RESET_SECONDS: float = 30.0  # Open time before a trial call
+
+    # Cache Settings ("sqlite" shares entries between worker processes)
+    CACHE_BACKEND: str = "memory"  # "memory" (per process) or "sqlite"
+    SHARED_CACHE_PATH: str = "data/cache.sqlite3"  # Used by the sqlite backend
+    SHARED_CACHE_MAX_ENTRIES: int = 100000  # sqlite rows kept; 0 = no limit
+    EMBEDDING_CACHE_TTL_SECONDS: int = 86400  # Query embeddings; 0 disables
+    ANSWER_CACHE_TTL_SECONDS: int = 3600  # Completions per prompt; 0 disables
+    QUERY_HANDLE_TTL_SECONDS: int = 900  # Lifetime of embedded-query handles
+
+    # Server Settings (production profile, see gunicorn.conf.py)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8001
+    SERVER_WORKERS: int = 0  # 0 picks 2 * CPU cores + 1
+    SERVER_TIMEOUT: int = 120  # Seconds before a silent worker is restarted
+
+    # Admission Control (per worker; interactive queries and uploads are
+    # limited separately so ingestion cannot starve chat)
+    QUERY_MAX_CONCURRENT: int = 8
+    QUERY_MAX_PER_USER: int = 2  # Running plus queued requests; 0 disables
+    QUERY_MAX_QUEUE: int = 32
+    QUERY_QUEUE_TIMEOUT_SECONDS: float = 15.0
+    INGEST_MAX_CONCURRENT: int = 2
+    INGEST_MAX_PER_USER: int = 1
+    INGEST_MAX_QUEUE: int = 8
+    INGEST_QUEUE_TIMEOUT_SECONDS: float = 30.0
+
+    # Chat Settings (multi-turn sessions, stored apart from the shared cache
+    # with the same backend)
+    CHAT_SESSION_PATH: str = "data/sessions.sqlite3"  # Used by the sqlite backend
+    CHAT_MAX_SESSIONS: int = 10000  # Kept per process by the memory backend
+    CHAT_SESSION_TTL_SECONDS: int = 86400  # Idle sessions expire after this
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500  # Recent turns kept verbatim
+    CHAT_SUMMARY_MAX_TOKENS: int = 300  # Summary of the older turns
+
+    # Batch (RFP) Question Answering Settings
+    RFP_JOBS_PATH: str = "data/rfp_jobs"  # One JSON state file per job
+    RFP_MAX_QUESTIONS: int = 500
+    RFP_MAX_PARALLEL_SEARCHES: int = 8
+    RFP_MAX_PARALLEL_COMPLETIONS: int = 4  # Keep below the LLM rate limit
+    # A running job not saved for this long is resumable by another worker;
+    # running jobs save a heartbeat every third of it
+    RFP_JOB_STALE_SECONDS: int = 300
+
+    # Response Compression Settings (Brotli if installed, otherwise gzip; a
+    # minimum size of 0 disables compression)
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024  # Smaller bodies are sent as is
+    RESPONSE_GZIP_LEVEL: int = 6  # 1 (fastest) to 9 (smallest)
+    RESPONSE_BROTLI_QUALITY: int = 4  # 0 (fastest) to 11 (smallest)
+
+    # Logging Settings
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # Per-module overrides, e.g. "app.core.vector_store=DEBUG"
+    LOG_FORMAT: str = "text"  # "text" or "json"
+
+    # Tracing Settings
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "console"  # "console" or "file" (JSON lines)
+    TRACING_FILE_PATH: str = "traces.jsonl"  # Used by the file exporter
+    TRACING_SAMPLE_RATE: float = 1.0  # Fraction of requests traced (0.0-1.0)
 
     # CORS Settings
     ADDITIONAL_CORS_ORIGINS: List[str] = []  # Additional allowed origins
@@ -0,0 +1,170 @@
+"""Server-side chat history with rolling summaries.
+
+Each chat session keeps its recent turns verbatim and a summary of the older
+ones. When the recent turns outgrow the token budget, the oldest are folded
+into the summary with one LLM call, made after the answer has been sent, so
+the history sent with each question stays bounded however long the
+conversation runs.
+
+Sessions are kept in their own store (see ``create_session_cache``), apart
+from cached embeddings and answers, which could otherwise evict them. Updates
+are compare-and-set: a turn or summary written from a stale copy is retried
+on the latest one, so concurrent requests never drop each other's turns.
+With the memory backend the sessions, and that guarantee, are limited to a
+single process; deployments with several workers must use the SQLite
+backend, which shares them between the workers of one host.
+"""
+
+import copy
+import logging
+import uuid
+from functools import lru_cache
+from typing import Dict, Optional
+
+import tiktoken
+
+from .llm_client import LLMClient
+from .shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "conversation"
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text))
+
+
+def strip_citations(answer: str) -> str:
+    """The answer without its trailing Citation section."""
+    return answer.split("\n\nCitation", 1)[0].strip()
+
+
+class ConversationStore:
+    """Chat sessions of each user, stored in ``cache``.
+
+    ``cache`` should be dedicated to sessions; a memory cache keeps them for
+    one process only.
+    """
+
+    def __init__(
+        self,
+        cache: SharedCache,
+        history_token_budget: int = 1500,
+        summary_max_tokens: int = 300,
+        ttl: Optional[float] = None,
+    ):
+        self.cache = cache
+        self.history_token_budget = history_token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.ttl = ttl
+
+    def _key(self, username: str, session_id: str) -> str:
+        return f"{username}:{session_id}"
+
+    def _update(self, username: str, session_id: str, stored, updated) -> bool:
+        """Save ``updated`` unless the session changed since ``stored`` was read."""
+        return self.cache.compare_and_set(
+            NAMESPACE, self._key(username, session_id), stored, updated, ttl=self.ttl
+        )
+
+    def new_session(self) -> Dict:
+        return {"id": uuid.uuid4().hex, "summary": "", "turns": []}
+
+    def get(self, username: str, session_id: str) -> Optional[Dict]:
+        return self.cache.get(NAMESPACE, self._key(username, session_id))
+
+    def save(self, username: str, session: Dict):
+        self.cache.set(
+            NAMESPACE, self._key(username, session["id"]), session, ttl=self.ttl
+        )
+
+    def delete(self, username: str, session_id: str):
+        self.cache.delete(NAMESPACE, self._key(username, session_id))
+
+    def history(self, session: Dict) -> str:
+        """The conversation so far, as sent to the model."""
+        parts = []
+        if session["summary"]:
+            parts.append(f"Summary of earlier conversation: {session['summary']}")
+        parts.extend(self._format_turn(turn) for turn in session["turns"])
+        return "\n".join(parts)
+
+    def _format_turn(self, turn: Dict) -> str:
+        return f"User: {turn['user']}\nAssistant: {turn['assistant']}"
+
+    def add_turn(self, username: str, session: Dict, question: str, answer: str):
+        """Append a turn to the stored session and return the session saved.
+
+        The turn is appended to the latest stored copy, and appended again if
+        another request saved the session in between, so concurrent messages
+        to one session each keep their turn instead of the last save winning.
+        """
+        turn = {
+            "id": uuid.uuid4().hex,
+            "user": question,
+            "assistant": strip_citations(answer),
+        }
+        turn["tokens"] = count_tokens(self._format_turn(turn))
+        while True:
+            stored = self.get(username, session["id"])
+            # A copy: the memory cache hands out the stored object itself
+            latest = copy.deepcopy(stored or session)
+            for earlier in latest["turns"]:
+                earlier.setdefault("id", uuid.uuid4().hex)
+            latest["turns"].append(turn)
+            if self._update(username, session["id"], stored, latest):
+                return latest
+
+    def needs_summary(self, session: Dict) -> bool:
+        tokens = sum(turn["tokens"] for turn in session["turns"])
+        return tokens > self.history_token_budget
+
+    def summarize(self, username: str, session_id: str, llm_client: LLMClient):
+        """Fold the oldest turns into the summary if over the budget.
+
+        Enough turns are folded to bring the recent turns down to half the
+        budget, so summaries are produced every few turns, not on every turn.
+        The session is not held during the LLM call: turns added meanwhile
+        are kept, and the result is dropped if another summary was saved first.
+        """
+        session = self.get(username, session_id)
+        if session is None or not self.needs_summary(session):
+            return
+
+        # Always keep the latest turn verbatim
+        turns = session["turns"]
+        folded = 0
+        remaining = sum(turn["tokens"] for turn in turns)
+        while folded < len(turns) - 1 and remaining > self.history_token_budget // 2:
+            remaining -= turns[folded]["tokens"]
+            folded += 1
+        if not folded:
+            return
+        logger.debug("Folding %d turns of session %s", folded, session_id)
+        try:
+            summary = llm_client.summarize_conversation(
+                session["summary"], turns[:folded], max_tokens=self.summary_max_tokens
+            )
+        except Exception as e:
+            # The turns stay verbatim and are folded after a later message
+            logger.warning("Summarizing session %s failed: %s", session_id, e)
+            return
+
+        folded_ids = {turn["id"] for turn in turns[:folded]}
+        while True:
+            stored = self.get(username, session_id)
+            if stored is None or stored["summary"] != session["summary"]:
+                return
+            latest = copy.deepcopy(stored)
+            latest["summary"] = summary
+            latest["turns"] = [
+                turn for turn in latest["turns"] if turn["id"] not in folded_ids
+            ]
+            if self._update(username, session_id, stored, latest):
+                return
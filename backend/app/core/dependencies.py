@@ -0,0 +1,185 @@
+"""Shared services for the routers, created on first use.
+
+Importing the app no longer loads the tokenizer, connects to Weaviate or
+builds LLM clients; each service is created the first time a request
+needs it, shared by every router, and closed when the app shuts down.
+Routers receive them through ``Depends``.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from .citations import SourceSelector
+from .config import settings
+from .conversations import ConversationStore
+from .document_processor import DocumentProcessor
+from .llm_client import LLMClient
+from .query_handles import QueryHandles
+from .shared_cache import SharedCache, create_session_cache, create_shared_cache
+from .text_cleaning import IndexFingerprints
+from .vector_store import VectorStore, create_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cache: Optional[SharedCache] = None
+        self._session_cache: Optional[SharedCache] = None
+        self._vector_store: Optional[VectorStore] = None
+        self._llm_client: Optional[LLMClient] = None
+        self._doc_processor: Optional[DocumentProcessor] = None
+        self._conversations: Optional[ConversationStore] = None
+        self._fingerprints: Optional[IndexFingerprints] = None
+        self._source_selector: Optional[SourceSelector] = None
+        self._query_handles: Optional[QueryHandles] = None
+
+    @property
+    def cache(self) -> SharedCache:
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = create_shared_cache()
+        return self._cache
+
+    @property
+    def session_cache(self) -> SharedCache:
+        if self._session_cache is None:
+            with self._lock:
+                if self._session_cache is None:
+                    self._session_cache = create_session_cache()
+        return self._session_cache
+
+    @property
+    def vector_store(self) -> VectorStore:
+        if self._vector_store is None:
+            with self._lock:
+                if self._vector_store is None:
+                    self._vector_store = create_vector_store(cache=self.cache)
+        return self._vector_store
+
+    @property
+    def llm_client(self) -> LLMClient:
+        if self._llm_client is None:
+            with self._lock:
+                if self._llm_client is None:
+                    self._llm_client = LLMClient(cache=self.cache)
+        return self._llm_client
+
+    @property
+    def doc_processor(self) -> DocumentProcessor:
+        if self._doc_processor is None:
+            with self._lock:
+                if self._doc_processor is None:
+                    self._doc_processor = DocumentProcessor()
+        return self._doc_processor
+
+    @property
+    def conversations(self) -> ConversationStore:
+        if self._conversations is None:
+            with self._lock:
+                if self._conversations is None:
+                    self._conversations = ConversationStore(
+                        self.session_cache,
+                        history_token_budget=settings.CHAT_HISTORY_TOKEN_BUDGET,
+                        summary_max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+                        ttl=settings.CHAT_SESSION_TTL_SECONDS,
+                    )
+        return self._conversations
+
+    @property
+    def fingerprints(self) -> IndexFingerprints:
+        if self._fingerprints is None:
+            with self._lock:
+                if self._fingerprints is None:
+                    self._fingerprints = IndexFingerprints(
+                        self.cache,
+                        self.vector_store,
+                        max_distance=settings.NEAR_DUPLICATE_MAX_DISTANCE,
+                    )
+        return self._fingerprints
+
+    @property
+    def source_selector(self) -> SourceSelector:
+        if self._source_selector is None:
+            with self._lock:
+                if self._source_selector is None:
+                    self._source_selector = SourceSelector(
+                        settings.RELEVANCE_THRESHOLD,
+                        thresholds=self._relevance_threshold,
+                        max_sources=settings.MAX_CITED_SOURCES,
+                    )
+        return self._source_selector
+
+    @property
+    def query_handles(self) -> QueryHandles:
+        if self._query_handles is None:
+            with self._lock:
+                if self._query_handles is None:
+                    self._query_handles = QueryHandles(
+                        self.cache, ttl=settings.QUERY_HANDLE_TTL_SECONDS
+                    )
+        return self._query_handles
+
+    def _relevance_threshold(self, collection: str) -> Optional[float]:
+        recorded = self.vector_store.get_collection_settings(collection)
+        return recorded.get("relevance_threshold")
+
+    def close(self):
+        """Close whatever was created; the container can be reused afterwards."""
+        with self._lock:
+            vector_store, self._vector_store = self._vector_store, None
+            llm_client, self._llm_client = self._llm_client, None
+            cache, self._cache = self._cache, None
+            session_cache, self._session_cache = self._session_cache, None
+            doc_processor, self._doc_processor = self._doc_processor, None
+            self._conversations = None
+            self._fingerprints = None
+            self._source_selector = None
+            self._query_handles = None
+
+        for name, close in (
+            ("vector store", vector_store and vector_store.close),
+            ("document processor", doc_processor and doc_processor.close),
+            ("LLM provider", llm_client and llm_client.provider.close),
+            ("cache", cache and cache.close),
+            ("session cache", session_cache and session_cache.close),
+        ):
+            if close:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning("Error closing %s: %s", name, e)
+
+
+container = ServiceContainer()
+
+
+def get_vector_store() -> VectorStore:
+    return container.vector_store
+
+
+def get_llm_client() -> LLMClient:
+    return container.llm_client
+
+
+def get_document_processor() -> DocumentProcessor:
+    return container.doc_processor
+
+
+def get_conversation_store() -> ConversationStore:
+    return container.conversations
+
+
+def get_index_fingerprints() -> IndexFingerprints:
+    return container.fingerprints
+
+
+def get_source_selector() -> SourceSelector:
+    return container.source_selector
+
+
+def get_query_handles() -> QueryHandles:
+    return container.query_handles
@@ -1,60 +1,113 @@
-import PyPDF2
-import docx2txt
+import logging
 import magic
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from typing import List, Dict, Optional
 import tiktoken
-from io import BytesIO
+from .config import settings
+from .extractors import (
+    DOCX_EXTRACTORS,
+    PAGE_BREAK,
+    PDF_EXTRACTORS,
+    PDFExtractor,
+    TextExtractor,
+    extract_pdf_parallel,
+    resolve_extractors,
+)
+from .text_cleaning import NearDuplicateIndex, simhash, strip_repeated_lines
+
+logger = logging.getLogger(__name__)
 
 
 class DocumentProcessor:
-    def __init__(self):
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
-        self.chunk_size = 500
-        self.chunk_overlap = 50
+    def __init__(
+        self,
+        pdf_extractors: Optional[str] = None,
+        docx_extractors: Optional[str] = None,
+        pdf_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+    ):
+        self.chunk_size = chunk_size or settings.CHUNK_SIZE_TOKENS
+        self.chunk_overlap = (
+            settings.CHUNK_OVERLAP_TOKENS if chunk_overlap is None else chunk_overlap
+        )
+        if not 0 <= self.chunk_overlap < self.chunk_size:
+            raise ValueError(
+                f"Chunk overlap ({self.chunk_overlap}) must be smaller than the "
+                f"chunk size ({self.chunk_size})"
+            )
+        # Backend preference lists; the first installed backend is used and
+        # the rest are fallbacks
+        self.pdf_extractors: List[PDFExtractor] = resolve_extractors(
+            pdf_extractors or settings.PDF_EXTRACTORS, PDF_EXTRACTORS
+        )
+        self.docx_extractors: List[TextExtractor] = resolve_extractors(
+            docx_extractors or settings.DOCX_EXTRACTORS, DOCX_EXTRACTORS
+        )
+        self.pdf_workers = (
+            settings.PDF_EXTRACT_WORKERS if pdf_workers is None else pdf_workers
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @cached_property
+    def tokenizer(self):
+        # Loaded on first use; the encoding may be downloaded on a cold cache
+        return tiktoken.get_encoding("cl100k_base")
 
     def extract_text(self, file_content: bytes, mime_type: str) -> str:
         """Extract text from different file types."""
         if "pdf" in mime_type.lower():
-            return self._extract_from_pdf(file_content)
+            return self._extract_with_fallback(
+                self.pdf_extractors, file_content, self._extract_pdf
+            )
         elif "word" in mime_type.lower() or "docx" in mime_type.lower():
-            return self._extract_from_docx(file_content)
+            return self._extract_with_fallback(
+                self.docx_extractors, file_content, lambda e, c: e.extract(c)
+            )
         elif "text" in mime_type.lower():
             return file_content.decode("utf-8")
         else:
             raise ValueError(f"Unsupported file type: {mime_type}")
 
-    def _extract_from_pdf(self, content: bytes) -> str:
-        print("Starting PDF text extraction")
-        try:
-            pdf_file = BytesIO(content)
-            print("Created BytesIO object")
-
-            reader = PyPDF2.PdfReader(pdf_file)
-            print(f"Created PDF reader, found {len(reader.pages)} pages")
-
-            text = ""
-            for i, page in enumerate(reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    print(f"Extracted {len(page_text)} characters from page {i + 1}")
-                    text += page_text + "\n"
-                except Exception as e:
-                    print(f"Error extracting text from page {i + 1}: {str(e)}")
-
-            if not text.strip():
-                print("Warning: No text extracted from PDF")
-            else:
-                print(f"Successfully extracted {len(text)} total characters")
+    def _extract_with_fallback(self, extractors, content: bytes, extract) -> str:
+        """Try each backend in turn until one returns text."""
+        text = ""
+        error: Optional[Exception] = None
+        for extractor in extractors:
+            try:
+                text = extract(extractor, content)
+            except Exception as e:
+                logger.warning("Extractor %s failed: %s", extractor.name, e)
+                error = e
+                continue
+            if text.strip():
+                logger.debug(
+                    "Extracted %d characters with %s", len(text), extractor.name
+                )
+                return text
+            logger.warning("Extractor %s returned no text", extractor.name)
+        if error is not None and not text.strip():
+            raise error
+        return text
 
-            return text
-        except Exception as e:
-            print(f"Error in PDF extraction: {str(e)}")
-            raise
+    def _extract_pdf(self, extractor: PDFExtractor, content: bytes) -> str:
+        if self.pdf_workers > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.pdf_workers)
+            return extract_pdf_parallel(
+                extractor,
+                content,
+                self._executor,
+                self.pdf_workers,
+                settings.PDF_PARALLEL_MIN_PAGES,
+            )
+        return extractor.extract(content)
 
-    def _extract_from_docx(self, content: bytes) -> str:
-        docx_file = BytesIO(content)
-        text = docx2txt.process(docx_file)
-        return text
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
 
     def create_chunks(self, text: str) -> List[str]:
         """Split text into chunks with overlap."""
@@ -80,57 +133,110 @@ class DocumentProcessor:
         try:
             mime = magic.Magic(mime=True)
             mime_type = mime.from_buffer(content)
-            print(f"Detected MIME type: {mime_type} for file: {filename}")
+            logger.debug("Detected MIME type %s for file %s", mime_type, filename)
 
-            # Add more detailed logging for PDF files
             if filename.lower().endswith(".pdf"):
-                print(f"File has .pdf extension")
                 if "pdf" not in mime_type.lower():
-                    print(
-                        f"Warning: File has .pdf extension but mime-type is {mime_type}"
+                    logger.warning(
+                        "File %s has .pdf extension but MIME type is %s "
+                        "(first 20 bytes: %r)",
+                        filename,
+                        mime_type,
+                        content[:20],
                     )
-                    print(f"First 20 bytes of content: {content[:20]}")
                     # Force PDF mime type for files with .pdf extension
                     return "application/pdf"
 
             return mime_type
         except Exception as e:
-            print(f"Error detecting MIME type: {str(e)}")
-            print(f"Attempting fallback detection for file: {filename}")
+            logger.warning(
+                "Error detecting MIME type for %s, falling back to extension: %s",
+                filename,
+                e,
+            )
             # Fallback to extension-based detection
             if filename.lower().endswith(".pdf"):
-                print("Fallback: Using application/pdf based on .pdf extension")
                 return "application/pdf"
             elif filename.lower().endswith((".doc", ".docx")):
-                print(
-                    "Fallback: Using application/msword based on .doc/.docx extension"
-                )
                 return "application/msword"
             elif filename.lower().endswith(".txt"):
-                print("Fallback: Using text/plain based on .txt extension")
                 return "text/plain"
             else:
                 raise ValueError(f"Could not determine MIME type for file: {filename}")
 
-    def process_document(self, content: bytes, metadata: Dict) -> List[Dict]:
-        """Process document and return chunks with metadata."""
-        try:
-            filename = metadata.get("filename", "")
-            print(f"Processing document: {filename}")
-            print(f"Content length: {len(content)} bytes")
+    def clean_text(self, text: str) -> str:
+        """Join the extracted pages, dropping lines repeated on most of them."""
+        if not settings.INGEST_STRIP_BOILERPLATE:
+            return text.replace(PAGE_BREAK, "\n")
+        return strip_repeated_lines(text, settings.BOILERPLATE_MIN_PAGE_FRACTION)
 
-            mime_type = self.get_mime_type(content, filename)
-            print(f"Determined MIME type: {mime_type}")
+    def drop_near_duplicates(
+        self,
+        chunks: List[str],
+        filename: str,
+        seen: Optional[NearDuplicateIndex] = None,
+    ) -> List[str]:
+        """Drop chunks that nearly repeat an earlier chunk of the document or,
+        given the fingerprints of the index's chunks with the same ACL in
+        ``seen``, a chunk of another document.
+
+        The kept chunks' fingerprints replace the document's old ones in
+        ``seen``.
+        """
+        max_distance = settings.NEAR_DUPLICATE_MAX_DISTANCE
+        own = NearDuplicateIndex(max_distance)
+        if seen is not None:
+            seen.discard_owner(filename)
+        kept = []
+        for chunk in chunks:
+            fingerprint = simhash(chunk)
+            if own.find(fingerprint) is None and (
+                seen is None or seen.find(fingerprint) is None
+            ):
+                own.add(fingerprint, filename)
+                kept.append(chunk)
+        if seen is not None:
+            for fingerprint in own.owners:
+                seen.add(fingerprint, filename)
+        if len(kept) < len(chunks):
+            logger.info(
+                "Dropped %d near-duplicate chunks of %s",
+                len(chunks) - len(kept),
+                filename,
+            )
+        return kept
+
+    def process_document(
+        self,
+        content: bytes,
+        metadata: Dict,
+        seen: Optional[NearDuplicateIndex] = None,
+    ) -> List[Dict]:
+        """Process document and return chunks with metadata.
 
-            text = self.extract_text(content, mime_type)
-            print(f"Extracted text length: {len(text)} characters")
+        ``seen`` holds the fingerprints of the chunks already in the target
+        index, so chunks repeating another document's are not ingested again.
+        """
+        filename = metadata.get("filename", "")
+        try:
+            mime_type = self.get_mime_type(content, filename)
+            text = self.clean_text(self.extract_text(content, mime_type))
 
             if not text.strip():
                 raise ValueError("No text content extracted from document")
 
             # Create chunks from text
             chunks = self.create_chunks(text)
-            print(f"Created {len(chunks)} chunks")
+            if settings.INGEST_DEDUP_CHUNKS:
+                chunks = self.drop_near_duplicates(chunks, filename, seen)
+            logger.debug(
+                "Processed %s (%d bytes, %s): %d characters, %d chunks",
+                filename,
+                len(content),
+                mime_type,
+                len(text),
+                len(chunks),
+            )
 
             # Process chunks with metadata
             processed_chunks = []
@@ -147,5 +253,5 @@ class DocumentProcessor:
 
             return processed_chunks
         except Exception as e:
-            print(f"Error processing document: {str(e)}")
+            logger.error("Error processing document %s: %s", filename, e)
             raise
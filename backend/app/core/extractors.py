@@ -0,0 +1,248 @@
+"""Text extraction backends for PDF and Word documents.
+
+Backends are registered by name and chosen with the PDF_EXTRACTORS and
+DOCX_EXTRACTORS settings, each a comma-separated preference list: the first
+installed backend is used, and the others are tried in order when it fails
+or returns no text. Only the libraries in requirements.txt are installed by
+default; ``pdfminer.six`` and ``python-docx`` can be added to enable their
+backends. ``python -m benchmarks.extractors`` compares the backends.
+
+Large PDFs can be split into page ranges extracted in parallel worker
+processes, since the pure-Python backends are bound by the GIL.
+"""
+
+import importlib.util
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+PAGE_BREAK = "\f"
+
+# PDFium is not thread-safe: every pypdfium2 call in a process holds this lock
+_pdfium_lock = threading.Lock()
+
+
+class TextExtractor(ABC):
+    """Extracts plain text from one document format."""
+
+    name: str
+    module: str  # Import name of the library the backend needs
+
+    @classmethod
+    def available(cls) -> bool:
+        return importlib.util.find_spec(cls.module) is not None
+
+    @abstractmethod
+    def extract(self, content: bytes) -> str:
+        pass
+
+
+class PDFExtractor(TextExtractor):
+    """PDF backend that can extract a range of pages."""
+
+    def extract(self, content: bytes) -> str:
+        """Text of every page, with pages separated by form feeds."""
+        return PAGE_BREAK.join(self.extract_pages(content))
+
+    @abstractmethod
+    def page_count(self, content: bytes) -> int:
+        pass
+
+    @abstractmethod
+    def extract_pages(
+        self, content: bytes, start: int = 0, stop: Optional[int] = None
+    ) -> List[str]:
+        """Text of pages ``start`` to ``stop`` (exclusive), one per page."""
+
+
+class PdfiumExtractor(PDFExtractor):
+    """PDFium (the Chrome PDF engine) through pypdfium2.
+
+    PDFium must not be called from two threads at once, so extractions in
+    one process run one at a time; large PDFs still extract in parallel
+    across the worker processes of ``extract_pdf_parallel``.
+    """
+
+    name = "pypdfium2"
+    module = "pypdfium2"
+
+    def page_count(self, content: bytes) -> int:
+        import pypdfium2
+
+        with _pdfium_lock:
+            pdf = pypdfium2.PdfDocument(content)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+
+    def extract_pages(self, content, start=0, stop=None):
+        import pypdfium2
+
+        with _pdfium_lock:
+            pdf = pypdfium2.PdfDocument(content)
+            try:
+                texts = []
+                for index in range(start, len(pdf) if stop is None else stop):
+                    page = pdf[index]
+                    textpage = page.get_textpage()
+                    texts.append(textpage.get_text_bounded().replace("\r\n", "\n"))
+                    textpage.close()
+                    page.close()
+                return texts
+            finally:
+                pdf.close()
+
+
+class _PdfReaderExtractor(PDFExtractor):
+    """Backends sharing the PyPDF2/pypdf ``PdfReader`` interface."""
+
+    def _reader(self, content: bytes):
+        return importlib.import_module(self.module).PdfReader(BytesIO(content))
+
+    def page_count(self, content: bytes) -> int:
+        return len(self._reader(content).pages)
+
+    def extract_pages(self, content, start=0, stop=None):
+        reader = self._reader(content)
+        texts = []
+        for index, page in enumerate(reader.pages[start:stop], start=start):
+            try:
+                texts.append(page.extract_text())
+            except Exception as e:
+                logger.warning("Error extracting text from page %d: %s", index + 1, e)
+                texts.append("")
+        return texts
+
+
+class PyPDFExtractor(_PdfReaderExtractor):
+    name = "pypdf"
+    module = "pypdf"
+
+
+class PyPDF2Extractor(_PdfReaderExtractor):
+    """The unmaintained predecessor of pypdf, kept as a last resort."""
+
+    name = "pypdf2"
+    module = "PyPDF2"
+
+
+class PdfMinerExtractor(PDFExtractor):
+    """pdfminer.six; slow, but follows the layout of multi-column pages."""
+
+    name = "pdfminer"
+    module = "pdfminer"
+
+    def page_count(self, content: bytes) -> int:
+        from pdfminer.pdfpage import PDFPage
+
+        return sum(1 for _ in PDFPage.get_pages(BytesIO(content)))
+
+    def extract_pages(self, content, start=0, stop=None):
+        from pdfminer.high_level import extract_text
+
+        if stop is None:
+            stop = self.page_count(content)
+        text = extract_text(BytesIO(content), page_numbers=range(start, stop))
+        # pdfminer ends every page with a form feed
+        return text.split("\f")[: stop - start]
+
+
+class PythonDocxExtractor(TextExtractor):
+    """python-docx; paragraphs, then table rows as tab-separated cells."""
+
+    name = "python-docx"
+    module = "docx"
+
+    def extract(self, content: bytes) -> str:
+        import docx
+
+        document = docx.Document(BytesIO(content))
+        parts = [paragraph.text for paragraph in document.paragraphs]
+        for table in document.tables:
+            for row in table.rows:
+                parts.append("\t".join(cell.text for cell in row.cells))
+        return "\n".join(parts)
+
+
+class Docx2txtExtractor(TextExtractor):
+    name = "docx2txt"
+    module = "docx2txt"
+
+    def extract(self, content: bytes) -> str:
+        import docx2txt
+
+        return docx2txt.process(BytesIO(content))
+
+
+PDF_EXTRACTORS: Dict[str, Type[PDFExtractor]] = {
+    extractor.name: extractor
+    for extractor in (
+        PdfiumExtractor,
+        PyPDFExtractor,
+        PdfMinerExtractor,
+        PyPDF2Extractor,
+    )
+}
+DOCX_EXTRACTORS: Dict[str, Type[TextExtractor]] = {
+    extractor.name: extractor for extractor in (PythonDocxExtractor, Docx2txtExtractor)
+}
+
+
+def resolve_extractors(names: str, registry: Dict[str, Type]) -> List:
+    """Instances of the installed backends in ``names``, in preference order."""
+    extractors = []
+    for name in (name.strip().lower() for name in names.split(",")):
+        if not name:
+            continue
+        if name not in registry:
+            raise ValueError(
+                f"Unknown extractor: {name} (choose from {', '.join(registry)})"
+            )
+        if registry[name].available():
+            extractors.append(registry[name]())
+        else:
+            logger.info("Extractor %s is not installed; skipping it", name)
+    if not extractors:
+        raise ValueError(f"None of the extractors {names!r} is installed")
+    return extractors
+
+
+def _extract_page_range(name: str, content: bytes, start: int, stop: int):
+    # Runs in a worker process, so the backend is looked up by name
+    return PDF_EXTRACTORS[name]().extract_pages(content, start, stop)
+
+
+def extract_pdf_parallel(
+    extractor: PDFExtractor,
+    content: bytes,
+    executor: ProcessPoolExecutor,
+    workers: int,
+    min_pages: int,
+) -> str:
+    """Extract a PDF with its pages split across ``executor``'s processes.
+
+    Documents under ``min_pages`` pages are extracted in the calling thread,
+    where starting the work costs less than it would save.
+    """
+    pages = extractor.page_count(content)
+    if pages < max(min_pages, 2):
+        return extractor.extract(content)
+
+    step = -(-pages // workers)
+    futures = [
+        executor.submit(
+            _extract_page_range,
+            extractor.name,
+            content,
+            start,
+            min(start + step, pages),
+        )
+        for start in range(0, pages, step)
+    ]
+    return PAGE_BREAK.join(text for future in futures for text in future.result())
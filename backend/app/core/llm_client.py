@@ -1,90 +1,153 @@
-from openai import AzureOpenAI
-from typing import List, Dict
+import logging
+from typing import List, Dict, Optional, Tuple
 from .config import settings
+from .llm_providers import LLMProvider, LLMRateLimitError, create_llm_provider
+from .metrics import RETRIES, record_tokens
+from .shared_cache import SharedCache, cache_key
+from .tracing import set_span_attributes, start_span
 
+logger = logging.getLogger(__name__)
 
-from openai import AzureOpenAI
-from typing import List, Dict
-from .config import settings
-import inspect
-import httpx
+
+COMPLETION_SYSTEM_PROMPT = (
+    "You are a helpful assistant that answers questions based on the provided "
+    "context. Use superscript numbers to cite sources in your answer. After your "
+    "answer, add exactly two newlines, then a 'Citation' section that lists only "
+    "the sources you actually cited. The word 'Citation' should only appear once, "
+    "at the start of the citation list. Keep your answer focused and concise."
+)
+
+
+def format_contexts(context: List[Dict]) -> Tuple[str, int]:
+    """Number the contexts by source document for citation.
+
+    Returns the formatted contexts and the number of documents; chunks of the
+    same document are joined under one number, in order of first appearance.
+    """
+    doc_contexts: Dict[str, List[str]] = {}
+    for item in context:
+        doc_contexts.setdefault(item["metadata"]["filename"], []).append(item["text"])
+
+    formatted_contexts = []
+    for i, (doc_id, texts) in enumerate(doc_contexts.items()):
+        doc_text = "\n".join(texts)
+        formatted_contexts.append(f"Context {i + 1} (from {doc_id}):\n{doc_text}")
+    return "\n\n".join(formatted_contexts), len(doc_contexts)
+
+
+def completion_prompt(
+    query: str, formatted_context: str, history: Optional[str] = None
+) -> str:
+    """The user message sent with the contexts to answer ``query``."""
+    conversation = f"\nConversation so far:\n{history}\n" if history else ""
+    return f"""Use the following numbered contexts to answer the question.
+If you cannot find the answer in the contexts, say so.
+Important instructions for response format:
+1. First provide your answer, using superscript numbers (e.g. ¹) to cite sources
+2. Then add a blank line
+3. Then write "Citation" as a header
+4. Then list ONLY the documents you cited in your answer, numbered to match your citations
+5. Do not add the word "Citation" anywhere except as the final section header
+6. Do not list any sources that weren't cited in your answer
+7. Do not list the same source multiple times
+
+Example answer format:
+The model uses a four-stage pipeline¹ and includes rejection sampling².
+
+[Your answer should end here, followed by exactly two newlines before the Citation section]
+
+Citation
+1. pipeline_docs.pdf
+2. sampling_guide.pdf
+
+{formatted_context}
+{conversation}
+Question: {query}
+
+Answer (with citations, followed by two newlines and then the Citation section):"""
 
 
 class LLMClient:
-    def __init__(self):
+    def __init__(
+        self,
+        provider: Optional[LLMProvider] = None,
+        cache: Optional[SharedCache] = None,
+    ):
         try:
-            # Create a custom httpx client without any proxy settings
-            http_client = httpx.Client()
-
-            # Initialize Azure OpenAI clients for embeddings and chat
-            self.embedding_client = AzureOpenAI(
-                api_key=settings.AZURE_OPENAI_API_KEY,
-                api_version=settings.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-                http_client=http_client,
-                default_headers={"Accept-Encoding": "identity"},
-            )
-
-            self.chat_client = AzureOpenAI(
-                api_key=settings.AZURE_OPENAI_API_KEY,
-                api_version=settings.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-                http_client=http_client,
-                default_headers={"Accept-Encoding": "identity"},
-            )
+            # Azure OpenAI unless LLM_PROVIDER selects the offline fake
+            self.provider = provider or create_llm_provider()
+            # Query embeddings and answers; None disables caching
+            self.cache = cache
 
             self.embedding_deployment = settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME
             self.chat_deployment = settings.AZURE_OPENAI_CHAT_DEPLOYMENT_NAME
+            self.embedding_dimensions = settings.AZURE_OPENAI_EMBEDDING_DIMENSIONS
 
         except Exception as e:
-            print(f"Initialization error: {type(e).__name__}: {str(e)}")
-            print(f"Error occurred in: {__file__}")
+            logger.error("LLM client initialization error: %s: %s", type(e).__name__, e)
             raise
 
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings for a list of texts."""
+    def _create_embeddings(
+        self, texts: List[str], dimensions: Optional[int]
+    ) -> List[List[float]]:
+        """Embed texts with the embedding deployment."""
+        with start_span(
+            "llm.embed",
+            deployment=self.embedding_deployment,
+            texts=len(texts),
+            dimensions=dimensions,
+        ) as span:
+            result = self.provider.embed(self.embedding_deployment, texts, dimensions)
+            set_span_attributes(span, prompt_tokens=result.prompt_tokens)
+        record_tokens("embedding", sent=result.prompt_tokens)
+        return result.embeddings
+
+    def get_embeddings(
+        self, texts: List[str], dimensions: Optional[int] = None
+    ) -> List[List[float]]:
+        """Get embeddings for a list of texts.
+
+        ``dimensions`` should be the size recorded for the target collection,
+        so stored and query vectors match; None uses the model's native size.
+        """
         all_embeddings = []
         batch_size = 50  # Process 50 texts at a time
 
         for i in range(0, len(texts), batch_size):
             batch = texts[i : i + batch_size]
-            print(
-                f"Getting embeddings for batch {i // batch_size + 1} of {(len(texts) + batch_size - 1) // batch_size}"
+            logger.debug(
+                "Getting embeddings for batch %d of %d",
+                i // batch_size + 1,
+                (len(texts) + batch_size - 1) // batch_size,
             )
 
             try:
-                response = self.embedding_client.embeddings.create(
-                    model=self.embedding_deployment, input=batch
-                )
-                batch_embeddings = [item.embedding for item in response.data]
+                batch_embeddings = self._create_embeddings(batch, dimensions)
                 all_embeddings.extend(batch_embeddings)
+            except LLMRateLimitError:
+                raise  # Splitting the batch would only add load
             except Exception as e:
-                print(f"Error getting embeddings for batch: {str(e)}")
+                logger.warning("Error getting embeddings for batch: %s", e)
                 # Retry with smaller batch if error occurs
                 if len(batch) > 1:
-                    print("Retrying with smaller batch size...")
+                    logger.info("Retrying with smaller batch size")
+                    RETRIES.labels(component="llm_embedding").inc()
                     half_size = len(batch) // 2
                     first_half = batch[:half_size]
                     second_half = batch[half_size:]
 
                     try:
                         # Process first half
-                        response = self.embedding_client.embeddings.create(
-                            model=self.embedding_deployment, input=first_half
-                        )
                         all_embeddings.extend(
-                            [item.embedding for item in response.data]
+                            self._create_embeddings(first_half, dimensions)
                         )
 
                         # Process second half
-                        response = self.embedding_client.embeddings.create(
-                            model=self.embedding_deployment, input=second_half
-                        )
                         all_embeddings.extend(
-                            [item.embedding for item in response.data]
+                            self._create_embeddings(second_half, dimensions)
                         )
                     except Exception as retry_error:
-                        print(f"Error during retry: {str(retry_error)}")
+                        logger.error("Error during retry: %s", retry_error)
                         raise Exception(
                             f"Failed to get embeddings even with smaller batch: {str(retry_error)}"
                         )
@@ -95,85 +158,155 @@ class LLMClient:
 
         return all_embeddings
 
-    def get_completion(
-        self, query: str, context: List[Dict], max_tokens: int = 500
+    def _chat(
+        self,
+        operation: str,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float,
+        **span_attributes,
     ) -> str:
-        """Generate completion using RAG context."""
-        # Group contexts by source document to avoid duplicate citations
-        doc_contexts = {}
-        for item in context:
-            doc_id = item["metadata"]["filename"]
-            if doc_id not in doc_contexts:
-                doc_contexts[doc_id] = []
-            doc_contexts[doc_id].append(item["text"])
-
-        # Format context with numbers for citation, using document as the basis
-        formatted_contexts = []
-        for i, (doc_id, texts) in enumerate(doc_contexts.items()):
-            # Join all contexts from the same document
-            doc_text = "\n".join(texts)
-            formatted_contexts.append(f"Context {i + 1} (from {doc_id}):\n{doc_text}")
-
-        formatted_context = "\n\n".join(formatted_contexts)
-
-        prompt = f"""Use the following numbered contexts to answer the question.
-If you cannot find the answer in the contexts, say so.
-Important instructions for response format:
-1. First provide your answer, using superscript numbers (e.g. ¹) to cite sources
-2. Then add a blank line
-3. Then write "Citation" as a header
-4. Then list ONLY the documents you cited in your answer, numbered to match your citations
-5. Do not add the word "Citation" anywhere except as the final section header
-6. Do not list any sources that weren't cited in your answer
-7. Do not list the same source multiple times
-
-Example answer format:
-The model uses a four-stage pipeline¹ and includes rejection sampling².
-
-[Your answer should end here, followed by exactly two newlines before the Citation section]
-
-Citation
-1. pipeline_docs.pdf
-2. sampling_guide.pdf
+        """Run a chat completion, recording its span and token usage."""
+        with start_span(
+            "llm.chat",
+            deployment=self.chat_deployment,
+            operation=operation,
+            max_tokens=max_tokens,
+            **span_attributes,
+        ) as span:
+            response = self.provider.chat(
+                self.chat_deployment,
+                messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            set_span_attributes(
+                span,
+                prompt_tokens=response.prompt_tokens,
+                completion_tokens=response.completion_tokens,
+            )
+        record_tokens(
+            operation, sent=response.prompt_tokens, received=response.completion_tokens
+        )
+        return response.content
 
-{formatted_context}
+    def get_completion(
+        self,
+        query: str,
+        context: List[Dict],
+        max_tokens: int = 500,
+        history: Optional[str] = None,
+    ) -> str:
+        """Generate completion using RAG context.
 
-Question: {query}
+        ``history`` is the conversation so far (a summary of older turns and
+        the recent turns), so follow-up questions are answered in context.
+        """
+        formatted_context, documents = format_contexts(context)
 
-Answer (with citations, followed by two newlines and then the Citation section):"""
+        answer_key = None
+        if self.cache is not None and settings.ANSWER_CACHE_TTL_SECONDS > 0:
+            answer_key = cache_key(
+                self.chat_deployment, query, formatted_context, max_tokens, history
+            )
+            cached = self.cache.get("answer", answer_key)
+            if cached is not None:
+                return cached
 
+        prompt = completion_prompt(query, formatted_context, history)
         try:
-            print(f"Attempting chat completion with deployment: {self.chat_deployment}")
-            print(f"Query: {query}")
-            print(f"Number of source documents: {len(doc_contexts)}")
-
-            response = self.chat_client.chat.completions.create(
-                model=self.chat_deployment,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that answers questions based on the provided context. Use superscript numbers to cite sources in your answer. After your answer, add exactly two newlines, then a 'Citation' section that lists only the sources you actually cited. The word 'Citation' should only appear once, at the start of the citation list. Keep your answer focused and concise.",
-                    },
+            logger.debug(
+                "Chat completion with deployment %s for %d source documents",
+                self.chat_deployment,
+                documents,
+            )
+
+            content = self._chat(
+                "completion",
+                [
+                    {"role": "system", "content": COMPLETION_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=max_tokens,
                 temperature=0.3,
+                sources=documents,
             )
-            print("Chat completion successful")
-            return response.choices[0].message.content
+            if answer_key is not None:
+                self.cache.set(
+                    "answer",
+                    answer_key,
+                    content,
+                    ttl=settings.ANSWER_CACHE_TTL_SECONDS,
+                )
+            return content
+        except LLMRateLimitError:
+            raise
         except Exception as e:
-            print(f"Chat completion error: {type(e).__name__}: {str(e)}")
-            print(
-                f"Error details: {e.__dict__ if hasattr(e, '__dict__') else 'No additional details'}"
-            )
+            logger.error("Chat completion error: %s: %s", type(e).__name__, e)
             raise Exception(f"Failed to get completion: {str(e)}")
 
-    def get_query_embedding(self, query: str) -> List[float]:
+    def rewrite_query(self, history: str, question: str, max_tokens: int = 100) -> str:
+        """Rewrite a follow-up question as a standalone search query."""
+        prompt = f"""Rewrite the question so it can be understood without the
+conversation: resolve pronouns and references using the conversation. Keep the
+wording of a question that already stands alone. Reply with the rewritten
+question only.
+
+Conversation so far:
+{history}
+
+Question: {question}"""
+        rewritten = self._chat(
+            "query_rewrite",
+            [{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0.0,
+        )
+        return rewritten.strip() or question
+
+    def summarize_conversation(
+        self, summary: str, turns: List[Dict], max_tokens: int = 300
+    ) -> str:
+        """Fold conversation turns into the running summary of a chat."""
+        transcript = "\n".join(
+            f"User: {turn['user']}\nAssistant: {turn['assistant']}" for turn in turns
+        )
+        prompt = f"""Update the summary of a conversation with the new turns.
+Keep the topics, documents, names and facts needed to answer follow-up
+questions. Reply with the updated summary only, in under {max_tokens} tokens.
+
+Summary so far:
+{summary or "(none)"}
+
+New turns:
+{transcript}"""
+        return self._chat(
+            "summary",
+            [{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0.0,
+        ).strip()
+
+    def get_query_embedding(
+        self, query: str, dimensions: Optional[int] = None
+    ) -> List[float]:
         """Get embedding for a single query string."""
+        key = None
+        if self.cache is not None and settings.EMBEDDING_CACHE_TTL_SECONDS > 0:
+            key = cache_key(self.embedding_deployment, dimensions, query)
+            cached = self.cache.get("embedding", key)
+            if cached is not None:
+                return cached
+
         try:
-            response = self.embedding_client.embeddings.create(
-                model=self.embedding_deployment, input=[query]
-            )
-            return response.data[0].embedding
+            embedding = self._create_embeddings([query], dimensions)[0]
+        except LLMRateLimitError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to get query embedding: {str(e)}")
+
+        if key is not None:
+            self.cache.set(
+                "embedding", key, embedding, ttl=settings.EMBEDDING_CACHE_TTL_SECONDS
+            )
+        return embedding
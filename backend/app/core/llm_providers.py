@@ -0,0 +1,267 @@
+"""LLM provider backends used by LLMClient.
+
+A provider performs the raw embedding and chat calls; batching, prompt
+construction and error handling stay in LLMClient. ``azure`` talks to Azure
+OpenAI, ``fake`` is a deterministic offline stand-in for load tests and CI.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+import openai
+from openai import AzureOpenAI
+
+from .config import settings
+
+
+@dataclass
+class EmbeddingResult:
+    embeddings: List[List[float]]
+    prompt_tokens: int = 0
+
+
+@dataclass
+class ChatResult:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class LLMRateLimitError(Exception):
+    """Raised when the provider rejects a call because of rate limiting."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMProvider(ABC):
+    name = ""
+
+    @abstractmethod
+    def embed(
+        self, model: str, texts: List[str], dimensions: Optional[int] = None
+    ) -> EmbeddingResult:
+        """Embed ``texts``; ``dimensions`` is only sent when set."""
+
+    @abstractmethod
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float,
+    ) -> ChatResult:
+        """Run a chat completion and return the first choice."""
+
+    def close(self):
+        """Release any network resources held by the provider."""
+
+
+def _retry_after(error: openai.RateLimitError) -> Optional[float]:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class AzureOpenAIProvider(LLMProvider):
+    name = "azure"
+
+    def __init__(self):
+        # Create a custom httpx client without any proxy settings
+        self.http_client = httpx.Client()
+
+        # Initialize Azure OpenAI clients for embeddings and chat
+        self.embedding_client = AzureOpenAI(
+            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            http_client=self.http_client,
+            default_headers={"Accept-Encoding": "identity"},
+        )
+
+        self.chat_client = AzureOpenAI(
+            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            http_client=self.http_client,
+            default_headers={"Accept-Encoding": "identity"},
+        )
+
+    def embed(
+        self, model: str, texts: List[str], dimensions: Optional[int] = None
+    ) -> EmbeddingResult:
+        kwargs = {"model": model, "input": texts}
+        if dimensions:
+            kwargs["dimensions"] = dimensions
+        try:
+            response = self.embedding_client.embeddings.create(**kwargs)
+        except openai.RateLimitError as e:
+            raise LLMRateLimitError(str(e), retry_after=_retry_after(e)) from e
+        return EmbeddingResult(
+            embeddings=[item.embedding for item in response.data],
+            prompt_tokens=getattr(response.usage, "prompt_tokens", 0) or 0,
+        )
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float,
+    ) -> ChatResult:
+        try:
+            response = self.chat_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        except openai.RateLimitError as e:
+            raise LLMRateLimitError(str(e), retry_after=_retry_after(e)) from e
+        usage = response.usage
+        return ChatResult(
+            content=response.choices[0].message.content,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    def close(self):
+        self.http_client.close()
+
+
+_WORD = re.compile(r"\w+")
+_QUESTION = re.compile(r"^Question:\s*(.*)$", re.MULTILINE)
+_CONTEXT_SOURCE = re.compile(r"^Context \d+ \(from (.*)\):$", re.MULTILINE)
+
+
+class FakeLLMProvider(LLMProvider):
+    """Deterministic offline provider.
+
+    Embeddings hash each word into a signed bucket of a fixed-size vector, so
+    texts sharing words get similar vectors and retrieval behaves plausibly.
+    Completions are rendered from a template with ``{question}``,
+    ``{first_source}``, ``{sources}`` and ``{num_sources}`` taken from the
+    RAG prompt; prompts without contexts (query rewrites, conversation
+    summaries) get back the question, or the end of the prompt. Latency and a
+    requests-per-minute limit can be simulated.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        embedding_dimensions: int = 1536,
+        completion_template: str = "",
+        embedding_latency_ms: float = 0,
+        chat_latency_ms: float = 0,
+        requests_per_minute: int = 0,
+    ):
+        self.embedding_dimensions = embedding_dimensions
+        self.completion_template = completion_template
+        self.embedding_latency = embedding_latency_ms / 1000
+        self.chat_latency = chat_latency_ms / 1000
+        self.requests_per_minute = requests_per_minute
+        self._request_times = deque()
+        self._lock = threading.Lock()
+
+    def _admit(self):
+        """Apply the simulated requests-per-minute limit."""
+        if not self.requests_per_minute:
+            return
+        now = time.monotonic()
+        with self._lock:
+            while self._request_times and now - self._request_times[0] >= 60:
+                self._request_times.popleft()
+            if len(self._request_times) >= self.requests_per_minute:
+                retry_after = 60 - (now - self._request_times[0])
+                raise LLMRateLimitError(
+                    "Simulated rate limit exceeded", retry_after=retry_after
+                )
+            self._request_times.append(now)
+
+    def embed_text(self, text: str, dimensions: int) -> List[float]:
+        vector = np.zeros(dimensions, dtype=np.float32)
+        words = _WORD.findall(text.lower()) or [text]
+        for word in words:
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % dimensions] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed(
+        self, model: str, texts: List[str], dimensions: Optional[int] = None
+    ) -> EmbeddingResult:
+        self._admit()
+        if self.embedding_latency:
+            time.sleep(self.embedding_latency)
+        dimensions = dimensions or self.embedding_dimensions
+        return EmbeddingResult(
+            embeddings=[self.embed_text(text, dimensions) for text in texts],
+            prompt_tokens=sum(len(_WORD.findall(text)) for text in texts),
+        )
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float,
+    ) -> ChatResult:
+        self._admit()
+        if self.chat_latency:
+            time.sleep(self.chat_latency)
+
+        prompt = messages[-1]["content"] if messages else ""
+        question = _QUESTION.search(prompt)
+        sources = _CONTEXT_SOURCE.findall(prompt)
+        if sources:
+            template = self.completion_template or (
+                "This is a simulated answer to: {question}¹"
+                "\n\nCitation\n1. {first_source}"
+            )
+            content = template.format(
+                question=question.group(1).strip() if question else "",
+                first_source=sources[0],
+                sources=", ".join(sources),
+                num_sources=len(sources),
+            )
+        elif question:
+            # Query rewrite: the question already stands alone
+            content = question.group(1).strip()
+        else:
+            # Summary: the last max_tokens words of the prompt
+            content = " ".join(prompt.split()[-max_tokens:])
+        return ChatResult(
+            content=content,
+            prompt_tokens=sum(len(_WORD.findall(m["content"])) for m in messages),
+            completion_tokens=len(_WORD.findall(content)),
+        )
+
+
+def create_llm_provider() -> LLMProvider:
+    """Build the provider selected by the LLM_PROVIDER setting."""
+    provider = settings.LLM_PROVIDER.lower()
+    if provider == "azure":
+        return AzureOpenAIProvider()
+    if provider == "fake":
+        return FakeLLMProvider(
+            embedding_dimensions=settings.FAKE_LLM_EMBEDDING_DIMENSIONS,
+            completion_template=settings.FAKE_LLM_COMPLETION_TEMPLATE,
+            embedding_latency_ms=settings.FAKE_LLM_EMBEDDING_LATENCY_MS,
+            chat_latency_ms=settings.FAKE_LLM_CHAT_LATENCY_MS,
+            requests_per_minute=settings.FAKE_LLM_REQUESTS_PER_MINUTE,
+        )
+    raise ValueError(f"Unknown LLM provider: {settings.LLM_PROVIDER}")
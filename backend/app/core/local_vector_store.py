@@ -0,0 +1,604 @@
+"""In-process vector store backend for tests and small deployments.
+
+Each collection lives in its own directory:
+
+- ``vectors.npy``: float32 matrix of unit-length vectors, one row per chunk,
+  memory-mapped when loaded. The file is preallocated and its capacity
+  doubled when full, so adding chunks writes only the new rows; rows past the
+  number of objects are unused
+- ``objects.jsonl``: chunk id, text, document id and chunk index, in row
+  order
+- ``documents.jsonl``: metadata shared by each document's chunks; a later
+  line for the same document replaces an earlier one
+- ``collection.json``: description and recorded collection settings
+
+Search is one matrix-vector product (cosine similarity, since rows are
+normalized) followed by an ``argpartition`` top-k. Relevance is reported as
+Weaviate-style certainty, ``(1 + cosine) / 2``, so thresholds carry over.
+The store is meant for a single process; run Weaviate for multi-worker setups.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .vector_store import (
+    VectorStore,
+    document_id,
+    join_chunk_metadata,
+    split_chunk_metadata,
+)
+
+logger = logging.getLogger(__name__)
+
+# Same shape as Weaviate class names, which also keeps names path-safe
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z][_0-9A-Za-z]*$")
+
+MIN_CAPACITY = 256  # Rows preallocated for a collection's first vectors
+
+
+class _Collection:
+    """Rows of a single collection plus its on-disk location."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.description = ""
+        self.settings: Dict = {}
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        # Per row: the metadata dict shared by the row's document (without
+        # the chunk index), the document id and the chunk index
+        self.metadata: List[Dict] = []
+        self.doc_ids: List[str] = []
+        self.chunk_indexes: List[Optional[int]] = []
+        self.documents: Dict[str, Dict] = {}
+        # Writable mapping of the whole file, and the rows in use
+        self.storage: Optional[np.memmap] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.positions: Dict[str, int] = {}
+        self.fingerprints = set()  # (document id, text) pairs for duplicate checks
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return None if self.vectors is None else self.vectors.shape[1]
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+
+def _resolve(path: List[str], doc_id: str, text: str, metadata: Dict) -> Any:
+    """Look up a Weaviate-style property path on a stored object."""
+    if path[0] == "id":
+        return doc_id
+    if path[0] == "text":
+        return text
+    value: Any = metadata if path[0] == "metadata" else metadata.get(path[0])
+    for key in path[1:]:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _filter_value(where: Dict) -> Any:
+    for key, value in where.items():
+        if key.startswith("value"):
+            return value
+    return None
+
+
+def _compare(operator: str, actual: Any, expected: Any) -> bool:
+    if operator == "IsNull":
+        return (actual is None) == bool(expected)
+    if actual is None:
+        return operator == "NotEqual"
+
+    values = actual if isinstance(actual, list) else [actual]
+    if operator == "Equal":
+        return expected in values
+    if operator == "NotEqual":
+        return expected not in values
+    if operator == "Like":
+        return any(fnmatch.fnmatchcase(str(v), str(expected)) for v in values)
+    if operator == "ContainsAny":
+        return any(item in values for item in expected)
+    if operator == "ContainsAll":
+        return all(item in values for item in expected)
+
+    try:
+        if operator == "GreaterThan":
+            return any(v > expected for v in values)
+        if operator == "GreaterThanEqual":
+            return any(v >= expected for v in values)
+        if operator == "LessThan":
+            return any(v < expected for v in values)
+        if operator == "LessThanEqual":
+            return any(v <= expected for v in values)
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches_filter(where: Dict, doc_id: str, text: str, metadata: Dict) -> bool:
+    """Evaluate a Weaviate ``where`` filter against a stored object.
+
+    Supports And/Or/Not, the comparison operators, Like, ContainsAny,
+    ContainsAll and IsNull. Paths may address ``id``, ``text``, nested
+    ``metadata`` keys or top-level metadata keys.
+    """
+    operator = where.get("operator")
+    operands = where.get("operands", [])
+    if operator == "And":
+        return all(matches_filter(o, doc_id, text, metadata) for o in operands)
+    if operator == "Or":
+        return any(matches_filter(o, doc_id, text, metadata) for o in operands)
+    if operator == "Not":
+        return not any(matches_filter(o, doc_id, text, metadata) for o in operands)
+
+    actual = _resolve(where["path"], doc_id, text, metadata)
+    return _compare(operator, actual, _filter_value(where))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+
+def _write_json(path: str, data: Dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class LocalVectorStore(VectorStore):
+    """NumPy-backed vector store persisted under ``root``."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.RLock()
+        self._collections: Dict[str, _Collection] = {}
+        os.makedirs(root, exist_ok=True)
+        for name in sorted(os.listdir(root)):
+            path = os.path.join(root, name)
+            if COLLECTION_NAME_PATTERN.match(name) and os.path.isfile(
+                os.path.join(path, "collection.json")
+            ):
+                self._collections[name] = self._load(path)
+
+    def _load(self, path: str) -> _Collection:
+        collection = _Collection(path)
+        with open(collection.file("collection.json"), encoding="utf-8") as f:
+            info = json.load(f)
+        collection.description = info.get("description", "")
+        collection.settings = info.get("settings", {})
+
+        if os.path.exists(collection.file("documents.jsonl")):
+            with open(collection.file("documents.jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        collection.documents[record["doc_id"]] = record["metadata"]
+
+        if os.path.exists(collection.file("objects.jsonl")):
+            with open(collection.file("objects.jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        obj = json.loads(line)
+                        collection.ids.append(obj["id"])
+                        collection.texts.append(obj["text"])
+                        collection.doc_ids.append(obj["doc_id"])
+                        collection.metadata.append(
+                            collection.documents.get(obj["doc_id"], {})
+                        )
+                        collection.chunk_indexes.append(obj.get("chunk_index"))
+
+        if os.path.exists(collection.file("vectors.npy")):
+            collection.storage = np.load(collection.file("vectors.npy"), mmap_mode="r+")
+            # Vectors are written before their objects, so rows past the
+            # objects are unused; objects past the rows lost their vectors
+            count = min(len(collection.ids), collection.storage.shape[0])
+            del collection.ids[count:], collection.texts[count:]
+            del collection.metadata[count:], collection.doc_ids[count:]
+            del collection.chunk_indexes[count:]
+            collection.vectors = collection.storage[:count]
+
+        for row, (chunk_id, doc_id, text) in enumerate(
+            zip(collection.ids, collection.doc_ids, collection.texts)
+        ):
+            collection.positions[chunk_id] = row
+            collection.fingerprints.add((doc_id, text))
+        return collection
+
+    def _write_vectors(
+        self, collection: _Collection, vectors: np.ndarray, capacity: int
+    ):
+        """Atomically replace the vector file with one of ``capacity`` rows.
+
+        Searches that already hold the old mapping keep reading it.
+        """
+        path = collection.file("vectors.npy")
+        tmp_path = collection.file("vectors.tmp.npy")
+        out = np.lib.format.open_memmap(
+            tmp_path,
+            mode="w+",
+            dtype=np.float32,
+            shape=(capacity, vectors.shape[1]),
+        )
+        out[: len(vectors)] = vectors
+        out.flush()
+        del out
+        os.replace(tmp_path, path)
+        collection.storage = np.load(path, mmap_mode="r+")
+        collection.vectors = collection.storage[: len(vectors)]
+
+    def _append_vectors(self, collection: _Collection, matrix: np.ndarray):
+        """Write ``matrix`` after the rows in use, growing the file if full."""
+        count = 0 if collection.vectors is None else len(collection.vectors)
+        needed = count + len(matrix)
+        storage = collection.storage
+        if storage is None or needed > storage.shape[0]:
+            capacity = max(
+                needed,
+                MIN_CAPACITY,
+                0 if storage is None else 2 * storage.shape[0],
+            )
+            current = (
+                collection.vectors
+                if collection.vectors is not None
+                else np.empty((0, matrix.shape[1]), dtype=np.float32)
+            )
+            self._write_vectors(collection, current, capacity)
+            storage = collection.storage
+        storage[count:needed] = matrix
+        storage.flush()
+
+    def _write_objects(self, collection: _Collection, rows: range, mode: str):
+        with open(collection.file("objects.jsonl"), mode, encoding="utf-8") as f:
+            for row in rows:
+                obj = {
+                    "id": collection.ids[row],
+                    "text": collection.texts[row],
+                    "doc_id": collection.doc_ids[row],
+                    "chunk_index": collection.chunk_indexes[row],
+                }
+                f.write(json.dumps(obj) + "\n")
+
+    def _write_documents(self, collection: _Collection, doc_ids, mode: str):
+        with open(collection.file("documents.jsonl"), mode, encoding="utf-8") as f:
+            for doc_id in doc_ids:
+                record = {"doc_id": doc_id, "metadata": collection.documents[doc_id]}
+                f.write(json.dumps(record) + "\n")
+
+    def _get(self, collection_name: str) -> Optional[_Collection]:
+        return self._collections.get(collection_name)
+
+    def _snapshot(self, collection: _Collection):
+        """The rows' vectors, ids, texts, metadata and chunk indexes, as one
+        consistent view.
+
+        Taken under the lock, since a delete swaps the lists and the vector
+        matrix in separate steps. Writers never change the rows of a
+        snapshot afterwards: adds only append past them, deletes build new
+        lists and a new file.
+        """
+        with self._lock:
+            return (
+                collection.vectors,
+                collection.ids,
+                collection.texts,
+                collection.metadata,
+                collection.chunk_indexes,
+            )
+
+    def create_collection(
+        self,
+        collection_name: str,
+        description: str = "",
+        vector_index_config: Optional[Dict] = None,
+        embedding_dimensions: Optional[int] = None,
+    ) -> bool:
+        """Create a collection directory; the vector index profile is only
+        recorded, since every local collection is a flat index."""
+        if not COLLECTION_NAME_PATTERN.match(collection_name):
+            raise ValueError(f"Invalid collection name: {collection_name}")
+
+        with self._lock:
+            if collection_name in self._collections:
+                return False
+            collection = _Collection(os.path.join(self.root, collection_name))
+            os.makedirs(collection.path, exist_ok=True)
+            collection.description = description
+            collection.settings = {
+                "embedding_dimensions": embedding_dimensions,
+                "vector_index": vector_index_config or {},
+            }
+            self._write_info(collection)
+            self._collections[collection_name] = collection
+            return True
+
+    def _write_info(self, collection: _Collection):
+        _write_json(
+            collection.file("collection.json"),
+            {"description": collection.description, "settings": collection.settings},
+        )
+
+    def delete_collection(self, collection_name: str) -> bool:
+        with self._lock:
+            collection = self._collections.pop(collection_name, None)
+            if collection is None:
+                return False
+            for name in (
+                "vectors.npy",
+                "objects.jsonl",
+                "documents.jsonl",
+                "collection.json",
+            ):
+                if os.path.exists(collection.file(name)):
+                    os.remove(collection.file(name))
+            try:
+                os.rmdir(collection.path)
+            except OSError:
+                pass
+            return True
+
+    def set_collection_settings(self, collection_name: str, values: Dict):
+        with self._lock:
+            collection = self._get(collection_name)
+            if collection is None:
+                raise ValueError(f"Collection {collection_name} does not exist")
+            collection.settings = values
+            self._write_info(collection)
+
+    def get_collection_settings(self, collection_name: str) -> Dict:
+        collection = self._get(collection_name)
+        return collection.settings if collection else {}
+
+    def add_documents(
+        self,
+        collection_name: str,
+        documents: List[Dict],
+        vectors: List[List[float]],
+        check_duplicates: bool = True,
+    ) -> List[str]:
+        """Add documents with their vectors, skipping duplicate chunks.
+
+        Like Weaviate's auto-schema, a missing collection is created.
+        """
+        with self._lock:
+            collection = self._get(collection_name)
+            if collection is None:
+                self.create_collection(collection_name)
+                collection = self._get(collection_name)
+
+            added = []
+            new_vectors = []
+            for doc, vector in zip(documents, vectors):
+                shared, _ = split_chunk_metadata(doc["metadata"])
+                fingerprint = (document_id(shared), doc["text"])
+                if check_duplicates and fingerprint in collection.fingerprints:
+                    logger.debug(
+                        "Skipping duplicate chunk of %s",
+                        shared.get("filename", "unknown"),
+                    )
+                    continue
+                collection.fingerprints.add(fingerprint)
+                added.append(doc)
+                new_vectors.append(vector)
+
+            if not added:
+                return []
+
+            matrix = _normalize(np.asarray(new_vectors, dtype=np.float32))
+            if collection.dimensions not in (None, matrix.shape[1]):
+                raise ValueError(
+                    f"Vector size {matrix.shape[1]} does not match collection "
+                    f"{collection_name} ({collection.dimensions})"
+                )
+
+            # Store each document's metadata once; chunks reference it
+            new_documents = {}
+            for doc in added:
+                shared, _ = split_chunk_metadata(doc["metadata"])
+                new_documents.setdefault(document_id(shared), shared)
+            for doc_id, shared in new_documents.items():
+                if doc_id in collection.documents:
+                    # A re-upload with the same ACL replaces the earlier chunks' record
+                    for row, row_doc_id in enumerate(collection.doc_ids):
+                        if row_doc_id == doc_id:
+                            collection.metadata[row] = shared
+                collection.documents[doc_id] = shared
+            self._write_documents(collection, new_documents, "a")
+            # Vectors first: rows without objects are ignored on load
+            self._append_vectors(collection, matrix)
+
+            start = len(collection.ids)
+            added_ids = []
+            for doc in added:
+                chunk_id = str(uuid.uuid4())
+                shared, chunk_index = split_chunk_metadata(doc["metadata"])
+                doc_id = document_id(shared)
+                collection.positions[chunk_id] = len(collection.ids)
+                collection.ids.append(chunk_id)
+                collection.texts.append(doc["text"])
+                collection.metadata.append(new_documents[doc_id])
+                collection.doc_ids.append(doc_id)
+                collection.chunk_indexes.append(chunk_index)
+                added_ids.append(chunk_id)
+
+            self._write_objects(collection, range(start, len(collection.ids)), "a")
+            collection.vectors = collection.storage[: len(collection.ids)]
+            return added_ids
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        filters: Optional[Dict] = None,
+        limit: int = 5,
+    ) -> List[Dict]:
+        collection = self._get(collection_name)
+        if collection is None or collection.vectors is None:
+            return []
+
+        vectors, ids, texts, metadata, chunk_indexes = self._snapshot(collection)
+        count = vectors.shape[0]
+        if count == 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        if query.shape[0] != vectors.shape[1]:
+            raise ValueError(
+                f"Query vector size {query.shape[0]} does not match collection "
+                f"{collection_name} ({vectors.shape[1]})"
+            )
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = vectors @ query
+        candidates = count
+        if filters:
+            mask = np.fromiter(
+                (
+                    matches_filter(filters, ids[row], texts[row], metadata[row])
+                    for row in range(count)
+                ),
+                dtype=bool,
+                count=count,
+            )
+            scores = np.where(mask, scores, -np.inf)
+            candidates = int(mask.sum())
+
+        k = min(limit, candidates)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                "text": texts[row],
+                "metadata": join_chunk_metadata(metadata[row], chunk_indexes[row]),
+                "relevance": float((1.0 + scores[row]) / 2.0),
+            }
+            for row in top
+        ]
+
+    def list_collections(self) -> List[str]:
+        return list(self._collections)
+
+    def iter_documents(
+        self, collection_name: str, batch_size: int = 100, include_vectors=False
+    ) -> Iterator[Dict[str, Any]]:
+        collection = self._get(collection_name)
+        if collection is None:
+            return
+        vectors, ids, texts, metadata, chunk_indexes = self._snapshot(collection)
+        for row in range(0 if vectors is None else len(vectors)):
+            document = {
+                "id": ids[row],
+                "text": texts[row],
+                "metadata": join_chunk_metadata(metadata[row], chunk_indexes[row]),
+            }
+            if include_vectors:
+                # Stored vectors are unit length, which cosine search ignores
+                document["vector"] = vectors[row]
+            yield document
+
+    def list_documents(
+        self, collection_name: str, skip: int = 0, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        collection = self._get(collection_name)
+        if collection is None:
+            return []
+        _, ids, texts, metadata, chunk_indexes = self._snapshot(collection)
+        return [
+            {
+                "id": ids[row],
+                "text": texts[row],
+                "metadata": join_chunk_metadata(metadata[row], chunk_indexes[row]),
+            }
+            for row in range(skip, min(skip + limit, len(ids)))
+        ]
+
+    def document_exists(self, collection_name: str, document_id: str) -> bool:
+        collection = self._get(collection_name)
+        return collection is not None and document_id in collection.positions
+
+    def get_document(
+        self, collection_name: str, document_id: str
+    ) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            collection = self._get(collection_name)
+            if collection is None or document_id not in collection.positions:
+                return None
+            row = collection.positions[document_id]
+            return {
+                "id": document_id,
+                "text": collection.texts[row],
+                "metadata": join_chunk_metadata(
+                    collection.metadata[row], collection.chunk_indexes[row]
+                ),
+            }
+
+    def delete_document(self, collection_name: str, document_id: str) -> bool:
+        with self._lock:
+            collection = self._get(collection_name)
+            if collection is None or document_id not in collection.positions:
+                return False
+
+            row = collection.positions[document_id]
+            keep = [r for r in range(len(collection.ids)) if r != row]
+            # Build new lists so snapshots taken before the delete stay intact
+            collection.ids = [collection.ids[r] for r in keep]
+            collection.texts = [collection.texts[r] for r in keep]
+            collection.metadata = [collection.metadata[r] for r in keep]
+            collection.doc_ids = [collection.doc_ids[r] for r in keep]
+            collection.chunk_indexes = [collection.chunk_indexes[r] for r in keep]
+            # Drop records no chunk references any more
+            referenced = set(collection.doc_ids)
+            collection.documents = {
+                doc_id: shared
+                for doc_id, shared in collection.documents.items()
+                if doc_id in referenced
+            }
+            collection.positions = {
+                doc_id: r for r, doc_id in enumerate(collection.ids)
+            }
+            collection.fingerprints = set(zip(collection.doc_ids, collection.texts))
+
+            self._write_objects(collection, range(len(collection.ids)), "w")
+            self._write_documents(collection, collection.documents, "w")
+            self._write_vectors(
+                collection,
+                np.delete(collection.vectors, row, axis=0),
+                collection.storage.shape[0],
+            )
+            return True
+
+    def get_collection_info(self, collection_name: str) -> Optional[Dict]:
+        collection = self._get(collection_name)
+        if collection is None:
+            return None
+        return {
+            "class": collection_name,
+            "description": collection.description,
+            "vectorizer": "none",
+            "vectorIndexType": "flat",
+            "properties": [
+                {"dataType": ["text"], "name": "text"},
+                {"dataType": ["text"], "name": "doc_id"},
+                {"dataType": ["int"], "name": "chunk_index"},
+            ],
+            "objectCount": len(collection.ids),
+            "dimensions": collection.dimensions,
+        }
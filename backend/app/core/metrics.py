@@ -0,0 +1,118 @@
+"""Prometheus metrics for the RAG pipeline, served on /api/metrics.
+
+Under gunicorn each worker keeps its own samples; when
+``PROMETHEUS_MULTIPROC_DIR`` is set they are written there and aggregated
+across workers at scrape time.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Buckets span fast in-process stages (ms) up to slow completions (tens of s)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0,
+)  # fmt: skip
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Latency of individual RAG pipeline stages",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total",
+    "Tokens sent to and received from the LLM provider",
+    ["operation", "direction"],
+)
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+)
+VECTOR_STORE_REQUESTS = Counter(
+    "rag_vector_store_requests_total",
+    "Round trips to the vector store by operation",
+    ["operation"],
+)
+RETRIES = Counter(
+    "rag_retries_total",
+    "Retried calls to upstream services",
+    ["component"],
+)
+COALESCED_REQUESTS = Counter(
+    "rag_coalesced_requests_total",
+    "Requests that joined an identical in-flight computation",
+    ["operation"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "rag_admission_rejections_total",
+    "Requests turned away by admission control, by pool and status code",
+    ["pool", "status"],
+)
+IN_FLIGHT = Gauge(
+    "rag_requests_in_flight",
+    "Requests currently being handled, by route",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Record the duration of a pipeline stage, including failed attempts."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def track_in_flight(route: str):
+    """Dependency that counts a route's in-flight requests."""
+
+    async def dependency():
+        gauge = IN_FLIGHT.labels(route=route)
+        gauge.inc()
+        try:
+            yield
+        finally:
+            gauge.dec()
+
+    return dependency
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_vector_store_request(operation: str):
+    VECTOR_STORE_REQUESTS.labels(operation=operation).inc()
+
+
+def record_tokens(operation: str, sent: int = 0, received: int = 0):
+    if sent:
+        LLM_TOKENS.labels(operation=operation, direction="sent").inc(sent)
+    if received:
+        LLM_TOKENS.labels(operation=operation, direction="received").inc(received)
+
+
+def render_metrics():
+    """Return the metrics in Prometheus text format and its content type."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
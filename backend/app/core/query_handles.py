@@ -0,0 +1,74 @@
+"""Opaque handles for embedded queries.
+
+A user who asks the same question of several indexes, or whose question is
+embedded before it is submitted, passes a handle with each search instead of
+having the query embedded again. A handle holds one query vector per
+embedding size, so it serves indexes of any size: sizes missing from it are
+embedded on first use and added. Handles are kept in the shared cache,
+scoped to the user who created them, and expire after a TTL.
+
+The query embedding cache already skips repeated embedding calls. A handle
+adds three things to it: it matches the question however it is cased or
+spaced, it fetches every size in one lookup, and it still works when
+EMBEDDING_CACHE_TTL_SECONDS is 0.
+"""
+
+import logging
+import secrets
+from typing import Dict, List, Optional
+
+from .shared_cache import SharedCache
+from .single_flight import normalize_query
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "query_handle"
+
+# Vectors by embedding size; None is the deployment's default size
+QueryVectors = Dict[Optional[int], List[float]]
+
+
+def _size_key(dimensions: Optional[int]) -> str:
+    return "default" if dimensions is None else str(dimensions)
+
+
+def _size(key: str) -> Optional[int]:
+    return None if key == "default" else int(key)
+
+
+class QueryHandles:
+    """Embedded queries of each user, stored in the shared cache."""
+
+    def __init__(self, cache: SharedCache, ttl: Optional[float] = None):
+        self.cache = cache
+        self.ttl = ttl
+
+    def _key(self, username: str, handle: str) -> str:
+        return f"{username}:{handle}"
+
+    def create(self, username: str, query: str, vectors: QueryVectors) -> str:
+        handle = secrets.token_urlsafe(16)
+        self.save(username, handle, query, vectors)
+        return handle
+
+    def save(self, username: str, handle: str, query: str, vectors: QueryVectors):
+        """Store the handle's vectors, restarting its TTL."""
+        entry = {
+            "query": query,
+            "vectors": {_size_key(size): vector for size, vector in vectors.items()},
+        }
+        self.cache.set(NAMESPACE, self._key(username, handle), entry, ttl=self.ttl)
+
+    def get(self, username: str, handle: str, query: str) -> Optional[QueryVectors]:
+        """The vectors of ``handle``, or None if it is unknown or has expired.
+
+        A handle is only used for the query it was created for, so a stale
+        handle sent with a new question cannot return results for the old one.
+        """
+        entry = self.cache.get(NAMESPACE, self._key(username, handle))
+        if entry is None:
+            return None
+        if normalize_query(entry["query"]) != normalize_query(query):
+            logger.debug("Query handle %s was created for another query", handle)
+            return None
+        return {_size(key): vector for key, vector in entry["vectors"].items()}
@@ -0,0 +1,139 @@
+"""Retries with jittered backoff and a circuit breaker for upstream calls.
+
+Transient failures (dropped connections, timeouts, 5xx responses) of
+idempotent calls are retried after a random delay of up to
+``base_delay * 2**attempt`` ("full jitter"), so that callers that failed
+together do not retry in lockstep. Each retry increments ``rag_retries_total``
+for the component.
+
+The circuit breaker counts consecutive failures. Once ``failure_threshold``
+is reached it opens, and calls fail immediately with ``CircuitOpenError``
+instead of tying up request threads until their timeouts expire. After
+``reset_timeout`` seconds one trial call is let through: it closes the
+circuit on success and reopens it on failure.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+from .metrics import RETRIES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """A call was refused because the upstream service is failing."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self):
+        """Raise ``CircuitOpenError`` unless the call may go ahead."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (self._clock() - self._opened_at)
+            if remaining > 0 or self._trial_running:
+                raise CircuitOpenError(self.name, max(remaining, 1.0))
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit %s closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                logger.warning(
+                    "Circuit %s opened after %d consecutive failures",
+                    self.name,
+                    self._failures,
+                )
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+def call_with_retries(
+    fn: Callable[[], T],
+    component: str,
+    is_transient: Callable[[Exception], bool],
+    attempts: int = 3,
+    base_delay: float = 0.1,
+    max_delay: float = 2.0,
+    breaker: Optional[CircuitBreaker] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """Call ``fn``, retrying transient failures up to ``attempts`` times in all.
+
+    Only transient failures count against the circuit breaker; other errors
+    (e.g. a malformed query) are raised at once and say nothing about the
+    health of the service.
+    """
+    for attempt in range(attempts):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_transient(e):
+                if breaker is not None:
+                    breaker.record_success()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt == attempts - 1:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+            logger.debug(
+                "%s call failed (%s: %s); retrying in %.2fs",
+                component,
+                type(e).__name__,
+                e,
+                delay,
+            )
+            RETRIES.labels(component=component).inc()
+            sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
@@ -0,0 +1,24 @@
+"""JSON response helpers.
+
+Routes returning plain dicts are rendered with orjson (``ORJSONResponse`` is
+the app's default response class). Routes returning a Pydantic model they have
+just built wrap it in ``model_response``, which encodes it with pydantic's own
+``model_dump_json``: FastAPI would otherwise dump the model, validate the dump
+against the route's ``response_model`` and encode the result again, which
+dominates the cost of large payloads such as document listings.
+"""
+
+from fastapi import Response
+from pydantic import BaseModel
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """Serialize an already validated model as is, in one pass.
+
+    The route's ``response_model`` still documents the response in OpenAPI.
+    """
+    return Response(
+        content=model.model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+    )
@@ -0,0 +1,316 @@
+"""Caches for embeddings, answers and collection settings.
+
+With several worker processes a per-process cache is missed once per worker,
+so the SQLite backend keeps entries in one local database file that every
+worker on the host reads and writes (WAL mode lets readers proceed while a
+writer commits). The in-memory backend serves single-process development and
+tests. Values are JSON-serialisable; a ttl of None keeps an entry until it is
+deleted. Both backends are bounded: the memory cache evicts the least recently
+used entry, the SQLite cache periodically drops expired rows and then the
+least recently written ones.
+
+``compare_and_set`` lets read-modify-write updates (chat sessions) detect a
+concurrent writer and retry; with the SQLite backend this holds across the
+worker processes of one host.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .config import settings
+from .metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts: Any) -> str:
+    """Digest of the given parts, for keys built from long texts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class SharedCache(ABC):
+    """Key-value cache partitioned into namespaces (e.g. ``embedding``)."""
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value or None, recording a hit or miss."""
+        value = self._get(namespace, key)
+        record_cache(namespace, value is not None)
+        return value
+
+    @abstractmethod
+    def _get(self, namespace: str, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        pass
+
+    @abstractmethod
+    def compare_and_set(
+        self,
+        namespace: str,
+        key: str,
+        expected: Optional[Any],
+        value: Any,
+        ttl: Optional[float] = None,
+    ) -> bool:
+        """Set ``value`` only if the entry still equals ``expected``.
+
+        ``expected`` is None for an entry that must not exist yet. Returns
+        whether the value was written.
+        """
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str):
+        pass
+
+    def close(self):
+        """Release resources held by the backend."""
+
+
+class MemoryCache(SharedCache):
+    """Bounded per-process LRU cache."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._lookup(namespace, key)
+
+    def _lookup(self, namespace: str, key: str) -> Optional[Any]:
+        # Callers hold self._lock
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[(namespace, key)]
+            return None
+        self._entries.move_to_end((namespace, key))
+        return value
+
+    def _store(self, namespace: str, key: str, value: Any, ttl: Optional[float]):
+        # Callers hold self._lock
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._entries[(namespace, key)] = (expires_at, value)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._store(namespace, key, value, ttl)
+
+    def compare_and_set(
+        self,
+        namespace: str,
+        key: str,
+        expected: Optional[Any],
+        value: Any,
+        ttl: Optional[float] = None,
+    ) -> bool:
+        with self._lock:
+            if self._lookup(namespace, key) != expected:
+                return False
+            self._store(namespace, key, value, ttl)
+            return True
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+
+class SQLiteCache(SharedCache):
+    """Cache in a SQLite file shared by all worker processes on the host.
+
+    Every ``purge_interval`` writes of a process, expired rows are deleted and
+    the oldest-written rows beyond ``max_entries`` (0 for no limit) evicted.
+    """
+
+    def __init__(
+        self, path: str, max_entries: int = 100000, purge_interval: int = 1000
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, namespace: str, key: str) -> Optional[Any]:
+        try:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace=? AND key=?",
+                    (namespace, key),
+                )
+                .fetchone()
+            )
+        except sqlite3.Error as e:
+            logger.warning("Shared cache read failed: %s", e)
+            return None
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(namespace, key)
+            return None
+        return json.loads(value)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl is not None else None
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value), expires_at),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Shared cache write failed: %s", e)
+            return
+        self._count_write()
+
+    def compare_and_set(
+        self,
+        namespace: str,
+        key: str,
+        expected: Optional[Any],
+        value: Any,
+        ttl: Optional[float] = None,
+    ) -> bool:
+        expires_at = time.time() + ttl if ttl is not None else None
+        conn = self._connection()
+        # Take the write lock before reading, so no other process can write
+        # the entry between the comparison and the update
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace=? AND key=?",
+                (namespace, key),
+            ).fetchone()
+            current = None
+            if row is not None and (row[1] is None or row[1] > time.time()):
+                current = json.loads(row[0])
+            if current != expected:
+                conn.rollback()
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        self._count_write()
+        return True
+
+    def _count_write(self):
+        """Purge every ``purge_interval`` writes of this process."""
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.purge_interval == 0
+        if due:
+            try:
+                self.purge()
+            except sqlite3.Error as e:
+                logger.warning("Shared cache purge failed: %s", e)
+
+    def delete(self, namespace: str, key: str):
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "DELETE FROM cache WHERE namespace=? AND key=?", (namespace, key)
+                )
+        except sqlite3.Error as e:
+            logger.warning("Shared cache delete failed: %s", e)
+
+    def purge(self):
+        """Delete expired rows, then evict the oldest beyond ``max_entries``."""
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+            if not self.max_entries:
+                return
+            (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            if count > self.max_entries:
+                # INSERT OR REPLACE gives a rewritten row a new rowid, so the
+                # lowest rowids are the least recently written entries
+                conn.execute(
+                    "DELETE FROM cache WHERE rowid IN"
+                    " (SELECT rowid FROM cache ORDER BY rowid LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_session_cache() -> SharedCache:
+    """Build the store for chat sessions, on the backend of CACHE_BACKEND.
+
+    Sessions are state rather than cached data, so they are kept apart from
+    the shared cache: entries of other namespaces never evict them, and the
+    SQLite store only drops sessions whose ttl has expired.
+    """
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "memory":
+        return MemoryCache(max_entries=settings.CHAT_MAX_SESSIONS)
+    if backend == "sqlite":
+        cache = SQLiteCache(settings.CHAT_SESSION_PATH, max_entries=0)
+        cache.purge()
+        return cache
+    raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+
+
+def create_shared_cache() -> SharedCache:
+    """Build the cache backend selected by CACHE_BACKEND."""
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "sqlite":
+        cache = SQLiteCache(
+            settings.SHARED_CACHE_PATH, max_entries=settings.SHARED_CACHE_MAX_ENTRIES
+        )
+        cache.purge()
+        return cache
+    raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
@@ -0,0 +1,41 @@
+"""Coalescing of identical concurrent work ("single flight").
+
+The first caller for a key starts the computation; callers arriving while it
+is still running await the same result instead of repeating the upstream
+calls. Nothing is kept once the computation finishes, so this complements
+rather than replaces the caches. The computation runs as its own task, so a
+disconnecting first caller does not cancel it for the others.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from .metrics import COALESCED_REQUESTS
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``await fn()``, sharing one call among concurrent callers."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            COALESCED_REQUESTS.labels(operation=self.name).inc()
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller went away
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used in keys."""
+    return " ".join(query.lower().split())
@@ -0,0 +1,180 @@
+"""Index snapshots: export a collection to disk and restore it elsewhere.
+
+A snapshot is a directory holding:
+
+- ``manifest.json``: format version, source collection, description,
+  collection settings (embedding size, vector index profile), row count and
+  vector shape
+- ``vectors.npy``: contiguous float32 matrix, one row per chunk, loaded
+  memory-mapped on import
+- ``chunks.jsonl``: each chunk's text and metadata, in row order
+
+Import copies the stored vectors instead of recomputing them, so restores and
+migrations between backends (e.g. local to Weaviate) make no embedding calls
+and run at the speed of the disk and the vector store.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.jsonl"
+
+
+def export_collection(
+    vector_store: VectorStore, collection: str, path: str, batch_size: int = 500
+) -> Dict:
+    """Write ``collection`` as a snapshot into the directory ``path``.
+
+    Returns the manifest. Vectors are streamed to disk as they are read, so
+    memory use does not grow with the collection.
+    """
+    info = vector_store.get_collection_info(collection)
+    if not info:
+        raise ValueError(f"Collection '{collection}' does not exist")
+    os.makedirs(path, exist_ok=True)
+
+    # Rows are counted while streaming, so vectors go to a raw file first and
+    # get their .npy header once the shape is known
+    raw_path = os.path.join(path, f"{VECTORS_FILE}.raw")
+    count = 0
+    dimensions: Optional[int] = None
+    with open(os.path.join(path, CHUNKS_FILE), "w", encoding="utf-8") as chunks, open(
+        raw_path, "wb"
+    ) as raw:
+        for document in vector_store.iter_documents(
+            collection, batch_size=batch_size, include_vectors=True
+        ):
+            vector = np.asarray(document["vector"], dtype=np.float32)
+            if dimensions is None:
+                dimensions = vector.shape[0]
+            elif vector.shape[0] != dimensions:
+                raise ValueError(
+                    f"Vector size {vector.shape[0]} of row {count} does not match "
+                    f"the collection ({dimensions})"
+                )
+            raw.write(vector.tobytes())
+            record = {"text": document["text"], "metadata": document["metadata"]}
+            chunks.write(json.dumps(record) + "\n")
+            count += 1
+
+    shape = (count, dimensions or 0)
+    with open(os.path.join(path, VECTORS_FILE), "wb") as out, open(
+        raw_path, "rb"
+    ) as raw:
+        np.lib.format.write_array_header_1_0(
+            out, {"descr": "<f4", "fortran_order": False, "shape": shape}
+        )
+        shutil.copyfileobj(raw, out)
+    os.remove(raw_path)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "collection": collection,
+        "description": info.get("description", ""),
+        "settings": vector_store.get_collection_settings(collection),
+        "count": count,
+        "dimensions": dimensions,
+        "created_at": time.time(),
+    }
+    with open(os.path.join(path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info("Exported %d chunks of %s to %s", count, collection, path)
+    return manifest
+
+
+def read_manifest(path: str) -> Dict:
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.isfile(manifest_path):
+        raise ValueError(f"No snapshot manifest in {path}")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot format {manifest.get('format_version')!r}"
+        )
+    return manifest
+
+
+def import_snapshot(
+    vector_store: VectorStore,
+    path: str,
+    collection: Optional[str] = None,
+    batch_size: int = 1000,
+) -> int:
+    """Restore the snapshot in ``path`` into a new collection.
+
+    The collection is named as in the snapshot unless ``collection`` is
+    given, and must not exist yet. Returns the number of chunks added.
+    """
+    manifest = read_manifest(path)
+    name = collection or manifest["collection"]
+    vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+    if vectors.shape[0] != manifest["count"]:
+        raise ValueError(
+            f"Snapshot has {vectors.shape[0]} vectors for {manifest['count']} chunks"
+        )
+    chunks_path = os.path.join(path, CHUNKS_FILE)
+    # Checked before anything is created, so a truncated snapshot leaves no
+    # half-filled collection behind
+    with open(chunks_path, encoding="utf-8") as chunks:
+        count = sum(1 for line in chunks if line.strip())
+    if count != manifest["count"]:
+        raise ValueError(f"Snapshot has {count} chunks, expected {manifest['count']}")
+
+    snapshot_settings = manifest.get("settings") or {}
+    created = vector_store.create_collection(
+        name,
+        manifest.get("description", ""),
+        snapshot_settings.get("vector_index") or None,
+        snapshot_settings.get("embedding_dimensions"),
+    )
+    if not created:
+        raise ValueError(f"Collection '{name}' already exists")
+    try:
+        # Keep any other recorded settings; the target store decides the layout
+        vector_store.set_collection_settings(
+            name, {**snapshot_settings, **vector_store.get_collection_settings(name)}
+        )
+
+        added = 0
+        batch = []
+        with open(chunks_path, encoding="utf-8") as chunks:
+            for line in chunks:
+                if not line.strip():
+                    continue
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    added += _add_batch(vector_store, name, batch, vectors, added)
+                    batch = []
+        if batch:
+            added += _add_batch(vector_store, name, batch, vectors, added)
+    except Exception:
+        # A partial restore would also block retrying under the same name
+        vector_store.delete_collection(name)
+        raise
+    logger.info("Imported %d chunks from %s into %s", added, path, name)
+    return added
+
+
+def _add_batch(vector_store, collection, documents, vectors, start) -> int:
+    # The collection is new, so the per-chunk duplicate lookups are skipped
+    vector_store.add_documents(
+        collection,
+        documents,
+        vectors[start : start + len(documents)].tolist(),
+        check_duplicates=False,
+    )
+    return len(documents)
@@ -0,0 +1,240 @@
+"""Ingest-time cleaning: boilerplate lines and near-duplicate chunks.
+
+Manuals repeat page headers, footers, revision tables and legal notices on
+every page. Lines that recur on a large share of a document's pages are
+removed before chunking, so they are neither embedded nor retrieved.
+
+Chunks that are near-duplicates of one already kept are then dropped before
+embedding. Near-duplicates are found with 64-bit SimHash fingerprints of the
+chunk's word shingles: texts that differ in a few words have fingerprints a
+few bits apart. The fingerprints of an index are kept in the shared cache, so
+a chunk that repeats one from another document in the index with the same
+access rules is dropped too.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from .extractors import PAGE_BREAK
+from .shared_cache import SharedCache
+from .vector_store import VectorStore, access_key
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+FINGERPRINT_BITS = 64
+_BANDS = 4  # Fingerprints within 3 bits agree exactly on at least one band
+_BAND_BITS = FINGERPRINT_BITS // _BANDS
+
+
+def _page_keys(page: str) -> List[str]:
+    """Comparison key of each line of a page ("" for blank lines).
+
+    The first and last lines ignore numbers, so page numbers like "Page 3 of
+    40" and "Page 4 of 40" match; other lines must repeat verbatim.
+    """
+    lines = page.splitlines()
+    keys = [_SPACES.sub(" ", line.strip().lower()) for line in lines]
+    for position, edge in ((0, "first"), (len(lines) - 1, "last")):
+        if lines and keys[position]:
+            keys[position] = f"{edge}:{_DIGITS.sub('#', keys[position])}"
+    return keys
+
+
+def strip_repeated_lines(
+    text: str, min_fraction: float = 0.5, min_pages: int = 3
+) -> str:
+    """Remove lines repeated on at least ``min_fraction`` of the pages.
+
+    Pages are separated by form feeds; text with fewer than ``min_pages``
+    pages is returned unchanged, apart from joining the pages.
+    """
+    pages = text.split(PAGE_BREAK)
+    if len(pages) < min_pages:
+        return "\n".join(pages)
+
+    page_keys = [_page_keys(page) for page in pages]
+    # Pages each line appears on; a line repeated within a page counts once
+    page_counts = Counter(key for keys in page_keys for key in set(keys) if key)
+    threshold = max(2, min_fraction * len(pages))
+    repeated = {key for key, count in page_counts.items() if count >= threshold}
+    if not repeated:
+        return "\n".join(pages)
+
+    kept = [
+        line
+        for page, keys in zip(pages, page_keys)
+        for line, key in zip(page.splitlines(), keys)
+        if key not in repeated
+    ]
+    logger.debug(
+        "Removed %d repeated lines (%d distinct) from %d pages",
+        sum(page_counts[key] for key in repeated),
+        len(repeated),
+        len(pages),
+    )
+    return "\n".join(kept)
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of the text's word shingles."""
+    words = _WORD.findall(text.lower())
+    shingles = [
+        " ".join(words[i : i + shingle_size])
+        for i in range(max(1, len(words) - shingle_size + 1))
+    ]
+    digests = b"".join(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        for shingle in shingles
+    )
+    # Column b holds bit b of each shingle's little-endian hash
+    bits = np.unpackbits(
+        np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8),
+        axis=1,
+        bitorder="little",
+    )
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - len(shingles)
+    return sum(1 << int(bit) for bit in np.flatnonzero(votes > 0))
+
+
+class NearDuplicateIndex:
+    """SimHash fingerprints with the document each came from.
+
+    Fingerprints are bucketed by 16-bit band, so a lookup only compares the
+    few fingerprints sharing a band instead of every one in the index.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        if max_distance >= _BANDS:
+            raise ValueError(f"max_distance must be below {_BANDS}")
+        self.max_distance = max_distance
+        self.owners: Dict[int, str] = {}
+        self._bands: List[Dict[int, Set[int]]] = [
+            defaultdict(set) for _ in range(_BANDS)
+        ]
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << _BAND_BITS) - 1
+        for band in range(_BANDS):
+            yield band, fingerprint >> (band * _BAND_BITS) & mask
+
+    def add(self, fingerprint: int, owner: str):
+        self.owners[fingerprint] = owner
+        for band, key in self._band_keys(fingerprint):
+            self._bands[band][key].add(fingerprint)
+
+    def owned_by(self, owner: str) -> List[int]:
+        return [f for f, o in self.owners.items() if o == owner]
+
+    def discard_owner(self, owner: str):
+        """Forget the fingerprints of a document, e.g. before re-ingesting it."""
+        for fingerprint in self.owned_by(owner):
+            del self.owners[fingerprint]
+            for band, key in self._band_keys(fingerprint):
+                self._bands[band][key].discard(fingerprint)
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """Owner of a stored fingerprint within ``max_distance`` bits, if any."""
+        for band, key in self._band_keys(fingerprint):
+            for candidate in self._bands[band].get(key, ()):
+                if bin(candidate ^ fingerprint).count("1") <= self.max_distance:
+                    return self.owners[candidate]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def to_json(self) -> Dict[str, str]:
+        return {format(f, "x"): owner for f, owner in self.owners.items()}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, str], max_distance: int = 3):
+        index = cls(max_distance)
+        for fingerprint, owner in data.items():
+            index.add(int(fingerprint, 16), owner)
+        return index
+
+
+class IndexFingerprints:
+    """Fingerprints of the chunks in each index, kept in the shared cache.
+
+    Fingerprints are grouped by access rules, since a chunk only duplicates
+    one that the same users can retrieve, and an upload loads and saves only
+    its own group. A group is built from the index's stored chunks the first
+    time it is needed; deleting a document drops its fingerprints from its
+    group, and deleting the index drops all its groups.
+    """
+
+    NAMESPACE = "chunk_fingerprints"
+
+    def __init__(
+        self, cache: SharedCache, vector_store: VectorStore, max_distance: int = 3
+    ):
+        self.cache = cache
+        self.vector_store = vector_store
+        self.max_distance = max_distance
+        # Serialize saves of a group within this process
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def _key(self, collection: str, access: str) -> str:
+        # Groups are keyed by the index's generation, which forget() renews
+        generation = self.cache.get(self.NAMESPACE, collection)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.cache.set(self.NAMESPACE, collection, generation)
+        return f"{collection}:{generation}:{access}"
+
+    def load(self, collection: str, metadata: Dict) -> NearDuplicateIndex:
+        """Fingerprints of the index's chunks sharing ``metadata``'s ACL."""
+        access = access_key(metadata)
+        key = self._key(collection, access)
+        data = self.cache.get(self.NAMESPACE, key)
+        if data is not None:
+            return NearDuplicateIndex.from_json(data, self.max_distance)
+
+        index = NearDuplicateIndex(self.max_distance)
+        if collection in self.vector_store.list_collections():
+            for chunk in self.vector_store.iter_documents(collection):
+                chunk_metadata = chunk["metadata"]
+                if isinstance(chunk_metadata, str):
+                    chunk_metadata = json.loads(chunk_metadata)
+                if access_key(chunk_metadata) == access:
+                    index.add(simhash(chunk["text"]), chunk_metadata.get("filename"))
+        self.cache.set(self.NAMESPACE, key, index.to_json())
+        return index
+
+    def save(self, collection: str, metadata: Dict, fingerprints: List[int]):
+        """Replace a document's fingerprints in its group.
+
+        The group is reloaded and updated under a lock, so uploads saving at
+        the same time keep each other's fingerprints.
+        """
+        access = access_key(metadata)
+        filename = metadata.get("filename")
+        lock = self._locks[hash((collection, access)) % len(self._locks)]
+        with lock:
+            index = self.load(collection, metadata)
+            index.discard_owner(filename)
+            for fingerprint in fingerprints:
+                index.add(fingerprint, filename)
+            self.cache.set(
+                self.NAMESPACE, self._key(collection, access), index.to_json()
+            )
+
+    def discard(self, collection: str, metadata: Dict):
+        """Drop a deleted document's fingerprints; other groups are kept."""
+        self.save(collection, metadata, [])
+
+    def forget(self, collection: str):
+        self.cache.set(self.NAMESPACE, collection, uuid.uuid4().hex)
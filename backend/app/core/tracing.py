@@ -0,0 +1,114 @@
+"""Request tracing with OpenTelemetry.
+
+Spans are opened around the query and upload routes, every LLMClient call
+and every vector store query. Until ``configure_tracing`` installs a tracer
+provider the OpenTelemetry API hands out non-recording spans, so disabled
+tracing costs next to nothing. Finished spans are exported one JSON object
+per line to the console or a local file for offline analysis.
+"""
+
+import functools
+import json
+from contextlib import contextmanager
+from typing import Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from .logging_config import request_id_var
+
+SERVICE_NAME = "rag-backend"
+
+_default_tracer = trace.get_tracer("app")
+tracer = _default_tracer
+
+_provider: Optional[TracerProvider] = None
+_trace_file = None
+
+
+def _format_span(span) -> str:
+    return json.dumps(json.loads(span.to_json())) + "\n"
+
+
+def configure_tracing(
+    exporter: str = "console",
+    file_path: str = "",
+    sample_rate=1.0,
+    set_global: bool = True,
+):
+    """Install a sampling tracer provider exporting to the console or a file.
+
+    ``set_global`` also makes it OpenTelemetry's global provider, which can
+    only be set once per process; tests leave it off so the provider they
+    configure is dropped again by ``shutdown_tracing``.
+    """
+    global _provider, _trace_file, tracer
+
+    shutdown_tracing()
+    if exporter == "file":
+        _trace_file = open(file_path, "a", encoding="utf-8")
+        span_exporter = ConsoleSpanExporter(out=_trace_file, formatter=_format_span)
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter(formatter=_format_span)
+    else:
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(sample_rate)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    tracer = _provider.get_tracer("app")
+    if set_global:
+        trace.set_tracer_provider(_provider)
+
+
+def shutdown_tracing():
+    """Flush pending spans and close the trace file."""
+    global _provider, _trace_file, tracer
+
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+    tracer = _default_tracer
+
+
+def set_span_attributes(span=None, **attributes):
+    """Set ``rag.``-prefixed attributes on a span, skipping None values.
+
+    Defaults to the current span, so route handlers can tag the span opened
+    by ``traced_route``.
+    """
+    span = span or trace.get_current_span()
+    if span.is_recording():
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(f"rag.{key}", value)
+
+
+@contextmanager
+def start_span(name: str, **attributes):
+    """Open a span tagged with ``rag.``-prefixed attributes."""
+    with tracer.start_as_current_span(name) as span:
+        set_span_attributes(span, **attributes)
+        yield span
+
+
+def traced_route(name: str):
+    """Wrap an async route handler in a span tagged with the request id."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name, request_id=request_id_var.get()):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
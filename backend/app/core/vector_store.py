@@ -1,15 +1,432 @@
 import weaviate
 import json
-from typing import List, Dict, Optional, Any
+import logging
+import requests
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Any, Callable, Iterator, Tuple, TypeVar
+from weaviate.config import Config, ConnectionConfig
+from weaviate.exceptions import UnexpectedStatusCodeException
+from weaviate.util import generate_uuid5
 from .config import settings
+from .metrics import record_vector_store_request
+from .resilience import CircuitBreaker, CircuitOpenError, call_with_retries
+from .shared_cache import MemoryCache, SharedCache
+from .tracing import set_span_attributes, start_span
 
+logger = logging.getLogger(__name__)
 
-class VectorStore:
-    def __init__(self):
-        self.client = weaviate.Client(settings.WEAVIATE_URL)
+# Internal class holding per-collection settings (embedding size, vector
+# index profile). It is hidden from list_collections.
+INDEX_SETTINGS_CLASS = "RagIndexSettings"
 
-    def create_collection(self, collection_name: str, description: str = ""):
-        """Create a new collection (class) in Weaviate."""
+# Internal class holding document-level metadata (owner, ACLs, filename...)
+# for collections using the normalized layout, where each chunk only stores
+# its text, the document id and its chunk index.
+DOCUMENTS_CLASS = "RagDocument"
+INTERNAL_CLASSES = (INDEX_SETTINGS_CLASS, DOCUMENTS_CLASS)
+
+# Collection settings "layout" value for the normalized chunk layout;
+# collections without it store the full metadata JSON on every chunk.
+NORMALIZED_LAYOUT = "normalized"
+
+
+T = TypeVar("T")
+
+
+class VectorStoreUnavailableError(Exception):
+    """The vector store could not be reached, even after retrying.
+
+    Raised instead of returning empty results, so callers can tell an outage
+    from a search that found nothing.
+    """
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a failed Weaviate call may succeed if retried."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, UnexpectedStatusCodeException):
+        return error.status_code >= 500 or error.status_code == 429
+    return False
+
+
+# Seconds a document record is cached; records are also evicted on deletion
+DOCUMENT_CACHE_TTL = 3600
+
+
+def access_key(metadata: Dict) -> str:
+    """Stable id of a document's access rules (owner, categories and users)."""
+    return generate_uuid5(
+        json.dumps(
+            [
+                metadata.get("owner", ""),
+                sorted(metadata.get("allowed_categories") or []),
+                sorted(metadata.get("allowed_users") or []),
+            ]
+        )
+    )
+
+
+def document_id(metadata: Dict) -> str:
+    """Stable id of the document a chunk belongs to.
+
+    Derived from the filename and its access rules, so re-uploading a file
+    with the same ACL reuses its record while a same-named upload with other
+    ACLs gets its own record instead of changing who can read the first.
+    """
+    return generate_uuid5(
+        json.dumps([metadata.get("filename", ""), access_key(metadata)])
+    )
+
+
+def split_chunk_metadata(metadata: Dict) -> Tuple[Dict, Optional[int]]:
+    """Separate a chunk's index from the metadata shared by its document."""
+    shared = {key: value for key, value in metadata.items() if key != "chunk_index"}
+    return shared, metadata.get("chunk_index")
+
+
+def join_chunk_metadata(shared: Dict, chunk_index: Optional[int]) -> Dict:
+    """Rebuild a chunk's metadata as returned by the legacy layout."""
+    if chunk_index is None:
+        return dict(shared)
+    return {**shared, "chunk_index": chunk_index}
+
+
+# Vector index types and compression schemes supported per collection.
+# "flat" and "bq" require Weaviate >= 1.23; "pq" requires >= 1.18.
+VECTOR_INDEX_TYPES = ("hnsw", "flat")
+VECTOR_COMPRESSIONS = ("pq", "bq")
+
+
+def build_vector_index_config(profile: Optional[Dict] = None) -> Dict[str, Any]:
+    """Translate a vector index profile into Weaviate class settings.
+
+    The profile uses snake_case keys (index_type, ef, ef_construction,
+    max_connections, compression, pq_segments, pq_centroids,
+    pq_training_limit, bq_rescore_limit, vector_cache_max_objects).
+    Returns the ``vectorIndexType``/``vectorIndexConfig`` entries to merge
+    into the class definition, or an empty dict for the Weaviate defaults.
+    """
+    if not profile:
+        return {}
+
+    index_type = profile.get("index_type") or "hnsw"
+    if index_type not in VECTOR_INDEX_TYPES:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+
+    compression = profile.get("compression")
+    if compression and compression not in VECTOR_COMPRESSIONS:
+        raise ValueError(f"Unsupported vector compression: {compression}")
+
+    hnsw_params = {
+        "ef": profile.get("ef"),
+        "efConstruction": profile.get("ef_construction"),
+        "maxConnections": profile.get("max_connections"),
+    }
+    if index_type == "flat":
+        if any(value is not None for value in hnsw_params.values()):
+            raise ValueError("HNSW parameters cannot be used with a flat index")
+        if compression == "pq":
+            raise ValueError("PQ compression is only available for HNSW indexes")
+
+    index_config = {k: v for k, v in hnsw_params.items() if v is not None}
+    if profile.get("vector_cache_max_objects") is not None:
+        index_config["vectorCacheMaxObjects"] = profile["vector_cache_max_objects"]
+
+    if compression == "pq":
+        pq_config = {"enabled": True}
+        if profile.get("pq_segments") is not None:
+            pq_config["segments"] = profile["pq_segments"]
+        if profile.get("pq_centroids") is not None:
+            pq_config["centroids"] = profile["pq_centroids"]
+        if profile.get("pq_training_limit") is not None:
+            pq_config["trainingLimit"] = profile["pq_training_limit"]
+        index_config["pq"] = pq_config
+    elif compression == "bq":
+        bq_config = {"enabled": True}
+        if profile.get("bq_rescore_limit") is not None:
+            bq_config["rescoreLimit"] = profile["bq_rescore_limit"]
+        index_config["bq"] = bq_config
+
+    class_settings = {"vectorIndexType": index_type}
+    if index_config:
+        class_settings["vectorIndexConfig"] = index_config
+    return class_settings
+
+
+class VectorStore(ABC):
+    """Interface implemented by the vector store backends.
+
+    Documents are dicts with ``text`` and ``metadata``; search results add a
+    ``relevance`` score in [0, 1] (Weaviate certainty, higher is better).
+    """
+
+    @abstractmethod
+    def create_collection(
+        self,
+        collection_name: str,
+        description: str = "",
+        vector_index_config: Optional[Dict] = None,
+        embedding_dimensions: Optional[int] = None,
+    ) -> bool:
+        """Create a collection; returns False if it already exists."""
+
+    @abstractmethod
+    def delete_collection(self, collection_name: str) -> bool:
+        """Delete a collection and all its data."""
+
+    @abstractmethod
+    def set_collection_settings(self, collection_name: str, values: Dict):
+        """Record settings for a collection, replacing any previous record."""
+
+    @abstractmethod
+    def get_collection_settings(self, collection_name: str) -> Dict:
+        """Return the recorded settings for a collection (empty if none)."""
+
+    @abstractmethod
+    def add_documents(
+        self,
+        collection_name: str,
+        documents: List[Dict],
+        vectors: List[List[float]],
+        check_duplicates: bool = True,
+    ) -> List[str]:
+        """Add documents with their vectors to a collection.
+
+        Chunks already stored for the same file are skipped unless
+        ``check_duplicates`` is False, e.g. when filling a new collection.
+        """
+
+    @abstractmethod
+    def search(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        filters: Optional[Dict] = None,
+        limit: int = 5,
+    ) -> List[Dict]:
+        """Search for similar documents in a single collection."""
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        """List all available collections."""
+
+    @abstractmethod
+    def iter_documents(
+        self, collection_name: str, batch_size: int = 100, include_vectors=False
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over every document in a collection.
+
+        With ``include_vectors`` each document also has its ``vector``.
+        """
+
+    @abstractmethod
+    def list_documents(
+        self, collection_name: str, skip: int = 0, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """List documents in a collection with pagination."""
+
+    @abstractmethod
+    def document_exists(self, collection_name: str, document_id: str) -> bool:
+        """Check if a document exists."""
+
+    @abstractmethod
+    def get_document(
+        self, collection_name: str, document_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """A document by ID, with its ``id``, ``text`` and ``metadata``."""
+
+    @abstractmethod
+    def delete_document(self, collection_name: str, document_id: str) -> bool:
+        """Delete a document by ID."""
+
+    @abstractmethod
+    def get_collection_info(self, collection_name: str) -> Optional[Dict]:
+        """Get information about a specific collection."""
+
+    def close(self):
+        """Release connections held by the backend."""
+
+    def get_embedding_dimensions(self, collection_name: str) -> Optional[int]:
+        """Embedding size used by a collection; None means the model default."""
+        return self.get_collection_settings(collection_name).get(
+            "embedding_dimensions"
+        )
+
+    def search_all_collections(
+        self,
+        query_vector: Optional[List[float]],
+        filters: Optional[Dict] = None,
+        limit: int = 5,
+        collection_vectors: Optional[Dict[str, List[float]]] = None,
+    ) -> List[Dict]:
+        """Search for similar documents across all collections.
+
+        ``collection_vectors`` maps collection names to query vectors for
+        collections whose embedding size differs from ``query_vector``.
+        """
+        try:
+            collections = self.list_collections()
+            if not collections:
+                logger.debug("No collections found in vector store")
+                return []
+
+            logger.debug("Searching across collections: %s", collections)
+            all_results = []
+            empty_collections = []
+            error_collections = []
+
+            for collection in collections:
+                vector = (collection_vectors or {}).get(collection, query_vector)
+                if vector is None:
+                    continue
+                try:
+                    results = self.search(collection, vector, filters, limit)
+                    if results:
+                        # Add collection name to each result
+                        for result in results:
+                            result["collection"] = collection
+                        all_results.extend(results)
+                    else:
+                        empty_collections.append(collection)
+                except VectorStoreUnavailableError:
+                    raise
+                except Exception as e:
+                    logger.warning(
+                        "Error searching collection %s: %s: %s",
+                        collection,
+                        type(e).__name__,
+                        e,
+                    )
+                    error_collections.append(collection)
+
+            if empty_collections:
+                logger.debug("Collections with no results: %s", empty_collections)
+            if error_collections:
+                logger.warning("Collections with errors: %s", error_collections)
+
+            if not all_results:
+                logger.debug(
+                    "No results found across any collections (searched %d)",
+                    len(collections),
+                )
+                return []
+
+            # Sort all results by relevance
+            sorted_results = sorted(
+                all_results, key=lambda x: x.get("relevance", 0), reverse=True
+            )[:limit]
+
+            logger.debug(
+                "Found %d results across %d collections",
+                len(sorted_results),
+                len(collections) - len(empty_collections) - len(error_collections),
+            )
+            return sorted_results
+        except VectorStoreUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(
+                "Error in search_all_collections: %s: %s", type(e).__name__, e
+            )
+            return []
+
+
+def _weaviate_client(read_timeout: float) -> weaviate.Client:
+    """Client with a pooled HTTP session whose connections are kept alive."""
+    return weaviate.Client(
+        settings.WEAVIATE_URL,
+        timeout_config=(settings.WEAVIATE_CONNECT_TIMEOUT_SECONDS, read_timeout),
+        additional_config=Config(
+            connection_config=ConnectionConfig(
+                session_pool_connections=settings.WEAVIATE_POOL_CONNECTIONS,
+                session_pool_maxsize=settings.WEAVIATE_POOL_MAXSIZE,
+            )
+        ),
+    )
+
+
+class WeaviateVectorStore(VectorStore):
+    """Weaviate backend.
+
+    Reads on the request path go through ``query_client``, with a short
+    timeout, retries of transient failures and a circuit breaker; writes
+    (batch imports, schema changes) use ``client``, whose timeout allows for
+    large batches and which does not retry non-idempotent calls.
+    """
+
+    def __init__(self, cache: Optional[SharedCache] = None):
+        self.client = _weaviate_client(settings.WEAVIATE_WRITE_TIMEOUT_SECONDS)
+        self.query_client = _weaviate_client(settings.WEAVIATE_QUERY_TIMEOUT_SECONDS)
+        self.breaker = CircuitBreaker(
+            "weaviate",
+            failure_threshold=settings.WEAVIATE_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.WEAVIATE_CIRCUIT_RESET_SECONDS,
+        )
+        # Collection settings and document records, shared across workers
+        # when the cache is the SQLite backend
+        self.cache = cache or MemoryCache()
+
+    def close(self):
+        # weaviate-client 3.x (pinned <4, tested with 3.26.7) exposes no public
+        # close; its private ``_connection`` owns the HTTP session, so close it
+        # when present and skip clients that no longer have one
+        for client in (self.client, self.query_client):
+            connection = getattr(client, "_connection", None)
+            if connection is not None:
+                connection.close()
+
+    def _read(self, operation: str, fn: Callable[[], T]) -> T:
+        """Run an idempotent read, retrying transient failures.
+
+        Raises ``VectorStoreUnavailableError`` when the retries are exhausted
+        or the circuit breaker is open.
+        """
+
+        def attempt():
+            record_vector_store_request(operation)
+            return fn()
+
+        try:
+            return call_with_retries(
+                attempt,
+                "weaviate",
+                is_transient_error,
+                attempts=settings.WEAVIATE_READ_ATTEMPTS,
+                base_delay=settings.WEAVIATE_RETRY_BASE_DELAY_SECONDS,
+                breaker=self.breaker,
+            )
+        except CircuitOpenError as e:
+            raise VectorStoreUnavailableError(str(e), e.retry_after) from e
+        except Exception as e:
+            if is_transient_error(e):
+                raise VectorStoreUnavailableError(
+                    f"Weaviate {operation} failed: {type(e).__name__}: {e}"
+                ) from e
+            raise
+
+    def create_collection(
+        self,
+        collection_name: str,
+        description: str = "",
+        vector_index_config: Optional[Dict] = None,
+        embedding_dimensions: Optional[int] = None,
+    ):
+        """Create a new collection (class) in Weaviate.
+
+        ``vector_index_config`` is an optional vector index profile (see
+        ``build_vector_index_config``) used to trade recall for memory and
+        latency per collection. ``embedding_dimensions`` is recorded so the
+        collection is always queried with embeddings of the same size.
+
+        New collections use the normalized layout: chunks hold the text, the
+        document id and the chunk index, and document metadata is stored
+        once per document in the internal documents class.
+        """
         class_obj = {
             "class": collection_name,
             "description": description,
@@ -22,50 +439,300 @@ class VectorStore:
                 },
                 {
                     "dataType": ["text"],
-                    "name": "metadata",
-                    "description": "Document metadata (stored as JSON string)",
+                    "name": "doc_id",
+                    "description": "Id of the document record",
+                    "tokenization": "field",
+                    "indexSearchable": False,
+                },
+                {
+                    "dataType": ["int"],
+                    "name": "chunk_index",
+                    "description": "Position of the chunk in its document",
+                    "indexFilterable": False,
+                    "indexSearchable": False,
                 },
             ],
+            **build_vector_index_config(vector_index_config),
         }
 
+        # Drop any settings cached while the collection did not exist yet
+        self.cache.delete("collection_settings", collection_name)
         try:
+            record_vector_store_request("create_collection")
             self.client.schema.create_class(class_obj)
-            return True
         except Exception as e:
             if "already exists" in str(e):
                 return False
             raise e
 
+        self.set_collection_settings(
+            collection_name,
+            {
+                "embedding_dimensions": embedding_dimensions,
+                "vector_index": vector_index_config or {},
+                "layout": NORMALIZED_LAYOUT,
+            },
+        )
+        return True
+
     def delete_collection(self, collection_name: str):
         """Delete a collection and all its data."""
         try:
+            record_vector_store_request("delete_collection")
             self.client.schema.delete_class(collection_name)
-            return True
         except Exception:
             return False
 
-    def _check_duplicate(self, collection_name: str, text: str, metadata: Dict) -> bool:
+        self.cache.delete("collection_settings", collection_name)
+        try:
+            record_vector_store_request("delete_settings")
+            self.client.data_object.delete(
+                uuid=generate_uuid5(collection_name),
+                class_name=INDEX_SETTINGS_CLASS,
+            )
+        except Exception:
+            pass  # Collections created before settings were recorded have none
+
+        try:
+            record_vector_store_request("delete_documents")
+            self.client.batch.delete_objects(
+                class_name=DOCUMENTS_CLASS,
+                where={
+                    "path": ["collection"],
+                    "operator": "Equal",
+                    "valueText": collection_name,
+                },
+            )
+        except Exception:
+            pass  # Legacy collections have no document records
+        return True
+
+    def _ensure_internal_class(
+        self, class_name: str, description: str, keys: List[str], payload: str
+    ):
+        """Create an internal class on first use.
+
+        ``keys`` are exact-match text properties used in filters; ``payload``
+        is a JSON text property that is stored but not indexed.
+        """
+        record_vector_store_request("get_schema")
+        if self.client.schema.exists(class_name):
+            return
+        try:
+            record_vector_store_request("create_collection")
+            self.client.schema.create_class(
+                {
+                    "class": class_name,
+                    "description": description,
+                    "vectorizer": "none",
+                    "properties": [
+                        {"dataType": ["text"], "name": name, "tokenization": "field"}
+                        for name in keys
+                    ]
+                    + [
+                        {
+                            "dataType": ["text"],
+                            "name": payload,
+                            "indexFilterable": False,
+                            "indexSearchable": False,
+                        }
+                    ],
+                }
+            )
+        except Exception as e:
+            if "already exists" not in str(e):
+                raise
+
+    def _ensure_settings_class(self):
+        self._ensure_internal_class(
+            INDEX_SETTINGS_CLASS,
+            "Per-collection settings for the RAG service",
+            ["collection"],
+            "settings",
+        )
+
+    def _ensure_documents_class(self):
+        self._ensure_internal_class(
+            DOCUMENTS_CLASS,
+            "Document metadata shared by the chunks of normalized collections",
+            ["collection", "doc_id"],
+            "metadata",
+        )
+
+    def _is_normalized(self, collection_name: str) -> bool:
+        layout = self.get_collection_settings(collection_name).get("layout")
+        return layout == NORMALIZED_LAYOUT
+
+    def _get_documents(self, collection_name: str, doc_ids) -> Dict[str, Dict]:
+        """Metadata of the given documents, from the cache or one query."""
+        documents = {}
+        missing = []
+        for doc_id in set(doc_ids):
+            cached = self.cache.get("document", f"{collection_name}:{doc_id}")
+            if cached is None:
+                missing.append(doc_id)
+            else:
+                documents[doc_id] = cached
+        if not missing:
+            return documents
+
+        query = (
+            self.query_client.query.get(DOCUMENTS_CLASS, ["doc_id", "metadata"])
+            .with_where(
+                {
+                    "operator": "And",
+                    "operands": [
+                        {
+                            "path": ["collection"],
+                            "operator": "Equal",
+                            "valueText": collection_name,
+                        },
+                        {
+                            "path": ["doc_id"],
+                            "operator": "ContainsAny",
+                            "valueTextArray": missing,
+                        },
+                    ],
+                }
+            )
+            .with_limit(len(missing))
+        )
+        result = self._read("get_documents", query.do)
+        for record in result.get("data", {}).get("Get", {}).get(DOCUMENTS_CLASS) or []:
+            metadata = json.loads(record["metadata"])
+            documents[record["doc_id"]] = metadata
+            self.cache.set(
+                "document",
+                f"{collection_name}:{record['doc_id']}",
+                metadata,
+                ttl=DOCUMENT_CACHE_TTL,
+            )
+        return documents
+
+    def _to_documents(
+        self, collection_name: str, objects: List[Dict], normalized: bool
+    ) -> List[Dict]:
+        """Turn stored chunk objects into ``text``/``metadata`` dicts.
+
+        Legacy chunks carry their metadata as a JSON string; normalized
+        chunks are joined with their (cached) document record, so each
+        document's metadata is fetched and parsed once.
+        """
+        documents = {}
+        if normalized:
+            documents = self._get_documents(
+                collection_name, [obj.get("doc_id") for obj in objects]
+            )
+
+        processed = []
+        for obj in objects:
+            additional = obj.get("_additional") or {}
+            try:
+                if normalized:
+                    metadata = join_chunk_metadata(
+                        documents.get(obj.get("doc_id"), {}), obj.get("chunk_index")
+                    )
+                else:
+                    metadata = obj["metadata"]
+                    if isinstance(metadata, str):
+                        metadata = json.loads(metadata)
+            except (KeyError, json.JSONDecodeError) as e:
+                logger.warning("Error parsing document metadata: %s", e)
+                continue
+
+            document = {"text": obj["text"], "metadata": metadata}
+            if "id" in additional:
+                document["id"] = additional["id"]
+            if "vector" in additional:
+                document["vector"] = additional["vector"]
+            if "certainty" in additional:
+                # Certainty: 1 is most relevant, 0 is least relevant
+                document["relevance"] = additional["certainty"] or 0
+            processed.append(document)
+        return processed
+
+    @staticmethod
+    def _chunk_fields(normalized: bool) -> List[str]:
+        return ["text", "doc_id", "chunk_index"] if normalized else ["text", "metadata"]
+
+    def set_collection_settings(self, collection_name: str, values: Dict):
+        """Record settings for a collection, replacing any previous record."""
+        self._ensure_settings_class()
+        properties = {"collection": collection_name, "settings": json.dumps(values)}
+        uuid = generate_uuid5(collection_name)
+        record_vector_store_request("get_settings")
+        if self.client.data_object.exists(uuid, class_name=INDEX_SETTINGS_CLASS):
+            record_vector_store_request("set_settings")
+            self.client.data_object.replace(
+                properties, class_name=INDEX_SETTINGS_CLASS, uuid=uuid
+            )
+        else:
+            record_vector_store_request("set_settings")
+            self.client.data_object.create(
+                properties, class_name=INDEX_SETTINGS_CLASS, uuid=uuid
+            )
+        self.cache.set("collection_settings", collection_name, values)
+
+    def get_collection_settings(self, collection_name: str) -> Dict:
+        """Return the recorded settings for a collection (empty if none)."""
+        cached = self.cache.get("collection_settings", collection_name)
+        if cached is not None:
+            return cached
+
+        try:
+            obj = self._read(
+                "get_settings",
+                lambda: self.query_client.data_object.get_by_id(
+                    generate_uuid5(collection_name), class_name=INDEX_SETTINGS_CLASS
+                ),
+            )
+            if not obj:
+                # Not cached: the collection may be created (or its settings
+                # recorded) by another worker after this lookup
+                return {}
+            values = json.loads(obj["properties"]["settings"])
+        except VectorStoreUnavailableError:
+            raise  # Returning {} would misread the collection's layout
+        except Exception as e:
+            logger.warning("Error loading settings for %s: %s", collection_name, e)
+            return {}
+
+        self.cache.set("collection_settings", collection_name, values)
+        return values
+
+    def _check_duplicate(
+        self, collection_name: str, text: str, metadata: Dict, normalized: bool = False
+    ) -> bool:
         """Check if a document with the same content already exists."""
+        if normalized:
+            source_filter = {
+                "path": ["doc_id"],
+                "operator": "Equal",
+                "valueText": document_id(metadata),
+            }
+        else:
+            source_filter = {
+                "path": ["metadata", "filename"],
+                "operator": "Equal",
+                "valueString": metadata.get("filename", ""),
+            }
         try:
             query = (
-                self.client.query.get(collection_name, ["text", "metadata"])
+                self.query_client.query.get(collection_name, ["text"])
                 .with_where(
                     {
                         "operator": "And",
                         "operands": [
                             {"path": ["text"], "operator": "Equal", "valueText": text},
-                            {
-                                "path": ["metadata", "filename"],
-                                "operator": "Equal",
-                                "valueString": metadata.get("filename", ""),
-                            },
+                            source_filter,
                         ],
                     }
                 )
                 .with_limit(1)
             )
 
-            result = query.do()
+            with start_span("weaviate.check_duplicate", collection=collection_name):
+                result = self._read("check_duplicate", query.do)
             if result and "data" in result:
                 # Check if the collection exists in the result
                 if collection_name in result["data"].get("Get", {}):
@@ -73,43 +740,88 @@ class VectorStore:
                     if docs is not None:
                         return len(docs) > 0
             return False
+        except VectorStoreUnavailableError:
+            raise  # Treating it as "no duplicate" would re-add the chunk
         except Exception as e:
-            print(f"Error checking for duplicates: {str(e)}")
+            logger.warning("Error checking for duplicates: %s", e)
             return False
 
     def add_documents(
-        self, collection_name: str, documents: List[Dict], vectors: List[List[float]]
+        self,
+        collection_name: str,
+        documents: List[Dict],
+        vectors: List[List[float]],
+        check_duplicates: bool = True,
     ) -> List[str]:
-        """Add documents with their vectors to a collection."""
+        """Add documents with their vectors to a collection.
+
+        In normalized collections each distinct document's metadata is
+        written once, as a record in the documents class (replacing any
+        earlier record for the same file and ACL), and chunks only reference
+        it. When every chunk is a duplicate no record is written: duplicates
+        are matched within the same document, whose record already exists.
+        """
         added_ids = []
         batch_size = 50  # Reduced batch size
+        normalized = self._is_normalized(collection_name)
+        if normalized:
+            self._ensure_documents_class()
+            document_records = {}
 
         # Process in smaller batches
         for i in range(0, len(documents), batch_size):
             batch_docs = documents[i : i + batch_size]
             batch_vectors = vectors[i : i + batch_size]
 
-            print(
-                f"Processing batch {i // batch_size + 1} of {(len(documents) + batch_size - 1) // batch_size}"
+            logger.debug(
+                "Processing batch %d of %d",
+                i // batch_size + 1,
+                (len(documents) + batch_size - 1) // batch_size,
             )
 
-            with self.client.batch as batch:
+            record_vector_store_request("batch_add")
+            with start_span(
+                "weaviate.batch_add", collection=collection_name, limit=len(batch_docs)
+            ), self.client.batch as batch:
                 batch.batch_size = batch_size
                 for doc, vector in zip(batch_docs, batch_vectors):
                     try:
                         # Check for duplicates before adding
-                        if self._check_duplicate(
-                            collection_name, doc["text"], doc["metadata"]
+                        if check_duplicates and self._check_duplicate(
+                            collection_name, doc["text"], doc["metadata"], normalized
                         ):
-                            print(
-                                f"Skipping duplicate document: {doc['metadata'].get('filename', 'unknown')}"
+                            logger.debug(
+                                "Skipping duplicate chunk of %s",
+                                doc["metadata"].get("filename", "unknown"),
                             )
                             continue
 
-                        properties = {
-                            "text": doc["text"],
-                            "metadata": json.dumps(doc["metadata"]),
-                        }
+                        if normalized:
+                            shared, chunk_index = split_chunk_metadata(
+                                doc["metadata"]
+                            )
+                            doc_id = document_id(shared)
+                            if doc_id not in document_records:
+                                document_records[doc_id] = shared
+                                batch.add_data_object(
+                                    data_object={
+                                        "collection": collection_name,
+                                        "doc_id": doc_id,
+                                        "metadata": json.dumps(shared),
+                                    },
+                                    class_name=DOCUMENTS_CLASS,
+                                    uuid=generate_uuid5(f"{collection_name}:{doc_id}"),
+                                )
+                            properties = {
+                                "text": doc["text"],
+                                "doc_id": doc_id,
+                                "chunk_index": chunk_index or 0,
+                            }
+                        else:
+                            properties = {
+                                "text": doc["text"],
+                                "metadata": json.dumps(doc["metadata"]),
+                            }
 
                         # Add document and collect its ID
                         doc_id = batch.add_data_object(
@@ -118,10 +830,20 @@ class VectorStore:
                             vector=vector,
                         )
                         added_ids.append(doc_id)
+                    except VectorStoreUnavailableError:
+                        raise
                     except Exception as e:
-                        print(f"Error adding document to batch: {str(e)}")
+                        logger.warning("Error adding document to batch: %s", e)
                         continue
 
+        if normalized:
+            for doc_id, metadata in document_records.items():
+                self.cache.set(
+                    "document",
+                    f"{collection_name}:{doc_id}",
+                    metadata,
+                    ttl=DOCUMENT_CACHE_TTL,
+                )
         return added_ids
 
     def search(
@@ -132,7 +854,14 @@ class VectorStore:
         limit: int = 5,
     ) -> List[Dict]:
         """Search for similar documents in a single collection."""
-        return self._search_collection(collection_name, query_vector, filters, limit)
+        with start_span(
+            "weaviate.search", collection=collection_name, limit=limit
+        ) as span:
+            results = self._search_collection(
+                collection_name, query_vector, filters, limit
+            )
+            set_span_attributes(span, results=len(results))
+            return results
 
     def _search_collection(
         self,
@@ -144,205 +873,144 @@ class VectorStore:
         """Internal method to search a single collection."""
         try:
             # First check if collection exists
-            schema = self.client.schema.get(collection_name)
+            schema = self._read(
+                "get_schema", lambda: self.query_client.schema.get(collection_name)
+            )
             if not schema:
-                print(f"Collection {collection_name} does not exist")
+                logger.debug("Collection %s does not exist", collection_name)
                 return []
 
             # Check if collection has any documents
-            doc_count = (
-                self.client.query.aggregate(collection_name).with_meta_count().do()
+            doc_count = self._read(
+                "aggregate",
+                self.query_client.query.aggregate(collection_name).with_meta_count().do,
             )
             if (
                 not doc_count.get("data", {})
                 .get("Aggregate", {})
                 .get(collection_name, [])
             ):
-                print(f"Collection {collection_name} is empty")
+                logger.debug("Collection %s is empty", collection_name)
                 return []
 
             # Build search query
+            normalized = self._is_normalized(collection_name)
             query = (
-                self.client.query.get(
-                    collection_name, ["text", "metadata", "_additional {certainty}"]
+                self.query_client.query.get(
+                    collection_name,
+                    self._chunk_fields(normalized) + ["_additional {certainty}"],
                 )
                 .with_near_vector({"vector": query_vector})
                 .with_limit(limit)
             )
 
             if filters:
-                print(f"Applying filters: {json.dumps(filters, indent=2)}")
+                logger.debug("Applying filters: %s", filters)
                 query = query.with_where(filters)
 
             # Execute search
-            result = query.do()
+            result = self._read("search", query.do)
             if not result:
-                print("Search query returned None")
+                logger.warning("Search query returned None")
                 return []
 
             if "data" not in result:
-                print(f"Unexpected response format: {json.dumps(result, indent=2)}")
+                logger.warning("Unexpected response format: %s", result)
                 return []
 
             results = result.get("data", {}).get("Get", {}).get(collection_name, [])
             if not results:
-                print(f"No results found in collection: {collection_name}")
+                logger.debug("No results found in collection %s", collection_name)
                 return []
 
-            # Process each result to ensure proper structure and include relevance score
-            processed_results = []
-            for r in results:
-                if "text" in r and "metadata" in r:
-                    try:
-                        # Parse metadata JSON string back to object
-                        metadata = (
-                            json.loads(r["metadata"])
-                            if isinstance(r["metadata"], str)
-                            else r["metadata"]
-                        )
-                        # Get certainty score (1 is most relevant, 0 is least relevant)
-                        certainty = r.get("_additional", {}).get("certainty", 0)
-                        processed_results.append(
-                            {
-                                "text": r["text"],
-                                "metadata": metadata,
-                                "relevance": certainty,
-                            }
-                        )
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing result metadata: {e}")
-                        continue
-
-            # Return all results, let the caller handle relevance filtering
-            return processed_results
+            # Attach metadata and relevance; the caller handles relevance filtering
+            return self._to_documents(collection_name, results, normalized)
+        except VectorStoreUnavailableError:
+            raise
         except Exception as e:
-            print(f"Error in vector store search: {type(e).__name__}: {str(e)}")
+            logger.error("Error in vector store search: %s: %s", type(e).__name__, e)
             return []
 
-    def search_all_collections(
-        self,
-        query_vector: List[float],
-        filters: Optional[Dict] = None,
-        limit: int = 5,
-    ) -> List[Dict]:
-        """Search for similar documents across all collections."""
-        try:
-            collections = self.list_collections()
-            if not collections:
-                print("No collections found in vector store")
-                return []
-
-            print(f"Searching across collections: {collections}")
-            all_results = []
-            empty_collections = []
-            error_collections = []
-
-            for collection in collections:
-                try:
-                    results = self._search_collection(
-                        collection, query_vector, filters, limit
-                    )
-                    if results:
-                        # Add collection name to each result
-                        for result in results:
-                            result["collection"] = collection
-                        all_results.extend(results)
-                    else:
-                        empty_collections.append(collection)
-                except Exception as e:
-                    print(
-                        f"Error searching collection {collection}: {type(e).__name__}: {str(e)}"
-                    )
-                    error_collections.append(collection)
-
-            if empty_collections:
-                print(f"Collections with no results: {empty_collections}")
-            if error_collections:
-                print(f"Collections with errors: {error_collections}")
+    def list_collections(self) -> List[str]:
+        """List all available collections."""
+        schema = self._read("get_schema", self.query_client.schema.get)
+        return [
+            class_obj["class"]
+            for class_obj in schema["classes"]
+            if class_obj["class"] not in INTERNAL_CLASSES
+        ]
 
-            if not all_results:
-                print(
-                    "No results found across any collections "
-                    f"(searched {len(collections)} collections)"
+    def iter_documents(
+        self, collection_name: str, batch_size: int = 100, include_vectors=False
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over every document in a collection using a cursor."""
+        normalized = self._is_normalized(collection_name)
+        additional = ["id", "vector"] if include_vectors else ["id"]
+        after = None
+        while True:
+            query = (
+                self.query_client.query.get(
+                    collection_name, self._chunk_fields(normalized)
                 )
-                return []
-
-            # Sort all results by relevance
-            sorted_results = sorted(
-                all_results, key=lambda x: x.get("relevance", 0), reverse=True
-            )[:limit]
-
-            print(
-                f"Found {len(sorted_results)} results across "
-                f"{len(collections) - len(empty_collections) - len(error_collections)} "
-                "collections"
+                .with_additional(additional)
+                .with_limit(batch_size)
             )
-            return sorted_results
-        except Exception as e:
-            print(f"Error in search_all_collections: {type(e).__name__}: {str(e)}")
-            return []
+            if after:
+                query = query.with_after(after)
 
-    def list_collections(self) -> List[str]:
-        """List all available collections."""
-        schema = self.client.schema.get()
-        return [class_obj["class"] for class_obj in schema["classes"]]
+            with start_span(
+                "weaviate.iter_documents", collection=collection_name, limit=batch_size
+            ):
+                result = self._read("iter_documents", query.do)
+            documents = result.get("data", {}).get("Get", {}).get(collection_name)
+            if not documents:
+                return
+
+            yield from self._to_documents(collection_name, documents, normalized)
+            after = documents[-1]["_additional"]["id"]
 
     def list_documents(
         self, collection_name: str, skip: int = 0, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """List documents in a collection with pagination."""
         try:
+            normalized = self._is_normalized(collection_name)
             query = (
-                self.client.query.get(
-                    collection_name, ["text", "metadata", "_additional {id}"]
+                self.query_client.query.get(
+                    collection_name,
+                    self._chunk_fields(normalized) + ["_additional {id}"],
                 )
                 .with_limit(limit)
                 .with_offset(skip)
             )
 
-            result = query.do()
+            with start_span(
+                "weaviate.list_documents", collection=collection_name, limit=limit
+            ):
+                result = self._read("list_documents", query.do)
             if not result or "data" not in result:
                 return []
 
             documents = result.get("data", {}).get("Get", {}).get(collection_name, [])
-
-            # Process documents to include IDs
-            processed_docs = []
-            for doc in documents:
-                if "_additional" in doc and "id" in doc["_additional"]:
-                    try:
-                        # Parse metadata JSON string back to object
-                        metadata = (
-                            json.loads(doc["metadata"])
-                            if isinstance(doc["metadata"], str)
-                            else doc["metadata"]
-                        )
-                        processed_docs.append(
-                            {
-                                "id": doc["_additional"]["id"],
-                                "text": doc["text"],
-                                "metadata": metadata,
-                            }
-                        )
-                    except json.JSONDecodeError as e:
-                        print(f"Error parsing document metadata: {e}")
-                        continue
-            return processed_docs
+            return self._to_documents(collection_name, documents, normalized)
+        except VectorStoreUnavailableError:
+            raise
         except Exception as e:
-            print(f"Error listing documents: {type(e).__name__}: {str(e)}")
+            logger.error("Error listing documents: %s: %s", type(e).__name__, e)
             return []
 
     def document_exists(self, collection_name: str, document_id: str) -> bool:
         """Check if a document exists."""
         try:
             # Query for the specific document by ID
-            query = (
-                self.client.query.get(collection_name, ["_additional {id}"])
+            query = self._read(
+                "document_exists",
+                self.query_client.query.get(collection_name, ["_additional {id}"])
                 .with_where(
                     {"path": ["id"], "operator": "Equal", "valueString": document_id}
                 )
                 .with_limit(1)
-                .do()
+                .do,
             )
 
             if not query or "data" not in query:
@@ -350,49 +1018,136 @@ class VectorStore:
 
             docs = query.get("data", {}).get("Get", {}).get(collection_name, [])
             return len(docs) > 0
+        except VectorStoreUnavailableError:
+            raise
         except Exception as e:
             if "404" in str(e):
                 # Document not found is an expected case
                 return False
-            print(f"Error checking document existence: {type(e).__name__}: {str(e)}")
+            logger.error(
+                "Error checking document existence: %s: %s", type(e).__name__, e
+            )
             return False
 
+    def get_document(
+        self, collection_name: str, document_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """A document by ID, with its ``id``, ``text`` and ``metadata``."""
+        normalized = self._is_normalized(collection_name)
+        query = (
+            self.query_client.query.get(collection_name, self._chunk_fields(normalized))
+            .with_additional(["id"])
+            .with_where(
+                {"path": ["id"], "operator": "Equal", "valueString": document_id}
+            )
+            .with_limit(1)
+        )
+        with start_span("weaviate.get_document", collection=collection_name):
+            result = self._read("get_document", query.do)
+        chunks = (result or {}).get("data", {}).get("Get", {}).get(collection_name)
+        documents = self._to_documents(collection_name, chunks or [], normalized)
+        return documents[0] if documents else None
+
+    def _chunk_document_id(self, collection_name: str, chunk_id: str) -> Optional[str]:
+        """The document record a normalized chunk references."""
+        query = (
+            self.query_client.query.get(collection_name, ["doc_id"])
+            .with_where({"path": ["id"], "operator": "Equal", "valueString": chunk_id})
+            .with_limit(1)
+        )
+        result = self._read("get_chunk", query.do)
+        chunks = result.get("data", {}).get("Get", {}).get(collection_name) or []
+        return chunks[0].get("doc_id") if chunks else None
+
+    def _delete_unused_record(self, collection_name: str, doc_id: str):
+        """Delete a document record once no chunk references it."""
+        try:
+            query = (
+                self.query_client.query.get(collection_name, ["doc_id"])
+                .with_where(
+                    {"path": ["doc_id"], "operator": "Equal", "valueText": doc_id}
+                )
+                .with_limit(1)
+            )
+            result = self._read("get_chunk", query.do)
+            if result.get("data", {}).get("Get", {}).get(collection_name):
+                return
+            record_vector_store_request("delete_document_record")
+            self.client.data_object.delete(
+                uuid=generate_uuid5(f"{collection_name}:{doc_id}"),
+                class_name=DOCUMENTS_CLASS,
+            )
+        except Exception as e:
+            logger.warning("Error deleting record of document %s: %s", doc_id, e)
+        self.cache.delete("document", f"{collection_name}:{doc_id}")
+
     def delete_document(self, collection_name: str, document_id: str) -> bool:
-        """Delete a document by ID."""
+        """Delete a document by ID.
+
+        In normalized collections the document record goes with its last
+        chunk.
+        """
         try:
             # First check if document exists
             if not self.document_exists(collection_name, document_id):
-                print(
-                    f"Document {document_id} not found in collection {collection_name}"
+                logger.info(
+                    "Document %s not found in collection %s",
+                    document_id,
+                    collection_name,
                 )
                 return False
 
+            doc_id = None
+            if self._is_normalized(collection_name):
+                doc_id = self._chunk_document_id(collection_name, document_id)
+
             try:
                 # Attempt deletion using object UUID
+                record_vector_store_request("delete_document")
                 self.client.data_object.delete(
                     class_name=collection_name, uuid=document_id
                 )
             except Exception as e:
-                print(f"Error during deletion: {type(e).__name__}: {str(e)}")
+                logger.error("Error during deletion: %s: %s", type(e).__name__, e)
                 return False
 
             # Verify deletion
             if self.document_exists(collection_name, document_id):
-                print(f"Document {document_id} still exists after deletion attempt")
+                logger.warning(
+                    "Document %s still exists after deletion attempt", document_id
+                )
                 return False
 
-            print(f"Document {document_id} successfully deleted from {collection_name}")
+            if doc_id is not None:
+                self._delete_unused_record(collection_name, doc_id)
+            logger.info("Deleted document %s from %s", document_id, collection_name)
             return True
         except Exception as e:
-            print(f"Error deleting document: {type(e).__name__}: {str(e)}")
+            logger.error("Error deleting document: %s: %s", type(e).__name__, e)
             return False
 
     def get_collection_info(self, collection_name: str) -> Optional[Dict]:
         """Get information about a specific collection."""
         try:
-            schema = self.client.schema.get(collection_name)
+            schema = self._read(
+                "get_schema", lambda: self.query_client.schema.get(collection_name)
+            )
             if not schema:
                 return None
             return schema
+        except VectorStoreUnavailableError:
+            raise
         except Exception:
             return None
+
+
+def create_vector_store(cache: Optional[SharedCache] = None) -> VectorStore:
+    """Build the vector store backend selected by VECTOR_STORE_BACKEND."""
+    backend = settings.VECTOR_STORE_BACKEND.lower()
+    if backend == "weaviate":
+        return WeaviateVectorStore(cache)
+    if backend == "local":
+        from .local_vector_store import LocalVectorStore
+
+        return LocalVectorStore(settings.LOCAL_VECTOR_STORE_PATH)
+    raise ValueError(f"Unknown vector store backend: {settings.VECTOR_STORE_BACKEND}")
@@ -1,9 +1,53 @@
-from fastapi import FastAPI
+import uuid
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import auth, documents, indexes
+from fastapi.responses import ORJSONResponse
+from .core.compression import CompressionMiddleware
 from .core.config import settings
+from .core.logging_config import configure_logging, request_id_var
+from .core.tracing import configure_tracing, shutdown_tracing
+
+configure_logging(settings.LOG_LEVEL, settings.LOG_LEVELS, settings.LOG_FORMAT)
+if settings.TRACING_ENABLED:
+    configure_tracing(
+        settings.TRACING_EXPORTER,
+        settings.TRACING_FILE_PATH,
+        settings.TRACING_SAMPLE_RATE,
+    )
+
+from .routers import auth, chat, documents, indexes, rfp  # noqa: E402
+from .core.dependencies import container  # noqa: E402
+from .core.metrics import render_metrics  # noqa: E402
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are created on first use; release them on shutdown
+    yield
+    container.close()
+    shutdown_tracing()
+
+
+app = FastAPI(
+    title="RAG Application API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Tag logs for this request with its X-Request-ID (generated if absent)."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
-app = FastAPI(title="RAG Application API")
 
 # Default CORS origins
 default_origins = [
@@ -21,6 +65,15 @@ additional_origins = (
 )
 allowed_origins = default_origins + additional_origins
 
+# Compress large responses (Brotli when installed, else gzip)
+if settings.RESPONSE_COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+        gzip_level=settings.RESPONSE_GZIP_LEVEL,
+        brotli_quality=settings.RESPONSE_BROTLI_QUALITY,
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -33,9 +86,18 @@ app.add_middleware(
 # Include routers
 app.include_router(auth.router, prefix="/api", tags=["auth"])
 app.include_router(documents.router, prefix="/api", tags=["documents"])
+app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(indexes.router, prefix="/api", tags=["indexes"])
+app.include_router(rfp.router, prefix="/api", tags=["rfp"])
 
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics():
+    """Expose pipeline metrics in Prometheus text format."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,6 +1,7 @@
 import logging
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from ..core.auth import (
     User,
@@ -8,11 +9,9 @@ from ..core.auth import (
     create_access_token,
     get_current_user,
     verify_password,
-    fake_users_db,
+    user_store,
 )
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -20,31 +19,32 @@ router = APIRouter()
 
 @router.post("/auth/token", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    logger.info(f"Login attempt for username: {form_data.username}")
+    logger.info("Login attempt for username: %s", form_data.username)
 
-    user = fake_users_db.get(form_data.username)
+    # Store lookups and bcrypt verification are blocking; keep them off the loop
+    user = await run_in_threadpool(user_store.get_user, form_data.username)
     if not user:
-        logger.warning(f"User not found: {form_data.username}")
+        logger.warning("User not found: %s", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    logger.info("Verifying password...")
-    if not verify_password(form_data.password, user["hashed_password"]):
-        logger.warning(f"Invalid password for user: {form_data.username}")
+    if not await run_in_threadpool(
+        verify_password, form_data.password, user["hashed_password"]
+    ):
+        logger.warning("Invalid password for user: %s", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    logger.info(f"Creating access token for user: {form_data.username}")
     access_token = create_access_token(
         data={"sub": user["username"], "roles": user["roles"]}
     )
-    logger.info("Login successful")
+    logger.info("Login successful for user: %s", form_data.username)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -66,4 +66,4 @@ async def list_users(current_user: User = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can list users",
         )
-    return list(fake_users_db.keys())
+    return user_store.list_usernames()
@@ -0,0 +1,182 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+import logging
+from typing import Dict, List, Optional
+from ..core.admission import admit, query_pool
+from ..core.auth import User, get_current_user
+from ..core.citations import SourceSelector
+from ..core.conversations import ConversationStore
+from ..core.dependencies import (
+    get_conversation_store,
+    get_llm_client,
+    get_source_selector,
+    get_vector_store,
+)
+from ..core.llm_client import LLMClient
+from ..core.llm_providers import LLMRateLimitError
+from ..core.metrics import track_in_flight, track_stage
+from ..core.responses import model_response
+from ..core.single_flight import normalize_query
+from ..core.tracing import set_span_attributes, traced_route
+from ..core.vector_store import VectorStore
+from .documents import (
+    NO_RESULTS_ANSWER,
+    accessible_sources,
+    rate_limited,
+    retrieval_flight,
+    retrieve,
+)
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class ChatRequest(BaseModel):
+    message: str
+    session_id: Optional[str] = None  # None starts a new session
+    index_name: Optional[str] = None
+
+
+class ChatResponse(BaseModel):
+    session_id: str
+    answer: str
+    sources: List[Dict]
+    standalone_query: str  # The follow-up rewritten for retrieval
+
+
+class ChatSessionResponse(BaseModel):
+    session_id: str
+    summary: str
+    turns: List[Dict]
+
+
+def get_session(
+    store: ConversationStore, user: User, session_id: Optional[str]
+) -> Dict:
+    if session_id is None:
+        return store.new_session()
+    session = store.get(user.username, session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found or expired",
+        )
+    return session
+
+
+@router.post("/chat", response_model=ChatResponse)
+@traced_route("chat")
+async def chat(
+    chat_request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    _in_flight=Depends(track_in_flight("chat")),
+    _admission=Depends(admit(query_pool)),
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_client: LLMClient = Depends(get_llm_client),
+    store: ConversationStore = Depends(get_conversation_store),
+    selector: SourceSelector = Depends(get_source_selector),
+):
+    """Answer a message in the context of the session's earlier turns.
+
+    Follow-ups are rewritten into standalone queries for retrieval, and the
+    history sent to the model is bounded by the chat token budget; older
+    turns are summarized after the response is sent.
+    """
+    session = await run_in_threadpool(
+        get_session, store, current_user, chat_request.session_id
+    )
+    set_span_attributes(
+        index=chat_request.index_name or "all",
+        user=current_user.username,
+        turns=len(session["turns"]),
+    )
+    history = store.history(session)
+
+    try:
+        query = chat_request.message
+        if history:
+            with track_stage("query_rewrite"):
+                query = await run_in_threadpool(
+                    llm_client.rewrite_query, history, chat_request.message
+                )
+            logger.debug("Rewrote follow-up as: %s", query)
+
+        results = await retrieval_flight.do(
+            (normalize_query(query), chat_request.index_name),
+            lambda: retrieve(vector_store, llm_client, query, chat_request.index_name),
+        )
+        sources = accessible_sources(results, current_user)
+
+        if sources:
+            with track_stage("completion"):
+                answer = await run_in_threadpool(
+                    llm_client.get_completion,
+                    chat_request.message,
+                    sources,
+                    history=history or None,
+                )
+            cited_sources = await run_in_threadpool(
+                selector.select, answer, sources, chat_request.index_name
+            )
+        else:
+            answer, cited_sources = NO_RESULTS_ANSWER, []
+
+        with track_stage("history_update"):
+            session = await run_in_threadpool(
+                store.add_turn,
+                current_user.username,
+                session,
+                chat_request.message,
+                answer,
+            )
+        if store.needs_summary(session):
+            background_tasks.add_task(
+                store.summarize, current_user.username, session["id"], llm_client
+            )
+    except LLMRateLimitError as e:
+        raise rate_limited(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error in chat: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+    return model_response(
+        ChatResponse(
+            session_id=session["id"],
+            answer=answer,
+            sources=cited_sources,
+            standalone_query=query,
+        )
+    )
+
+
+@router.get("/chat/{session_id}", response_model=ChatSessionResponse)
+async def get_chat_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    store: ConversationStore = Depends(get_conversation_store),
+):
+    """The session's summary and the turns kept verbatim."""
+    session = await run_in_threadpool(get_session, store, current_user, session_id)
+    return model_response(
+        ChatSessionResponse(
+            session_id=session["id"],
+            summary=session["summary"],
+            turns=session["turns"],
+        )
+    )
+
+
+@router.delete("/chat/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_chat_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    store: ConversationStore = Depends(get_conversation_store),
+):
+    await run_in_threadpool(store.delete, current_user.username, session_id)
@@ -8,19 +8,43 @@ from fastapi import (
     Form,
     Query,
 )
+from fastapi.concurrency import run_in_threadpool
 import json
+import logging
 from typing import List, Dict, Optional
 from datetime import datetime
-from ..core.auth import User, get_current_user
+from ..core.auth import User, can_access_document, get_current_user
+from ..core.citations import SourceSelector
+from ..core.admission import admit, ingest_pool, query_pool, retry_after_header
+from ..core.config import settings
+from ..core.dependencies import (
+    get_document_processor,
+    get_index_fingerprints,
+    get_llm_client,
+    get_query_handles,
+    get_source_selector,
+    get_vector_store,
+)
 from ..core.document_processor import DocumentProcessor
-from ..core.vector_store import VectorStore
+from ..core.text_cleaning import IndexFingerprints
+from ..core.vector_store import VectorStore, VectorStoreUnavailableError
 from ..core.llm_client import LLMClient
+from ..core.llm_providers import LLMRateLimitError
+from ..core.metrics import track_in_flight, track_stage
+from ..core.query_handles import QueryHandles, QueryVectors
+from ..core.responses import model_response
+from ..core.single_flight import SingleFlight, normalize_query
+from ..core.tracing import set_span_attributes, traced_route
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
-doc_processor = DocumentProcessor()
-vector_store = VectorStore()
-llm_client = LLMClient()
+
+# Identical concurrent queries share one retrieval and, when the requesting
+# users can see the same sources, one completion
+retrieval_flight = SingleFlight("retrieval")
+completion_flight = SingleFlight("completion")
 
 
 class DocumentAccess(BaseModel):
@@ -32,6 +56,19 @@ class QueryRequest(BaseModel):
     query: str
     index_name: Optional[str] = None
     filters: Optional[Dict] = None
+    # From POST /documents/query/handle or an earlier query's response; the
+    # query is embedded again if the handle has expired
+    query_handle: Optional[str] = None
+
+
+class QueryHandleRequest(BaseModel):
+    query: str
+    index_name: Optional[str] = None  # Embed only for this index; None for all
+
+
+class QueryHandleResponse(BaseModel):
+    query_handle: str
+    expires_in: int  # Seconds
 
 
 class DocumentUploadRequest(BaseModel):
@@ -75,24 +112,169 @@ class Document(BaseModel):
 class QueryResponse(BaseModel):
     answer: str
     sources: List[Dict]
+    query_handle: Optional[str] = None  # Reuses this query's embedding
 
 
 class ListDocumentsResponse(BaseModel):
     documents: List[Document]
 
 
+def rate_limited(error: LLMRateLimitError) -> HTTPException:
+    """429 for an upstream rate limit, passing on the provider's Retry-After."""
+    logger.warning("LLM provider rate limited the request: %s", error)
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="The language model is rate limited; please retry shortly",
+        headers=retry_after_header(error.retry_after or 1),
+    )
+
+
+def store_unavailable(error: VectorStoreUnavailableError) -> HTTPException:
+    """503 when the vector store is down, rather than an empty answer."""
+    logger.error("Vector store unavailable: %s", error)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="The document index is temporarily unavailable; please retry",
+        headers=retry_after_header(error.retry_after),
+    )
+
+
+def get_query_vectors(
+    vector_store: VectorStore,
+    llm_client: LLMClient,
+    query: str,
+    index_name: Optional[str] = None,
+    vectors_by_dimensions: Optional[QueryVectors] = None,
+) -> Dict:
+    """Embed a query once per embedding size used by the searched collections.
+
+    Returns a mapping of collection name to query vector, so every collection
+    is searched with an embedding matching the size it was indexed with.
+    Vectors already in ``vectors_by_dimensions`` (e.g. from a query handle)
+    are reused, and the sizes embedded here are added to it.
+    """
+    collections = [index_name] if index_name else vector_store.list_collections()
+    if vectors_by_dimensions is None:
+        vectors_by_dimensions = {}
+    collection_vectors = {}
+    for collection in collections:
+        dimensions = vector_store.get_embedding_dimensions(collection)
+        if dimensions not in vectors_by_dimensions:
+            vectors_by_dimensions[dimensions] = llm_client.get_query_embedding(
+                query, dimensions=dimensions
+            )
+        collection_vectors[collection] = vectors_by_dimensions[dimensions]
+    return collection_vectors
+
+
+NO_RESULTS_ANSWER = (
+    "No relevant documents found. This could be because:\n"
+    "1. No documents match your query closely enough\n"
+    "2. You don't have access to the relevant documents\n"
+    "3. The documents haven't been properly indexed"
+)
+
+
+def accessible_sources(results: List[Dict], user: User) -> List[Dict]:
+    """The search results ``user`` may read, as sources sorted by relevance.
+
+    Results are shared between concurrent requests, so they are not modified.
+    """
+    with track_stage("access_filter"):
+        sources = []
+        for result in results:
+            try:
+                metadata = (
+                    json.loads(result["metadata"])
+                    if isinstance(result["metadata"], str)
+                    else result["metadata"]
+                )
+
+                if can_access_document(user, metadata):
+                    source = {
+                        "text": result["text"],
+                        "metadata": metadata,
+                        "relevance": result.get("relevance", 0),
+                    }
+                    if "collection" in result:
+                        source["collection"] = result["collection"]
+                    sources.append(source)
+                else:
+                    logger.debug(
+                        "Access denied to %s for %s",
+                        metadata.get("filename"),
+                        user.username,
+                    )
+            except Exception as e:
+                logger.warning("Error processing result metadata: %s", e)
+                continue
+    sources.sort(key=lambda x: x["relevance"], reverse=True)
+    return sources
+
+
+async def retrieve(
+    vector_store: VectorStore,
+    llm_client: LLMClient,
+    query: str,
+    index_name: Optional[str] = None,
+    vectors_by_dimensions: Optional[QueryVectors] = None,
+) -> List[Dict]:
+    """Embed the query and search the index (or all indexes) without filters."""
+    # Get query embedding(s), one per embedding size in use
+    try:
+        with track_stage("query_embedding"):
+            query_vectors = await run_in_threadpool(
+                get_query_vectors,
+                vector_store,
+                llm_client,
+                query,
+                index_name,
+                vectors_by_dimensions,
+            )
+    except VectorStoreUnavailableError as e:
+        raise store_unavailable(e)
+
+    try:
+        # Search vector store without filters first
+        with track_stage("vector_search"):
+            if index_name:
+                results = await run_in_threadpool(
+                    vector_store.search, index_name, query_vectors[index_name]
+                )
+            else:
+                results = await run_in_threadpool(
+                    vector_store.search_all_collections,
+                    None,
+                    collection_vectors=query_vectors,
+                )
+    except VectorStoreUnavailableError as e:
+        raise store_unavailable(e)
+    except Exception as e:
+        logger.error("Error during vector store search: %s: %s", type(e).__name__, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error searching documents",
+        )
+    logger.debug("Found %d results from vector store", len(results))
+    return results
+
+
 @router.get("/documents/{index_name}", response_model=ListDocumentsResponse)
 async def list_documents(
     index_name: str,
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    vector_store: VectorStore = Depends(get_vector_store),
 ):
     """List documents in an index with pagination."""
     try:
         # Get all documents
-        documents = vector_store.list_documents(
-            index_name, skip=(page - 1) * limit, limit=limit
+        documents = await run_in_threadpool(
+            vector_store.list_documents,
+            index_name,
+            skip=(page - 1) * limit,
+            limit=limit,
         )
 
         # Group and filter documents
@@ -107,39 +289,12 @@ async def list_documents(
                 if not isinstance(metadata, dict):
                     metadata = {}
 
-                # Check access permissions
-                allowed_categories = metadata.get("allowed_categories", [])
-                allowed_users = metadata.get("allowed_users", [])
-
-                # Admin has access to all documents
-                is_admin = any(role.lower() == "admin" for role in current_user.roles)
-
-                # Check if user has access to any of the document's categories
-                has_category_access = False
-                if allowed_categories:
-                    has_category_access = any(
-                        cat in current_user.access_categories
-                        for cat in allowed_categories
+                if not can_access_document(current_user, metadata):
+                    logger.debug(
+                        "Access denied to %s for %s",
+                        metadata.get("filename"),
+                        current_user.username,
                     )
-                else:
-                    # If no categories are specified, default to true for admin
-                    has_category_access = is_admin
-
-                # Check if username matches
-                has_user_access = current_user.username in allowed_users
-
-                # print("Access evaluation:")
-                # print(f"- Admin access: {is_admin}")
-                # print(f"- Category match: {has_category_access}")
-                # print(f"- User match: {has_user_access}")
-
-                has_access = is_admin or has_category_access or has_user_access
-                print(f"- Final decision: {has_access}")
-
-                if has_access:
-                    print("Access granted - document included")
-                else:
-                    print("Access denied - document filtered out")
                     continue
 
                 # Create document with properly structured metadata
@@ -168,7 +323,7 @@ async def list_documents(
                     doc_groups[group_key] = []
                 doc_groups[group_key].append(document)
             except Exception as e:
-                print(f"Error processing document: {e}")
+                logger.warning("Error processing document: %s", e)
                 continue
 
         # Sort chunks within each group and add chunk info
@@ -196,7 +351,9 @@ async def list_documents(
             representative_doc["metadata"]["chunks"] = chunks
             filtered_docs.append(representative_doc)
 
-        return ListDocumentsResponse(documents=filtered_docs)
+        return model_response(ListDocumentsResponse(documents=filtered_docs))
+    except VectorStoreUnavailableError as e:
+        raise store_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
@@ -205,7 +362,11 @@ async def list_documents(
 
 @router.delete("/documents/{index_name}/{document_id}")
 async def delete_document(
-    index_name: str, document_id: str, current_user: User = Depends(get_current_user)
+    index_name: str,
+    document_id: str,
+    current_user: User = Depends(get_current_user),
+    vector_store: VectorStore = Depends(get_vector_store),
+    fingerprints: IndexFingerprints = Depends(get_index_fingerprints),
 ):
     """Delete a document from an index."""
     # Check if user is admin (case-insensitive)
@@ -216,11 +377,18 @@ async def delete_document(
         )
 
     try:
-        success = vector_store.delete_document(index_name, document_id)
+        document = await run_in_threadpool(
+            vector_store.get_document, index_name, document_id
+        )
+        success = document is not None and await run_in_threadpool(
+            vector_store.delete_document, index_name, document_id
+        )
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Document not found"
             )
+        # Its chunks must no longer suppress new ones as duplicates
+        await run_in_threadpool(fingerprints.discard, index_name, document["metadata"])
         return {"message": "Document deleted successfully"}
     except Exception as e:
         raise HTTPException(
@@ -229,43 +397,50 @@ async def delete_document(
 
 
 @router.post("/documents/{index_name}/upload")
+@traced_route("upload_document")
 async def upload_document(
     index_name: str,
     file: UploadFile = File(...),
     access: str = Form(...),
     current_user: User = Depends(get_current_user),
+    _in_flight=Depends(track_in_flight("upload")),
+    _admission=Depends(admit(ingest_pool)),
+    doc_processor: DocumentProcessor = Depends(get_document_processor),
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_client: LLMClient = Depends(get_llm_client),
+    fingerprints: IndexFingerprints = Depends(get_index_fingerprints),
 ):
     """Upload and process a document with access control."""
     # Parse and validate access data
     try:
         access_request = DocumentUploadRequest.from_json(access)
     except json.JSONDecodeError as e:
-        print(f"Error parsing access JSON: {e}")
+        logger.info("Error parsing access JSON: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid access data format: {str(e)}",
         )
     except ValueError as e:
-        print(f"Error validating access data structure: {e}")
+        logger.info("Error validating access data structure: %s", e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        print(f"Error validating access data: {e}")
+        logger.info("Error validating access data: %s", e)
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"Invalid access data: {str(e)}",
         )
 
-    # Debug logging
-    print("Upload request received:")
-    print(f"Index: {index_name}")
-    print(f"Access data: {access}")
-    print(f"File: {file.filename}")
-    print(f"Content type: {file.content_type}")
+    logger.info(
+        "Upload of %s (%s) to index %s",
+        file.filename,
+        file.content_type,
+        index_name,
+    )
+    set_span_attributes(
+        index=index_name, user=current_user.username, filename=file.filename
+    )
 
-    # Log form data
     form_data = await file.read()
-    print(f"Form data length: {len(form_data)}")
-    print(f"First 100 bytes: {form_data[:100]}")
     await file.seek(0)  # Reset file pointer for later processing
 
     # Check if user is admin (case-insensitive)
@@ -288,226 +463,226 @@ async def upload_document(
     try:
         # Read file content
         content = await file.read()
-        print(f"Read file content: {len(content)} bytes")
-        print(f"File content type: {type(content)}")
-        print(f"File content first 50 bytes: {content[:50]}")
-        print(f"File headers: {file.headers}")
-        print(f"File content_type: {file.content_type}")
-        print(f"File filename: {file.filename}")
-        print(f"File size: {file.size}")
+        logger.debug("Read %d bytes from %s", len(content), filename)
+
+        # Fingerprints of the chunks already in the index under the same ACL,
+        # so content repeated from other documents is not embedded again
+        seen = None
+        if settings.INGEST_DEDUP_CHUNKS:
+            seen = await run_in_threadpool(fingerprints.load, index_name, metadata)
 
         # Process document into chunks with metadata
         try:
-            chunks = doc_processor.process_document(content, metadata)
-            print(f"Successfully processed document into {len(chunks)} chunks")
+            with track_stage("process_document"):
+                chunks = await run_in_threadpool(
+                    doc_processor.process_document, content, metadata, seen
+                )
+            logger.info("Processed %s into %d chunks", filename, len(chunks))
+            set_span_attributes(chunks=len(chunks))
         except Exception as e:
-            print(f"Error in document processing: {type(e).__name__}: {str(e)}")
+            logger.error(
+                "Error in document processing: %s: %s", type(e).__name__, e
+            )
             raise
 
+        if not chunks:
+            return {
+                "message": "Document only repeats content already in the index",
+                "chunks": 0,
+            }
+
+        # Create the index on first upload so its embedding size is recorded
+        await run_in_threadpool(
+            vector_store.create_collection,
+            index_name,
+            embedding_dimensions=llm_client.embedding_dimensions,
+        )
+        dimensions = await run_in_threadpool(
+            vector_store.get_embedding_dimensions, index_name
+        )
+
         # Get embeddings for all chunks
         texts = [chunk["text"] for chunk in chunks]
-        embeddings = llm_client.get_embeddings(texts)
+        with track_stage("document_embedding"):
+            embeddings = await run_in_threadpool(
+                llm_client.get_embeddings, texts, dimensions=dimensions
+            )
 
         # Store in vector database
-        vector_store.add_documents(index_name, chunks, embeddings)
+        with track_stage("vector_store_add"):
+            await run_in_threadpool(
+                vector_store.add_documents, index_name, chunks, embeddings
+            )
+        if seen is not None:
+            await run_in_threadpool(
+                fingerprints.save, index_name, metadata, seen.owned_by(filename)
+            )
 
         return {
             "message": "Document uploaded and processed successfully",
             "chunks": len(chunks),
         }
+    except LLMRateLimitError as e:
+        raise rate_limited(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.post("/documents/query/handle", response_model=QueryHandleResponse)
+@traced_route("create_query_handle")
+async def create_query_handle(
+    handle_request: QueryHandleRequest,
+    current_user: User = Depends(get_current_user),
+    _in_flight=Depends(track_in_flight("query_handle")),
+    _admission=Depends(admit(query_pool)),
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_client: LLMClient = Depends(get_llm_client),
+    handles: QueryHandles = Depends(get_query_handles),
+):
+    """Embed a query ahead of searching it, returning a handle for the vectors.
+
+    Clients can call this while the user is still choosing an index, then
+    pass the handle with ``/documents/query`` against any index.
+    """
+    vectors: QueryVectors = {}
+    try:
+        with track_stage("query_embedding"):
+            await run_in_threadpool(
+                get_query_vectors,
+                vector_store,
+                llm_client,
+                handle_request.query,
+                handle_request.index_name,
+                vectors,
+            )
+        handle = await run_in_threadpool(
+            handles.create, current_user.username, handle_request.query, vectors
+        )
+    except LLMRateLimitError as e:
+        raise rate_limited(e)
+    except VectorStoreUnavailableError as e:
+        raise store_unavailable(e)
     except Exception as e:
+        logger.exception("Error embedding query: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
+    return QueryHandleResponse(
+        query_handle=handle, expires_in=settings.QUERY_HANDLE_TTL_SECONDS
+    )
 
 
 @router.post("/documents/query", response_model=QueryResponse)
+@traced_route("query_documents")
 async def query_documents(
-    query_request: QueryRequest, current_user: User = Depends(get_current_user)
+    query_request: QueryRequest,
+    current_user: User = Depends(get_current_user),
+    _in_flight=Depends(track_in_flight("query")),
+    _admission=Depends(admit(query_pool)),
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_client: LLMClient = Depends(get_llm_client),
+    selector: SourceSelector = Depends(get_source_selector),
+    handles: QueryHandles = Depends(get_query_handles),
 ):
     """Query documents using RAG across all collections or a specific collection."""
     try:
-        print(
-            f"Processing query request for index: {query_request.index_name or 'all'}"
+        logger.info("Query against index %s", query_request.index_name or "all")
+        logger.debug("Query text: %s", query_request.query)
+        set_span_attributes(
+            index=query_request.index_name or "all", user=current_user.username
         )
-        print(f"Query: {query_request.query}")
 
-        # Get query embedding
-        print("Getting query embedding...")
-        query_embedding = llm_client.get_query_embedding(query_request.query)
-        print("Query embedding obtained successfully")
-
-        try:
-            # Search vector store without filters first
-            print("Searching vector store...")
-            if query_request.index_name:
-                print(f"Searching specific index: {query_request.index_name}")
-                results = vector_store.search(query_request.index_name, query_embedding)
+        # Retrieval does not depend on the user, so it is shared by every
+        # concurrent request for the same normalized query and index
+        handle = query_request.query_handle
+        vectors = None
+        if handle:
+            vectors = await run_in_threadpool(
+                handles.get, current_user.username, handle, query_request.query
+            )
+        if vectors is None:
+            handle, vectors = None, {}
+        embedded = len(vectors)
+
+        normalized_query = normalize_query(query_request.query)
+        results = await retrieval_flight.do(
+            (normalized_query, query_request.index_name),
+            lambda: retrieve(
+                vector_store,
+                llm_client,
+                query_request.query,
+                query_request.index_name,
+                vectors,
+            ),
+        )
+        set_span_attributes(results=len(results), reused_embedding=embedded > 0)
+
+        # Keep what was embedded so searching another index reuses it
+        if len(vectors) > embedded:
+            if handle:
+                await run_in_threadpool(
+                    handles.save,
+                    current_user.username,
+                    handle,
+                    query_request.query,
+                    vectors,
+                )
             else:
-                print("Searching across all indexes")
-                results = vector_store.search_all_collections(query_embedding)
-            print(f"Found {len(results)} results from vector store")
-
-            # Parse metadata and filter by access
-            filtered_results = []
-            for result in results:
-                try:
-                    metadata = (
-                        json.loads(result["metadata"])
-                        if isinstance(result["metadata"], str)
-                        else result["metadata"]
-                    )
-
-                    # Print raw metadata for debugging
-                    print("Raw metadata:", json.dumps(metadata, indent=2))
+                handle = await run_in_threadpool(
+                    handles.create, current_user.username, query_request.query, vectors
+                )
 
-                    # Check access permissions
-                    allowed_categories = metadata.get("allowed_categories", [])
-                    allowed_users = metadata.get("allowed_users", [])
+        try:
+            sources = accessible_sources(results, current_user)
+            logger.debug("After access filtering: %d results", len(sources))
 
-                    # Admin has access to all documents
-                    is_admin = any(
-                        role.lower() == "admin" for role in current_user.roles
+            if not sources:
+                return model_response(
+                    QueryResponse(
+                        answer=NO_RESULTS_ANSWER, sources=[], query_handle=handle
                     )
-
-                    # Check if user has access to any of the document's categories
-                    has_category_access = False
-                    if allowed_categories:
-                        has_category_access = any(
-                            cat in current_user.access_categories
-                            for cat in allowed_categories
-                        )
-                    else:
-                        # If no categories are specified, default to true for admin
-                        has_category_access = is_admin
-
-                    # Check if username matches
-                    has_user_access = current_user.username in allowed_users
-
-                    has_access = is_admin or has_category_access or has_user_access
-                    print(f"- Final decision: {has_access}")
-
-                    if has_access:
-                        result["metadata"] = metadata
-                        filtered_results.append(result)
-                        print("Access granted - document included")
-                    else:
-                        print("Access denied - document filtered out")
-                except Exception as e:
-                    print(f"Error processing result metadata: {e}")
-                    continue
-
-            results = filtered_results
-            print(f"After access filtering: {len(results)} results")
-
-            if not results:
-                return QueryResponse(
-                    answer=(
-                        "No relevant documents found. This could be because:\n"
-                        "1. No documents match your query closely enough\n"
-                        "2. You don't have access to the relevant documents\n"
-                        "3. The documents haven't been properly indexed"
-                    ),
-                    sources=[],
                 )
 
         except Exception as e:
-            print(f"Error during vector store search: {type(e).__name__}: {str(e)}")
+            logger.error(
+                "Error during vector store search: %s: %s", type(e).__name__, e
+            )
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error searching documents",
             )
 
-        # Format and sort sources by relevance
-        sources = [
-            {
-                "text": r["text"],
-                "metadata": r["metadata"],
-                "relevance": r.get("relevance", 0),
-            }
-            for r in results
-        ]
-        sources.sort(key=lambda x: x["relevance"], reverse=True)
-
-        if not sources:
-            return QueryResponse(answer="No relevant documents found.", sources=[])
-
         # Generate answer using LLM with all accessible sources
-        print("Generating answer using LLM...")
-        answer = llm_client.get_completion(query_request.query, sources)
-        print("Answer generated successfully")
-
-        # If the answer indicates no relevant information, return without sources
-        if (
-            "no relevant information" in answer.lower()
-            or "do not contain information" in answer.lower()
-            or "not contain information" in answer.lower()
-        ):
-            return QueryResponse(answer=answer, sources=[])
-
-        # Extract citation numbers from the answer
-        import re
-
-        # Map superscript numbers to regular numbers
-        superscript_map = {
-            "¹": 1,
-            "²": 2,
-            "³": 3,
-            "⁴": 4,
-            "⁵": 5,
-            "⁶": 6,
-            "⁷": 7,
-            "⁸": 8,
-            "⁹": 9,
-        }
+        # The visible sources capture the user's access scope: users who can
+        # see the same sources for the same query share one completion
+        async def complete():
+            with track_stage("completion"):
+                return await run_in_threadpool(
+                    llm_client.get_completion, query_request.query, sources
+                )
 
-        # Find all superscript numbers and convert them to regular numbers
-        citations = set()
-        for match in re.findall(r"([¹²³⁴⁵⁶⁷⁸⁹])", answer):
-            if match in superscript_map:
-                citations.add(superscript_map[match])
-
-        # Filter out low relevance sources first
-        RELEVANCE_THRESHOLD = 0.85  # Higher threshold for more relevant sources
-        relevant_sources = [
-            s for s in sources if s.get("relevance", 0) >= RELEVANCE_THRESHOLD
-        ]
-
-        # Group by filename and keep only the most relevant chunk for each file
-        unique_sources = {}
-        for source in relevant_sources:
-            filename = source["metadata"].get("filename")
-            relevance = source.get("relevance", 0)
-
-            if filename in unique_sources:
-                if relevance > unique_sources[filename]["relevance"]:
-                    unique_sources[filename] = source
-            else:
-                unique_sources[filename] = source
-
-        # Convert to list and sort by relevance
-        all_sources = list(unique_sources.values())
-        all_sources.sort(key=lambda x: x.get("relevance", 0), reverse=True)
-
-        # Only include sources that were actually cited in the answer
-        cited_sources = []
-        for idx, source in enumerate(all_sources, 1):
-            if idx in citations:
-                cited_sources.append(source)
-
-        # If no citations were found but we have highly relevant sources, include the most relevant one
-        if not cited_sources and all_sources:
-            # Only include the fallback source if it's highly relevant
-            most_relevant = all_sources[0]
-            if most_relevant.get("relevance", 0) >= RELEVANCE_THRESHOLD:
-                cited_sources = [most_relevant]
-
-        return QueryResponse(answer=answer, sources=cited_sources)
+        answer = await completion_flight.do(
+            (
+                normalized_query,
+                tuple((s["metadata"].get("filename"), s["text"]) for s in sources),
+            ),
+            complete,
+        )
+
+        cited_sources = await run_in_threadpool(
+            selector.select, answer, sources, query_request.index_name
+        )
+        return model_response(
+            QueryResponse(answer=answer, sources=cited_sources, query_handle=handle)
+        )
+    except LLMRateLimitError as e:
+        raise rate_limited(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        # print(f"Error in query_documents: {type(e).__name__}: {str(e)}")
-        # print(
-        #     f"Error details: {e.__dict__ if hasattr(e, '__dict__') else 'No additional details'}"
-        # )
+        logger.exception("Error in query_documents: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
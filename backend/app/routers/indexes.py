@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict, Any
-from pydantic import RootModel
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Literal, Optional
+from pydantic import BaseModel, Field, RootModel, model_validator
 import json
 from ..core.auth import User, check_role, get_current_user
-from ..core.vector_store import VectorStore
+from ..core.config import settings
+from ..core.dependencies import get_index_fingerprints, get_vector_store
+from ..core.text_cleaning import IndexFingerprints
+from ..core.vector_store import VectorStore, build_vector_index_config
 
 router = APIRouter()
-vector_store = VectorStore()
 
 
 class IndexResponse(RootModel):
@@ -15,16 +18,89 @@ class IndexResponse(RootModel):
     root: Dict[str, Any]
 
 
+class VectorIndexProfile(BaseModel):
+    """Vector index settings for a new index.
+
+    Use "flat" for small collections, and PQ/BQ compression to cut vector
+    memory at some cost in recall.
+    """
+
+    index_type: Literal["hnsw", "flat"] = "hnsw"
+    ef: Optional[int] = Field(None, ge=-1)  # -1 lets Weaviate pick ef dynamically
+    ef_construction: Optional[int] = Field(None, ge=4)
+    max_connections: Optional[int] = Field(None, ge=4)
+    compression: Optional[Literal["pq", "bq"]] = None
+    pq_segments: Optional[int] = Field(None, ge=1)
+    pq_centroids: Optional[int] = Field(None, ge=1, le=256)
+    pq_training_limit: Optional[int] = Field(None, ge=1)
+    bq_rescore_limit: Optional[int] = Field(None, ge=1)
+    vector_cache_max_objects: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_compatible(self) -> "VectorIndexProfile":
+        build_vector_index_config(self.model_dump(exclude_none=True))
+        return self
+
+
+class CreateIndexRequest(BaseModel):
+    description: str = ""
+    vector_index: Optional[VectorIndexProfile] = None
+    # Embedding size for text-embedding-3 deployments; defaults to the
+    # AZURE_OPENAI_EMBEDDING_DIMENSIONS setting.
+    embedding_dimensions: Optional[int] = Field(None, ge=1)
+    # Minimum relevance of a cited source from this index; defaults to the
+    # RELEVANCE_THRESHOLD setting.
+    relevance_threshold: Optional[float] = Field(None, ge=0, le=1)
+
+
+def record_relevance_threshold(vector_store: VectorStore, name: str, threshold: float):
+    values = vector_store.get_collection_settings(name)
+    vector_store.set_collection_settings(
+        name, {**values, "relevance_threshold": threshold}
+    )
+
+
 @router.post("/indexes/{index_name}", status_code=status.HTTP_201_CREATED)
 async def create_index(
     index_name: str,
     description: str = "",
+    index_request: Optional[CreateIndexRequest] = None,
     current_user: User = Depends(check_role(["admin"])),
+    vector_store: VectorStore = Depends(get_vector_store),
 ):
-    """Create a new index (collection) in the vector store."""
+    """Create a new index (collection) in the vector store.
+
+    The optional JSON body may carry a description and a vector index
+    profile; the ``description`` query parameter is still accepted.
+    """
+    vector_index_config = None
+    embedding_dimensions = settings.AZURE_OPENAI_EMBEDDING_DIMENSIONS
+    relevance_threshold = None
+    if index_request is not None:
+        description = index_request.description or description
+        if index_request.vector_index is not None:
+            vector_index = index_request.vector_index
+            vector_index_config = vector_index.model_dump(exclude_none=True)
+        if index_request.embedding_dimensions is not None:
+            embedding_dimensions = index_request.embedding_dimensions
+        relevance_threshold = index_request.relevance_threshold
+
     try:
-        success = vector_store.create_collection(index_name, description)
+        success = await run_in_threadpool(
+            vector_store.create_collection,
+            index_name,
+            description,
+            vector_index_config,
+            embedding_dimensions,
+        )
         if success:
+            if relevance_threshold is not None:
+                await run_in_threadpool(
+                    record_relevance_threshold,
+                    vector_store,
+                    index_name,
+                    relevance_threshold,
+                )
             return {"message": f"Index '{index_name}' created successfully"}
         return {"message": f"Index '{index_name}' already exists"}
     except Exception as e:
@@ -35,11 +111,15 @@ async def create_index(
 
 @router.delete("/indexes/{index_name}")
 async def delete_index(
-    index_name: str, current_user: User = Depends(check_role(["admin"]))
+    index_name: str,
+    current_user: User = Depends(check_role(["admin"])),
+    vector_store: VectorStore = Depends(get_vector_store),
+    fingerprints: IndexFingerprints = Depends(get_index_fingerprints),
 ):
     """Delete an index and all its documents."""
     try:
-        success = vector_store.delete_collection(index_name)
+        success = await run_in_threadpool(vector_store.delete_collection, index_name)
+        await run_in_threadpool(fingerprints.forget, index_name)
         if success:
             return {"message": f"Index '{index_name}' deleted successfully"}
         raise HTTPException(
@@ -53,10 +133,13 @@ async def delete_index(
 
 
 @router.get("/indexes", response_model=List[str])
-async def list_indexes(current_user: User = Depends(get_current_user)):
+async def list_indexes(
+    current_user: User = Depends(get_current_user),
+    vector_store: VectorStore = Depends(get_vector_store),
+):
     """List indexes that the user has access to."""
     try:
-        all_indexes = vector_store.list_collections()
+        all_indexes = await run_in_threadpool(vector_store.list_collections)
         accessible_indexes = []
 
         # Admin can see all indexes
@@ -66,7 +149,9 @@ async def list_indexes(current_user: User = Depends(get_current_user)):
         # For non-admin users, check each index for accessible documents
         for index_name in all_indexes:
             # Get documents from the index
-            documents = vector_store.list_documents(index_name)
+            documents = await run_in_threadpool(
+                vector_store.list_documents, index_name
+            )
 
             # Check if user has access to any document in this index
             for doc in documents:
@@ -97,11 +182,13 @@ async def list_indexes(current_user: User = Depends(get_current_user)):
 
 @router.get("/indexes/{index_name}", response_model=IndexResponse)
 async def get_index_info(
-    index_name: str, current_user: User = Depends(get_current_user)
+    index_name: str,
+    current_user: User = Depends(get_current_user),
+    vector_store: VectorStore = Depends(get_vector_store),
 ):
     """Get information about a specific index."""
     try:
-        info = vector_store.get_collection_info(index_name)
+        info = await run_in_threadpool(vector_store.get_collection_info, index_name)
         if info:
             return IndexResponse(root=info)
         raise HTTPException(
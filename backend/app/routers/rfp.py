@@ -0,0 +1,171 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    UploadFile,
+    File,
+    Form,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import json
+import logging
+from typing import Dict, List, Optional
+from ..core.admission import admit, ingest_pool
+from ..core.auth import User, get_current_user
+from ..core.batch_qa import BatchJobRunner, BatchJobStore, extract_questions
+from ..core.citations import SourceSelector
+from ..core.config import settings
+from ..core.dependencies import (
+    get_document_processor,
+    get_llm_client,
+    get_source_selector,
+    get_vector_store,
+)
+from ..core.document_processor import DocumentProcessor
+from ..core.llm_client import LLMClient
+from ..core.responses import model_response
+from ..core.vector_store import VectorStore
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+runner = BatchJobRunner(
+    BatchJobStore(settings.RFP_JOBS_PATH),
+    stale_after=settings.RFP_JOB_STALE_SECONDS,
+)
+
+
+class BatchJobResponse(BaseModel):
+    id: str
+    status: str
+    index_name: Optional[str]
+    questions: List[str]
+    answers: Dict[str, Dict]
+    error: Optional[str] = None
+
+
+def job_response(job: Dict) -> BatchJobResponse:
+    status_ = "interrupted" if runner.is_interrupted(job) else job["status"]
+    return BatchJobResponse(**{**job, "status": status_})
+
+
+async def get_owned_job(
+    job_id: str, current_user: User = Depends(get_current_user)
+) -> Dict:
+    """The requested job, if it belongs to the current user."""
+    job = await run_in_threadpool(runner.get, job_id)
+    if job is None or job["owner"]["username"] != current_user.username:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    return job
+
+
+@router.post("/rfp/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    file: Optional[UploadFile] = File(None),
+    questions: Optional[str] = Form(None),
+    index_name: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user),
+    _admission=Depends(admit(ingest_pool)),
+    doc_processor: DocumentProcessor = Depends(get_document_processor),
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_client: LLMClient = Depends(get_llm_client),
+    selector: SourceSelector = Depends(get_source_selector),
+) -> BatchJobResponse:
+    """Start answering a questionnaire in the background.
+
+    Questions come from an uploaded questionnaire (PDF, Word or text), a JSON
+    list in the ``questions`` field, or both. Answers are fetched from
+    ``/rfp/jobs/{id}/stream`` as they finish.
+    """
+    question_list: List[str] = []
+    if questions:
+        try:
+            parsed = json.loads(questions)
+            if not isinstance(parsed, list) or not all(
+                isinstance(q, str) for q in parsed
+            ):
+                raise ValueError("questions must be a JSON list of strings")
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        question_list.extend(q.strip() for q in parsed if q.strip())
+
+    if file is not None:
+        content = await file.read()
+        try:
+            mime_type = doc_processor.get_mime_type(content, file.filename or "")
+            text = await run_in_threadpool(
+                doc_processor.extract_text, content, mime_type
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        question_list.extend(extract_questions(text))
+
+    if not question_list:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No questions found"
+        )
+    if len(question_list) > settings.RFP_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.RFP_MAX_QUESTIONS} questions per job",
+        )
+
+    job = await run_in_threadpool(
+        runner.store.create, current_user, question_list, index_name
+    )
+    logger.info(
+        "Batch job %s: %d questions against index %s",
+        job["id"],
+        len(question_list),
+        index_name or "all",
+    )
+    runner.start(job, vector_store, llm_client, selector)
+    return model_response(job_response(job), status.HTTP_202_ACCEPTED)
+
+
+@router.get("/rfp/jobs/{job_id}")
+async def get_job(job: Dict = Depends(get_owned_job)) -> BatchJobResponse:
+    """Job state with the answers finished so far."""
+    return model_response(job_response(job))
+
+
+@router.post("/rfp/jobs/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_job(
+    job: Dict = Depends(get_owned_job),
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_client: LLMClient = Depends(get_llm_client),
+    selector: SourceSelector = Depends(get_source_selector),
+) -> BatchJobResponse:
+    """Answer the unanswered and failed questions of a stopped job."""
+    if job["status"] == "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Job already completed"
+        )
+    if job["status"] == "running" and not runner.is_interrupted(job):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Job is still running"
+        )
+    runner.start(job, vector_store, llm_client, selector)
+    return model_response(job_response(job), status.HTTP_202_ACCEPTED)
+
+
+@router.get("/rfp/jobs/{job_id}/stream")
+async def stream_job(job: Dict = Depends(get_owned_job)):
+    """Answers as newline-delimited JSON, in the order they finish.
+
+    Answers finished before the client connected are sent first, so a client
+    that reconnects picks up where it left off. The last line carries the
+    job's final status.
+    """
+
+    async def lines():
+        async for item in runner.follow(job["id"]):
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
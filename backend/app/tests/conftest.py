@@ -1,6 +1,73 @@
+import os
+import re
+import tempfile
+
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+import tiktoken
+
+# Run the app offline: in-process vector store and the fake LLM provider
+os.environ.setdefault("VECTOR_STORE_BACKEND", "local")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("LOCAL_VECTOR_STORE_PATH", tempfile.mkdtemp(prefix="rag-tests-"))
+os.environ.setdefault("RFP_JOBS_PATH", tempfile.mkdtemp(prefix="rag-tests-jobs-"))
+
+
+class OfflineEncoding:
+    """Stand-in for ``cl100k_base``, which tiktoken downloads on first use.
+
+    Each word or punctuation mark, with the whitespace before it, is one
+    token, so counts are of the same order as the real encoding and
+    ``decode(encode(text)) == text``.
+    """
+
+    name = "offline"
+    _PIECE = re.compile(r"\s*(?:\w+|[^\w\s])|\s+")
+
+    def __init__(self):
+        self._ids = {}
+        self._pieces = []
+
+    def encode(self, text, **kwargs):
+        tokens = []
+        for piece in self._PIECE.findall(text):
+            if piece not in self._ids:
+                self._ids[piece] = len(self._pieces)
+                self._pieces.append(piece)
+            tokens.append(self._ids[piece])
+        return tokens
+
+    def decode(self, tokens):
+        return "".join(self._pieces[token] for token in tokens)
+
+
+def _load_cl100k_base():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # Not cached, and no network to download it
+        return None
+
+
+_cl100k_base = _load_cl100k_base()
+_offline_encoding = OfflineEncoding()
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    """Tokenize with the stand-in when ``cl100k_base`` cannot be loaded."""
+    if _cl100k_base is None:
+        monkeypatch.setattr(tiktoken, "get_encoding", lambda name: _offline_encoding)
+
+
+@pytest.fixture
+def cl100k_base():
+    """The real encoding; skips the test when it cannot be loaded."""
+    if _cl100k_base is None:
+        pytest.skip("cl100k_base is not cached and cannot be downloaded")
+    return _cl100k_base
+
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.main import app  # noqa: E402
 
 
 @pytest.fixture
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from app.core.admission import AdmissionPool, AdmissionRejected
+
+
+def make_pool(**overrides):
+    options = dict(max_concurrent=1, max_per_user=2, max_queue=1, queue_timeout=0.2)
+    options.update(overrides)
+    return AdmissionPool("test", **options)
+
+
+@pytest.mark.asyncio
+async def test_queued_request_gets_released_slot():
+    pool = make_pool()
+    await pool.acquire("alice")
+
+    waiter = asyncio.create_task(pool.acquire("bob"))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    pool.release("alice")
+    await asyncio.wait_for(waiter, 1)
+    assert pool.active == 1
+    pool.release("bob")
+    assert pool.active == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_and_timeout_return_503():
+    pool = make_pool()
+    await pool.acquire("alice")
+    waiter = asyncio.create_task(pool.acquire("bob"))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(AdmissionRejected) as full:
+        await pool.acquire("carol")
+    assert full.value.status_code == 503
+
+    with pytest.raises(AdmissionRejected) as timed_out:
+        await waiter
+    assert timed_out.value.status_code == 503
+    assert timed_out.value.retry_after >= 1
+
+
+@pytest.mark.asyncio
+async def test_per_user_limit_returns_429():
+    pool = make_pool(max_concurrent=5, max_per_user=1)
+    await pool.acquire("alice")
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await pool.acquire("alice")
+    assert exc_info.value.status_code == 429
+    await pool.acquire("bob")
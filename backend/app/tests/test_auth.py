@@ -1,5 +1,10 @@
+import json
+import time
+
 import pytest
 from fastapi import HTTPException
+from jose import jwt
+from app.core.config import settings
 from app.core.auth import (
     verify_password,
     get_password_hash,
@@ -8,7 +13,11 @@ from app.core.auth import (
     check_access_category,
     fake_users_db,
     DOCUMENT_CATEGORIES,
+    FileUserStore,
     User,
+    VerifiedTokenCache,
+    get_current_user,
+    token_cache,
 )
 
 
@@ -141,3 +150,69 @@ def test_fake_users_db_consistency():
         # Verify all access categories are valid
         for category in user_data["access_categories"]:
             assert category in DOCUMENT_CATEGORIES.values()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_verified_token(monkeypatch):
+    token_cache.clear()
+    token = create_access_token(
+        {"sub": "hr@demo.com", "roles": [], "access_categories": ["hr_docs"]}
+    )
+    user = await get_current_user(token)
+    assert user.username == "hr@demo.com"
+
+    # A cache hit must not decode the token again
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token decoded twice")
+
+    monkeypatch.setattr(jwt, "decode", fail_decode)
+    assert await get_current_user(token) is user
+
+
+@pytest.mark.asyncio
+async def test_token_cache_expiry_and_bound():
+    cache = VerifiedTokenCache(max_size=2)
+    user = User(username="hr@demo.com", roles=[])
+
+    cache.put("expired", time.time() - 1, user)
+    assert cache.get("expired") is None
+
+    cache.put("a", time.time() + 60, user)
+    cache.put("b", time.time() + 60, user)
+    cache.get("a")
+    cache.put("c", time.time() + 60, user)
+    assert cache.get("b") is None
+    assert cache.get("a") is user
+    assert cache.get("c") is user
+
+
+def test_file_user_store_loads_on_demand(tmp_path):
+    users_file = tmp_path / "users.json"
+    users_file.write_text(
+        json.dumps(
+            {
+                "jane@example.com": {
+                    "hashed_password": get_password_hash("secret"),
+                    "access_categories": [DOCUMENT_CATEGORIES["SAFETY"]],
+                }
+            }
+        )
+    )
+    store = FileUserStore(str(users_file))
+    user = store.get_user("jane@example.com")
+    assert verify_password("secret", user["hashed_password"])
+    assert user["roles"] == [] and user["disabled"] is False
+    assert store.get_user("nobody@example.com") is None
+    assert store.list_usernames() == ["jane@example.com"]
+
+
+def test_login_with_demo_user(client):
+    response = client.post(
+        "/api/auth/token",
+        data={"username": "hr@demo.com", "password": settings.USER_PASSWORD},
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["username"] == "hr@demo.com"
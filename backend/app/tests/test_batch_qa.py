@@ -0,0 +1,208 @@
+import asyncio
+import json
+
+import pytest
+from app.core.auth import User
+from app.core.batch_qa import (
+    BatchJobRunner,
+    BatchJobStore,
+    extract_questions,
+)
+from app.core.config import settings
+from app.core.llm_client import LLMClient
+from app.core.llm_providers import FakeLLMProvider, LLMRateLimitError
+from app.core.local_vector_store import LocalVectorStore
+
+
+def test_extract_questions_strips_numbering_and_joins_wrapped_items():
+    text = """Section 2: Security
+
+    1. Do you encrypt data
+       at rest?
+    2) Describe your backup policy.
+    Q3: Who has admin access?
+    Intro text that is not a question.
+    Is SSO supported?
+    """
+    assert extract_questions(text) == [
+        "Do you encrypt data at rest?",
+        "Describe your backup policy.",
+        "Who has admin access?",
+        "Is SSO supported?",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_job_answers_questions_with_one_embedding_batch(tmp_path, monkeypatch):
+    vector_store = LocalVectorStore(str(tmp_path / "vectors"))
+    llm_client = LLMClient(FakeLLMProvider(embedding_dimensions=64))
+    vector_store.create_collection("Policies", embedding_dimensions=64)
+    docs = [
+        ("Backups run nightly and are kept for 30 days.", ["it"]),
+        ("Data at rest is encrypted with AES-256.", ["it"]),
+        ("Salaries are reviewed every April.", ["hr"]),
+    ]
+    vector_store.add_documents(
+        "Policies",
+        [
+            {
+                "text": text,
+                "metadata": {"filename": f"doc{i}.txt", "allowed_categories": cats},
+            }
+            for i, (text, cats) in enumerate(docs)
+        ],
+        llm_client.get_embeddings([text for text, _ in docs], dimensions=64),
+    )
+
+    embed_calls = []
+    get_embeddings = llm_client.get_embeddings
+    monkeypatch.setattr(
+        llm_client,
+        "get_embeddings",
+        lambda texts, dimensions=None: embed_calls.append(texts)
+        or get_embeddings(texts, dimensions),
+    )
+
+    runner = BatchJobRunner(BatchJobStore(str(tmp_path / "jobs")))
+    user = User(username="alice", roles=["user"], access_categories=["it"])
+    questions = [
+        "How often do backups run?",
+        "Is data encrypted at rest?",
+        "how often do backups run?",
+    ]
+    job = runner.store.create(user, questions, "Policies")
+    runner.start(job, vector_store, llm_client)
+
+    streamed = [item async for item in runner.follow(job["id"], poll_interval=0.05)]
+    assert streamed[-1] == {"status": "completed", "error": None}
+    answers = {item["index"]: item for item in streamed[:-1]}
+    assert sorted(answers) == [0, 1, 2]
+
+    # Identical questions are embedded once, in a single batch
+    assert embed_calls == [questions[:2]]
+    assert answers[2]["answer"] == answers[0]["answer"]
+    # Sources the user cannot see are never used
+    for item in answers.values():
+        assert all(s["metadata"]["filename"] != "doc2.txt" for s in item["sources"])
+
+    # State survives the runner, so a reconnecting client gets every answer
+    saved = BatchJobStore(str(tmp_path / "jobs")).get(job["id"])
+    assert saved["status"] == "completed"
+    assert len(saved["answers"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_questions_mark_the_job_partial_and_are_resumed(tmp_path):
+    vector_store = LocalVectorStore(str(tmp_path / "vectors"))
+    llm_client = LLMClient(FakeLLMProvider(embedding_dimensions=32))
+    vector_store.add_documents(
+        "Policies",
+        [
+            {
+                "text": "Backups run nightly.",
+                "metadata": {"filename": "it.txt", "allowed_users": ["alice"]},
+            }
+        ],
+        llm_client.get_embeddings(["Backups run nightly."], dimensions=32),
+    )
+    get_completion = llm_client.get_completion
+
+    def flaky_completion(question, sources):
+        if "SSO" in question:
+            raise RuntimeError("provider error")
+        return get_completion(question, sources)
+
+    llm_client.get_completion = flaky_completion
+    runner = BatchJobRunner(BatchJobStore(str(tmp_path / "jobs")))
+    user = User(username="alice", roles=["user"], access_categories=[])
+    questions = ["How often do backups run?", "Is SSO supported?"]
+    job = runner.store.create(user, questions, "Policies")
+    runner.start(job, vector_store, llm_client)
+
+    streamed = [item async for item in runner.follow(job["id"], poll_interval=0.05)]
+    assert streamed[-1] == {"status": "partial", "error": "1 of 2 questions failed"}
+    assert {item["index"]: "error" in item for item in streamed[:-1]} == {
+        0: False,
+        1: True,
+    }
+
+    # Resuming asks only the failed question again
+    llm_client.get_completion = get_completion
+    job = runner.store.get(job["id"])
+    runner.start(job, vector_store, llm_client)
+    streamed = [item async for item in runner.follow(job["id"], poll_interval=0.05)]
+    assert streamed[-1] == {"status": "completed", "error": None}
+    saved = runner.store.get(job["id"])
+    assert all("error" not in result for result in saved["answers"].values())
+    assert [item["index"] for item in streamed[:-1]] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_job_waiting_out_a_rate_limit_is_not_judged_interrupted(tmp_path):
+    vector_store = LocalVectorStore(str(tmp_path / "vectors"))
+    llm_client = LLMClient(FakeLLMProvider(embedding_dimensions=32))
+    vector_store.add_documents(
+        "Policies",
+        [
+            {
+                "text": "Backups run nightly.",
+                "metadata": {"filename": "it.txt", "allowed_users": ["alice"]},
+            }
+        ],
+        llm_client.get_embeddings(["Backups run nightly."], dimensions=32),
+    )
+    get_completion = llm_client.get_completion
+    calls = []
+
+    def rate_limited_completion(question, sources):
+        calls.append(question)
+        if len(calls) == 1:
+            raise LLMRateLimitError("slow down", retry_after=0.6)
+        return get_completion(question, sources)
+
+    llm_client.get_completion = rate_limited_completion
+    store = BatchJobStore(str(tmp_path / "jobs"))
+    runner = BatchJobRunner(store, save_interval=0.05, stale_after=0.3)
+    user = User(username="alice", roles=["user"], access_categories=[])
+    job = store.create(user, ["How often do backups run?"], "Policies")
+    runner.start(job, vector_store, llm_client)
+
+    # Another worker sees a running job, saved recently despite the backoff
+    await asyncio.sleep(0.45)
+    other_worker = BatchJobRunner(store, stale_after=0.3)
+    saved = store.get(job["id"])
+    assert saved["status"] == "running" and saved["answers"] == {}
+    assert not other_worker.is_interrupted(saved)
+
+    streamed = [item async for item in runner.follow(job["id"], poll_interval=0.05)]
+    assert streamed[-1] == {"status": "completed", "error": None}
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_following_a_missing_job_ends_with_an_error(tmp_path):
+    runner = BatchJobRunner(BatchJobStore(str(tmp_path / "jobs")))
+
+    streamed = [item async for item in runner.follow("0" * 32)]
+    assert streamed == [{"status": "failed", "error": "Batch job not found"}]
+
+
+def test_job_routes_return_the_same_job_shape(client):
+    token = client.post(
+        "/api/auth/token",
+        data={"username": "admin@demo.com", "password": settings.USER_PASSWORD},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    created = client.post(
+        "/api/rfp/jobs",
+        data={"questions": json.dumps(["Is SSO supported?"])},
+        headers=headers,
+    )
+    assert created.status_code == 202
+    job = created.json()
+    assert job["questions"] == ["Is SSO supported?"]
+
+    fetched = client.get(f"/api/rfp/jobs/{job['id']}", headers=headers)
+    assert fetched.status_code == 200
+    assert set(fetched.json()) == set(job)
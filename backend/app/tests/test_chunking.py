@@ -0,0 +1,42 @@
+import pytest
+
+from app.core.document_processor import DocumentProcessor
+from app.core.llm_client import LLMClient
+from app.core.llm_providers import FakeLLMProvider
+from benchmarks.chunking import Embedder, evaluate, synthetic_corpus
+
+
+def test_chunk_size_and_overlap_are_configurable():
+    processor = DocumentProcessor(chunk_size=100, chunk_overlap=20)
+    tokens = processor.tokenizer.encode("word " * 1000)
+    chunks = processor.create_chunks("word " * 1000)
+    # Each chunk after the first starts 80 tokens after the previous one
+    assert len(chunks) == -(-len(tokens) // 80)
+
+    with pytest.raises(ValueError):
+        DocumentProcessor(chunk_size=100, chunk_overlap=100)
+
+
+def test_chunks_are_measured_in_cl100k_base_tokens(cl100k_base):
+    processor = DocumentProcessor(chunk_size=50, chunk_overlap=10)
+    assert processor.tokenizer.name == "cl100k_base"
+    text = "Replace the impeller seal every 2,000 operating hours. " * 40
+    chunks = processor.create_chunks(text)
+    assert all(len(cl100k_base.encode(chunk)) <= 50 for chunk in chunks)
+    assert chunks[0] == cl100k_base.decode(cl100k_base.encode(text)[:50])
+
+
+def test_evaluate_reports_quality_and_cost():
+    corpus, questions = synthetic_corpus(documents=3, pages=2, questions=10, seed=1)
+    embedder = Embedder(LLMClient(FakeLLMProvider(embedding_dimensions=256)))
+    question_vectors = embedder.embed([q["question"] for q in questions])
+
+    small = evaluate(corpus, questions, question_vectors, embedder, 100, 0)
+    large = evaluate(corpus, questions, question_vectors, embedder, 400, 0)
+
+    assert small["chunks"] > large["chunks"]
+    assert small["prompt_tokens"]["mean"] < large["prompt_tokens"]["mean"]
+    for result in (small, large):
+        assert 0 <= result["recall"]["@1"] <= result["recall"]["@5"] <= 1
+        assert 0 <= result["mrr"] <= 1
+        assert result["index_bytes"] > result["chunks"] * 256 * 4
@@ -0,0 +1,67 @@
+from app.core.citations import SourceSelector, parse_citations
+
+
+def source(filename, relevance, chunk=0, collection=None):
+    result = {
+        "text": f"{filename} chunk {chunk}",
+        "metadata": {"filename": filename, "chunk_index": chunk},
+        "relevance": relevance,
+    }
+    if collection:
+        result["collection"] = collection
+    return result
+
+
+def filenames(sources):
+    return [s["metadata"]["filename"] for s in sources]
+
+
+def test_parse_citations_above_nine():
+    assert parse_citations("See ¹⁰ and ¹².", 12) == {10, 12}
+    # With only five contexts "¹²" can only be two adjacent citations
+    assert parse_citations("See ¹².", 5) == {1, 2}
+    assert parse_citations("Nothing cited.", 5) == set()
+
+
+def test_citations_follow_document_order_and_keep_best_chunk():
+    sources = [
+        source("a.pdf", 0.90),
+        source("b.pdf", 0.95),
+        source("a.pdf", 0.97, chunk=1),
+        source("c.pdf", 0.99),
+    ]
+    # Documents are numbered by first appearance: a=1, b=2, c=3
+    cited = SourceSelector().select("Answer¹ and more³.", sources)
+    assert filenames(cited) == ["c.pdf", "a.pdf"]
+    assert cited[1]["metadata"]["chunk_index"] == 1
+
+
+def test_more_than_nine_documents():
+    sources = [source(f"{n}.txt", 0.9) for n in range(1, 13)]
+    cited = SourceSelector().select("The key fact¹².", sources)
+    assert filenames(cited) == ["12.txt"]
+
+
+def test_per_index_thresholds():
+    thresholds = {"strict": 0.95, "loose": 0.5}
+    selector = SourceSelector(0.85, thresholds=thresholds.get)
+    sources = [
+        source("a.pdf", 0.9, collection="strict"),
+        source("b.pdf", 0.6, collection="loose"),
+        source("c.pdf", 0.6, collection="other"),
+    ]
+    cited = selector.select("One¹, two² and three³.", sources)
+    assert filenames(cited) == ["b.pdf"]
+    # Sources without a collection use the one that was searched
+    cited = selector.select("One¹.", [source("d.pdf", 0.6)], collection="loose")
+    assert filenames(cited) == ["d.pdf"]
+
+
+def test_fallback_cap_and_no_information():
+    sources = [source("a.pdf", 0.9), source("b.pdf", 0.95), source("c.pdf", 0.5)]
+    selector = SourceSelector()
+    # Nothing relevant cited: the best file above the threshold
+    assert filenames(selector.select("Uncited answer.", sources)) == ["b.pdf"]
+    assert filenames(selector.select("Weak³.", sources)) == ["b.pdf"]
+    assert len(SourceSelector(max_sources=1).select("Both¹².", sources)) == 1
+    assert selector.select("The contexts do not contain information.", sources) == []
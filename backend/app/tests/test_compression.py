@@ -0,0 +1,69 @@
+import gzip
+
+import brotli
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+PAYLOAD = {"documents": [{"text": "pump maintenance " * 20}] * 20}
+
+
+def make_client():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large():
+        return PAYLOAD
+
+    @app.get("/small")
+    async def small():
+        return {"status": "healthy"}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for number in range(3):
+                yield b"x" * 600 + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br", ["br", "gzip"]) == "br"
+    assert choose_encoding("br;q=0.5, gzip", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("gzip;q=0, identity", ["br", "gzip"]) is None
+    assert choose_encoding("*", ["gzip"]) == "gzip"
+    assert choose_encoding("", ["br", "gzip"]) is None
+
+
+def test_large_responses_are_compressed():
+    client = make_client()
+    # httpx decodes gzip itself; read the raw bytes to check the encoding
+    with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as r:
+        body = b"".join(r.iter_raw())
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert int(r.headers["content-length"]) == len(body)
+    assert gzip.decompress(body).startswith(b'{"documents":')
+
+    with client.stream("GET", "/large", headers={"Accept-Encoding": "br"}) as r:
+        body = b"".join(r.iter_raw())
+    assert r.headers["content-encoding"] == "br"
+    assert brotli.decompress(body).startswith(b'{"documents":')
+
+
+def test_small_and_streaming_responses_are_not_compressed():
+    client = make_client()
+    headers = {"Accept-Encoding": "gzip, br"}
+    response = client.get("/small", headers=headers)
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"status": "healthy"}
+
+    response = client.get("/stream", headers=headers)
+    assert "content-encoding" not in response.headers
+    assert len(response.text.splitlines()) == 3
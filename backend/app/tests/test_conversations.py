@@ -0,0 +1,149 @@
+import threading
+
+from app.core.config import settings
+from app.core.conversations import ConversationStore, count_tokens
+from app.core.dependencies import ServiceContainer
+from app.core.llm_client import LLMClient
+from app.core.llm_providers import FakeLLMProvider
+from app.core.shared_cache import MemoryCache, SQLiteCache
+
+
+def test_history_stays_within_budget_as_turns_are_folded():
+    llm_client = LLMClient(FakeLLMProvider(embedding_dimensions=64))
+    store = ConversationStore(
+        MemoryCache(), history_token_budget=200, summary_max_tokens=40
+    )
+    session = store.new_session()
+
+    history_sizes = []
+    for i in range(60):
+        session = store.add_turn(
+            "alice",
+            session,
+            f"What is the service interval for pump model {i}?",
+            f"Pump {i} is serviced every {i + 1} months.¹\n\nCitation\n1. pumps.pdf",
+        )
+        if store.needs_summary(session):
+            store.summarize("alice", session["id"], llm_client)
+            session = store.get("alice", session["id"])
+        history_sizes.append(count_tokens(store.history(session)))
+
+    # Older turns live on in the summary; the citation list is not kept
+    assert session["summary"]
+    assert len(session["turns"]) < 60
+    assert "Citation" not in store.history(session)
+    assert session["turns"][-1]["user"].endswith("pump model 59?")
+    # The history stops growing once older turns are being folded
+    assert max(history_sizes[30:]) <= max(history_sizes[:30]) < 2 * 200
+
+
+def test_concurrent_turns_and_summaries_keep_every_turn():
+    llm_client = LLMClient(FakeLLMProvider(embedding_dimensions=64))
+    store = ConversationStore(MemoryCache(), history_token_budget=15)
+    session = store.new_session()
+    store.save("alice", session)
+
+    # Two requests loaded the same copy of the session
+    store.add_turn("alice", session, "First question?", "First answer.")
+    session = store.add_turn("alice", session, "Second question?", "Second answer.")
+    assert [turn["user"] for turn in session["turns"]] == [
+        "First question?",
+        "Second question?",
+    ]
+
+    # A turn added while the summary is being written is kept
+    summarize_conversation = llm_client.summarize_conversation
+
+    def slow_summary(*args, **kwargs):
+        store.add_turn("alice", session, "Third question?", "Third answer.")
+        return summarize_conversation(*args, **kwargs)
+
+    llm_client.summarize_conversation = slow_summary
+    store.summarize("alice", session["id"], llm_client)
+    saved = store.get("alice", session["id"])
+    assert saved["summary"]
+    assert [turn["user"] for turn in saved["turns"]] == [
+        "Second question?",
+        "Third question?",
+    ]
+
+
+def test_workers_sharing_a_sqlite_store_keep_every_turn(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    # One store per worker process, each with its own connections
+    workers = [ConversationStore(SQLiteCache(path)) for _ in range(2)]
+    session = workers[0].new_session()
+    workers[0].save("alice", session)
+
+    def ask(worker: ConversationStore, name: str):
+        for i in range(10):
+            worker.add_turn("alice", session, f"{name} question {i}?", "Answer.")
+
+    threads = [
+        threading.Thread(target=ask, args=(workers[n % 2], f"T{n}")) for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    saved = workers[1].get("alice", session["id"])
+    assert sorted(turn["user"] for turn in saved["turns"]) == sorted(
+        f"T{n} question {i}?" for n in range(4) for i in range(10)
+    )
+
+
+def test_sessions_are_not_evicted_by_cached_embeddings():
+    services = ServiceContainer()
+    store = services.conversations
+    session = store.new_session()
+    store.save("alice", session)
+
+    for i in range(services.cache.max_entries + 1):
+        services.cache.set("embedding", str(i), [0.0])
+    assert store.get("alice", session["id"]) == session
+    services.close()
+
+
+def test_sessions_are_per_user():
+    store = ConversationStore(MemoryCache())
+    session = store.new_session()
+    store.save("alice", session)
+    assert store.get("alice", session["id"]) == session
+    assert store.get("bob", session["id"]) is None
+    store.delete("alice", session["id"])
+    assert store.get("alice", session["id"]) is None
+
+
+def test_follow_up_is_answered_with_history(client):
+    token = client.post(
+        "/api/auth/token",
+        data={"username": "admin@demo.com", "password": settings.USER_PASSWORD},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.post("/api/chat", json={"message": "Hello there"}, headers=headers)
+    assert first.status_code == 200
+    session_id = first.json()["session_id"]
+
+    follow_up = client.post(
+        "/api/chat",
+        json={"message": "And after that?", "session_id": session_id},
+        headers=headers,
+    )
+    assert follow_up.status_code == 200
+    assert follow_up.json()["session_id"] == session_id
+
+    session = client.get(f"/api/chat/{session_id}", headers=headers).json()
+    assert [turn["user"] for turn in session["turns"]] == [
+        "Hello there",
+        "And after that?",
+    ]
+    assert (
+        client.post(
+            "/api/chat",
+            json={"message": "Hi", "session_id": "unknown"},
+            headers=headers,
+        ).status_code
+        == 404
+    )
@@ -0,0 +1,15 @@
+from app.core.dependencies import ServiceContainer
+from app.core.local_vector_store import LocalVectorStore
+
+
+def test_services_are_created_lazily_and_closed():
+    services = ServiceContainer()
+    assert services._vector_store is None and services._llm_client is None
+
+    vector_store = services.vector_store
+    assert isinstance(vector_store, LocalVectorStore)
+    assert services.vector_store is vector_store
+
+    services.close()
+    assert services._vector_store is None
+
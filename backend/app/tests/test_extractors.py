@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from app.core.document_processor import DocumentProcessor
+from app.core.extractors import (
+    PDF_EXTRACTORS,
+    extract_pdf_parallel,
+    resolve_extractors,
+)
+from benchmarks.corpus import build_docx, build_pdf
+
+PAGES = [
+    [f"Page {page} line {line} pump valve." for line in range(3)] for page in range(4)
+]
+
+
+def test_unknown_and_missing_extractors_are_rejected():
+    with pytest.raises(ValueError):
+        resolve_extractors("pypdf2,acrobat", PDF_EXTRACTORS)
+    names = [e.name for e in resolve_extractors("pypdf2", PDF_EXTRACTORS)]
+    assert names == ["pypdf2"]
+
+
+def test_falls_back_when_preferred_extractor_fails(monkeypatch):
+    processor = DocumentProcessor(pdf_extractors="pypdf2,pypdf2")
+    first = processor.pdf_extractors[0]
+    monkeypatch.setattr(
+        first, "extract", lambda content: (_ for _ in ()).throw(ValueError("bad"))
+    )
+    text = processor.extract_text(build_pdf(PAGES), "application/pdf")
+    assert "Page 3 line 2 pump valve." in text
+
+    docx_text = processor.extract_text(
+        build_docx(PAGES),
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    )
+    assert "Page 0 line 0 pump valve." in docx_text
+
+
+def test_parallel_extraction_keeps_page_order():
+    extractor = resolve_extractors("pypdf2", PDF_EXTRACTORS)[0]
+    content = build_pdf(PAGES)
+    with ProcessPoolExecutor(2) as executor:
+        text = extract_pdf_parallel(extractor, content, executor, 2, min_pages=2)
+    assert text.split() == extractor.extract(content).split()
+    assert text.index("Page 0") < text.index("Page 3")
+
+
+def test_pdfium_extracts_from_concurrent_threads():
+    extractor = PDF_EXTRACTORS["pypdfium2"]
+    if not extractor.available():
+        pytest.skip("pypdfium2 is not installed")
+    content = build_pdf(PAGES)
+    expected = extractor().extract(content)
+    with ThreadPoolExecutor(8) as executor:
+        texts = list(executor.map(lambda _: extractor().extract(content), range(32)))
+    assert texts == [expected] * 32
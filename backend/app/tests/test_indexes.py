@@ -0,0 +1,53 @@
+from app.core.config import settings
+from app.core.dependencies import container
+
+
+def auth_headers(client, username="admin@demo.com"):
+    token = client.post(
+        "/api/auth/token",
+        data={"username": username, "password": settings.USER_PASSWORD},
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_create_index_with_profile(client):
+    headers = auth_headers(client)
+    response = client.post(
+        "/api/indexes/Profiled",
+        json={
+            "description": "Manuals",
+            "vector_index": {"index_type": "flat"},
+            "embedding_dimensions": 64,
+            "relevance_threshold": 0.7,
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201
+
+    vector_store = container.vector_store
+    assert vector_store.get_embedding_dimensions("Profiled") == 64
+    recorded = vector_store.get_collection_settings("Profiled")
+    assert recorded["relevance_threshold"] == 0.7
+    assert vector_store.get_collection_info("Profiled")["description"] == "Manuals"
+
+
+def test_create_index_validates_body_and_role(client):
+    headers = auth_headers(client)
+    invalid = client.post(
+        "/api/indexes/Invalid",
+        json={"relevance_threshold": 1.5},
+        headers=headers,
+    )
+    assert invalid.status_code == 422
+
+    # The description may still be given as a query parameter, without a body
+    plain = client.post("/api/indexes/Plain?description=Policies", headers=headers)
+    assert plain.status_code == 201
+    assert container.vector_store.get_collection_info("Plain")["description"] == (
+        "Policies"
+    )
+
+    forbidden = client.post(
+        "/api/indexes/NotAllowed", headers=auth_headers(client, "hr@demo.com")
+    )
+    assert forbidden.status_code == 403
@@ -0,0 +1,51 @@
+import time
+
+import numpy as np
+import pytest
+from app.core.llm_client import LLMClient
+from app.core.llm_providers import FakeLLMProvider, LLMRateLimitError
+
+
+def test_fake_embeddings_are_deterministic_and_sized():
+    client = LLMClient(FakeLLMProvider(embedding_dimensions=64))
+
+    first = client.get_embeddings(["pump maintenance", "payroll policy"])
+    second = client.get_embeddings(["pump maintenance", "payroll policy"])
+    assert first == second
+    assert len(first[0]) == 64
+    assert np.linalg.norm(first[0]) == pytest.approx(1.0, rel=1e-5)
+
+    assert len(client.get_query_embedding("pump", dimensions=256)) == 256
+
+
+def test_fake_embeddings_reflect_shared_words():
+    provider = FakeLLMProvider(embedding_dimensions=256)
+    query = np.array(provider.embed_text("how to service the pump", 256))
+    related = np.array(provider.embed_text("pump service schedule", 256))
+    unrelated = np.array(provider.embed_text("annual leave policy", 256))
+    assert query @ related > query @ unrelated
+
+
+def test_fake_completion_uses_template():
+    provider = FakeLLMProvider(completion_template="{question} | {sources}")
+    client = LLMClient(provider)
+    context = [
+        {"text": "Check oil weekly.", "metadata": {"filename": "pump.pdf"}},
+        {"text": "Wear gloves.", "metadata": {"filename": "safety.pdf"}},
+    ]
+    answer = client.get_completion("How often is oil checked?", context)
+    assert answer == "How often is oil checked? | pump.pdf, safety.pdf"
+
+
+def test_fake_latency_and_rate_limit():
+    provider = FakeLLMProvider(
+        embedding_dimensions=8, embedding_latency_ms=20, requests_per_minute=2
+    )
+    start = time.perf_counter()
+    provider.embed("model", ["a"])
+    assert time.perf_counter() - start >= 0.02
+
+    provider.embed("model", ["b"])
+    with pytest.raises(LLMRateLimitError) as exc_info:
+        provider.embed("model", ["c"])
+    assert 0 < exc_info.value.retry_after <= 60
@@ -0,0 +1,215 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+from app.core.local_vector_store import LocalVectorStore, matches_filter
+
+
+def make_doc(text, filename="manual.pdf", **metadata):
+    return {"text": text, "metadata": {"filename": filename, **metadata}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalVectorStore(str(tmp_path))
+
+
+def test_create_and_list_collections(store):
+    assert store.create_collection("Manuals", "Operating manuals", None, 3)
+    assert not store.create_collection("Manuals")
+    assert store.list_collections() == ["Manuals"]
+    assert store.get_embedding_dimensions("Manuals") == 3
+    assert store.get_collection_info("Manuals")["description"] == "Operating manuals"
+
+
+def test_invalid_collection_name(store):
+    with pytest.raises(ValueError):
+        store.create_collection("../etc")
+
+
+def test_search_returns_top_k_by_cosine(store):
+    store.create_collection("Manuals")
+    store.add_documents(
+        "Manuals",
+        [make_doc("pump"), make_doc("valve"), make_doc("boiler")],
+        [[1, 0, 0], [0, 1, 0], [0.9, 0.1, 0]],
+    )
+
+    results = store.search("Manuals", [1, 0, 0], limit=2)
+    assert [r["text"] for r in results] == ["pump", "boiler"]
+    assert results[0]["relevance"] == pytest.approx(1.0)
+    assert results[0]["metadata"]["filename"] == "manual.pdf"
+
+
+def test_search_applies_metadata_filters(store):
+    store.add_documents(
+        "Manuals",
+        [
+            make_doc("pump", allowed_categories=["operations"]),
+            make_doc("payroll", "hr.pdf", allowed_categories=["hr_docs"]),
+        ],
+        [[1, 0], [1, 0]],
+    )
+
+    where = {
+        "path": ["metadata", "allowed_categories"],
+        "operator": "ContainsAny",
+        "valueTextArray": ["hr_docs"],
+    }
+    results = store.search("Manuals", [1, 0], filters=where)
+    assert [r["text"] for r in results] == ["payroll"]
+
+
+def test_duplicates_are_skipped(store):
+    store.add_documents("Manuals", [make_doc("pump")], [[1, 0]])
+    assert store.add_documents("Manuals", [make_doc("pump")], [[1, 0]]) == []
+    assert len(store.list_documents("Manuals")) == 1
+
+
+def test_persistence_and_delete(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    ids = store.add_documents(
+        "Manuals", [make_doc("pump"), make_doc("valve")], [[1, 0], [0, 1]]
+    )
+
+    reloaded = LocalVectorStore(str(tmp_path))
+    assert isinstance(reloaded._get("Manuals").vectors, np.memmap)
+    assert [d["text"] for d in reloaded.iter_documents("Manuals")] == ["pump", "valve"]
+
+    document = reloaded.get_document("Manuals", ids[0])
+    assert document["text"] == "pump"
+    assert document["metadata"]["filename"] == "manual.pdf"
+
+    assert reloaded.delete_document("Manuals", ids[0])
+    assert not reloaded.document_exists("Manuals", ids[0])
+    assert reloaded.get_document("Manuals", ids[0]) is None
+    assert [r["text"] for r in reloaded.search("Manuals", [1, 0])] == ["valve"]
+    assert reloaded.delete_collection("Manuals")
+    assert reloaded.list_collections() == []
+
+
+def test_matches_filter_operators():
+    metadata = {"filename": "a.pdf", "size": 10, "tags": ["x", "y"]}
+    assert matches_filter(
+        {
+            "operator": "And",
+            "operands": [
+                {"path": ["filename"], "operator": "Like", "valueText": "*.pdf"},
+                {"path": ["size"], "operator": "GreaterThan", "valueInt": 5},
+            ],
+        },
+        "id",
+        "text",
+        metadata,
+    )
+    assert not matches_filter(
+        {"path": ["tags"], "operator": "ContainsAll", "valueTextArray": ["x", "z"]},
+        "id",
+        "text",
+        metadata,
+    )
+
+
+def test_document_metadata_is_stored_once(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    owner = {"owner": "admin@demo.com", "allowed_users": ["hr@demo.com"]}
+    store.add_documents(
+        "Manuals",
+        [make_doc(f"chunk {i}", chunk_index=i, **owner) for i in range(3)],
+        [[1, 0], [0, 1], [1, 1]],
+    )
+
+    objects = (tmp_path / "Manuals" / "objects.jsonl").read_text().splitlines()
+    assert all("metadata" not in json.loads(line) for line in objects)
+    documents = (tmp_path / "Manuals" / "documents.jsonl").read_text().splitlines()
+    assert len(documents) == 1
+
+    reloaded = LocalVectorStore(str(tmp_path))
+    result = reloaded.search("Manuals", [0, 1], limit=1)[0]
+    assert result["metadata"]["chunk_index"] == 1
+    assert result["metadata"]["allowed_users"] == ["hr@demo.com"]
+
+
+
+def test_same_filename_with_other_acl_keeps_its_own_record(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    hr = {"owner": "admin@demo.com", "allowed_users": ["hr@demo.com"]}
+    private = {"owner": "admin@demo.com", "allowed_users": []}
+    store.add_documents("Manuals", [make_doc("pump", **hr)], [[1, 0]])
+    # Same file and text under another ACL is not a duplicate of the first
+    ids = store.add_documents("Manuals", [make_doc("pump", **private)], [[1, 0]])
+    assert len(ids) == 1
+
+    reloaded = LocalVectorStore(str(tmp_path))
+    users = sorted(
+        str(d["metadata"]["allowed_users"]) for d in reloaded.iter_documents("Manuals")
+    )
+    assert users == ["['hr@demo.com']", "[]"]
+
+    # The record goes with its last chunk
+    assert reloaded.delete_document("Manuals", ids[0])
+    documents = (tmp_path / "Manuals" / "documents.jsonl").read_text().splitlines()
+    assert [json.loads(line)["metadata"]["allowed_users"] for line in documents] == [
+        ["hr@demo.com"]
+    ]
+
+def test_adds_append_to_preallocated_vectors(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(600, 4)).astype(np.float32)
+    for start in range(0, 600, 100):
+        store.add_documents(
+            "Manuals",
+            [make_doc(f"chunk {n}", chunk_index=n) for n in range(start, start + 100)],
+            vectors[start : start + 100],
+        )
+
+    # Capacity doubles when full rather than growing on every add
+    capacity = np.load(tmp_path / "Manuals" / "vectors.npy", mmap_mode="r").shape[0]
+    assert capacity == 1024
+    assert store.get_collection_info("Manuals")["objectCount"] == 600
+
+    # Unused rows past the objects are ignored on load
+    reloaded = LocalVectorStore(str(tmp_path))
+    assert reloaded.search("Manuals", vectors[450], limit=1)[0]["text"] == "chunk 450"
+    stored = next(reloaded.iter_documents("Manuals", include_vectors=True))
+    expected = vectors[0] / np.linalg.norm(vectors[0])
+    assert np.allclose(stored["vector"], expected, atol=1e-6)
+
+
+def test_searches_running_during_deletes_pair_rows_correctly(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    size = 64
+    ids = store.add_documents(
+        "Manuals",
+        [make_doc(f"doc {n}") for n in range(size)],
+        np.eye(size).tolist(),
+    )
+    errors = []
+    done = threading.Event()
+
+    def search():
+        try:
+            while not done.is_set():
+                for n in range(0, size, 7):
+                    for result in store.search("Manuals", np.eye(size)[n], limit=3):
+                        # Only the row stored with this vector scores 1.0
+                        if result["relevance"] > 0.99:
+                            assert result["text"] == f"doc {n}"
+        except Exception as e:  # Reported by the main thread
+            errors.append(e)
+
+    searchers = [threading.Thread(target=search) for _ in range(4)]
+    for thread in searchers:
+        thread.start()
+    for chunk_id in ids[: size - 1]:
+        store.delete_document("Manuals", chunk_id)
+    done.set()
+    for thread in searchers:
+        thread.join()
+
+    assert errors == []
+    assert [r["text"] for r in store.search("Manuals", np.eye(size)[-1])] == [
+        f"doc {size - 1}"
+    ]
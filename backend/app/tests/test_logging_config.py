@@ -0,0 +1,77 @@
+import json
+import logging
+import sys
+
+import pytest
+
+from app.core.logging_config import (
+    JsonFormatter,
+    RequestIdFilter,
+    configure_logging,
+    parse_levels,
+    request_id_var,
+    shutdown_logging,
+)
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def make_record(message="hello", exc_info=None):
+    return logging.LogRecord(
+        "app.test", logging.WARNING, __file__, 1, message, None, exc_info
+    )
+
+
+def test_parse_levels():
+    assert parse_levels("") == {}
+    assert parse_levels(
+        "app.core.vector_store=debug, app.routers.documents = WARNING,bogus"
+    ) == {"app.core.vector_store": "DEBUG", "app.routers.documents": "WARNING"}
+
+
+def test_json_formatter():
+    record = make_record("pump %s failed")
+    record.args = ("P-101",)
+    RequestIdFilter().filter(record)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "WARNING"
+    assert entry["logger"] == "app.test"
+    assert entry["message"] == "pump P-101 failed"
+    assert entry["request_id"] == "-"
+    assert entry["time"].endswith("+00:00")
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record(exc_info=sys.exc_info())
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(record))["exc_info"]
+
+
+def test_request_id_reaches_queued_records(capsys, restore_logging):
+    configure_logging("INFO", levels="app.noisy=ERROR", fmt="json")
+    token = request_id_var.set("req-123")
+    try:
+        logging.getLogger("app.test").info("inside the request")
+        logging.getLogger("app.noisy").warning("filtered out")
+    finally:
+        request_id_var.reset(token)
+    logging.getLogger("app.test").info("after the request")
+    shutdown_logging()  # Flushes the queue
+    logging.getLogger("app.noisy").setLevel(logging.NOTSET)
+
+    entries = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(e["message"], e["request_id"]) for e in entries] == [
+        ("inside the request", "req-123"),
+        ("after the request", "-"),
+    ]
@@ -0,0 +1,15 @@
+from app.core.metrics import record_tokens, track_stage
+
+
+def test_metrics_endpoint_exposes_pipeline_metrics(client):
+    with track_stage("query_embedding"):
+        pass
+    record_tokens("completion", sent=12, received=5)
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'rag_stage_duration_seconds_count{stage="query_embedding"}' in body
+    assert 'rag_llm_tokens_total{direction="received",operation="completion"}' in body
+
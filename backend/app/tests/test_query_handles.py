@@ -0,0 +1,51 @@
+from app.core.llm_client import LLMClient
+from app.core.llm_providers import FakeLLMProvider
+from app.core.local_vector_store import LocalVectorStore
+from app.core.query_handles import QueryHandles
+from app.core.shared_cache import MemoryCache
+from app.routers.documents import get_query_vectors
+
+
+def test_handles_are_scoped_to_user_and_query():
+    handles = QueryHandles(MemoryCache())
+    handle = handles.create("alice", "What is the backup policy?", {None: [0.1]})
+
+    assert handles.get("alice", handle, "what is the  backup policy?") == {
+        None: [0.1]
+    }
+    assert handles.get("bob", handle, "What is the backup policy?") is None
+    assert handles.get("alice", handle, "Who has admin access?") is None
+    assert handles.get("alice", "unknown", "What is the backup policy?") is None
+
+
+def test_query_vectors_are_reused_across_indexes(tmp_path, monkeypatch):
+    vector_store = LocalVectorStore(str(tmp_path / "vectors"))
+    vector_store.create_collection("Small", embedding_dimensions=64)
+    vector_store.create_collection("Other", embedding_dimensions=64)
+    vector_store.create_collection("Large", embedding_dimensions=128)
+    llm_client = LLMClient(FakeLLMProvider(embedding_dimensions=128))
+    embedded = []
+    get_query_embedding = llm_client.get_query_embedding
+    monkeypatch.setattr(
+        llm_client,
+        "get_query_embedding",
+        lambda query, dimensions=None: embedded.append(dimensions)
+        or get_query_embedding(query, dimensions),
+    )
+
+    handles = QueryHandles(MemoryCache())
+    vectors = {}
+    get_query_vectors(vector_store, llm_client, "backups", "Small", vectors)
+    handle = handles.create("alice", "backups", vectors)
+
+    # Another index of the same size needs no new embedding
+    vectors = handles.get("alice", handle, "backups")
+    get_query_vectors(vector_store, llm_client, "backups", "Other", vectors)
+    assert embedded == [64]
+
+    # A new size is embedded once and kept with the handle
+    get_query_vectors(vector_store, llm_client, "backups", "Large", vectors)
+    handles.save("alice", handle, "backups", vectors)
+    vectors = handles.get("alice", handle, "backups")
+    get_query_vectors(vector_store, llm_client, "backups", None, vectors)
+    assert embedded == [64, 128]
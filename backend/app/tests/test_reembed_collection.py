@@ -0,0 +1,36 @@
+import pytest
+
+from app.core.llm_client import LLMClient
+from app.core.llm_providers import FakeLLMProvider
+from app.core.local_vector_store import LocalVectorStore
+from app.tools.reembed_collection import reembed_collection
+
+
+def test_reembedding_writes_vectors_of_the_recorded_size(tmp_path):
+    vector_store = LocalVectorStore(str(tmp_path / "vectors"))
+    llm_client = LLMClient(FakeLLMProvider(embedding_dimensions=64))
+    vector_store.create_collection("Manuals", "Pump manuals", embedding_dimensions=64)
+    texts = [f"Pump maintenance step {n}" for n in range(5)]
+    vector_store.add_documents(
+        "Manuals",
+        [
+            {"text": text, "metadata": {"filename": "pump.pdf", "chunk_index": n}}
+            for n, text in enumerate(texts)
+        ],
+        llm_client.get_embeddings(texts, dimensions=64),
+    )
+
+    copied = reembed_collection(
+        vector_store, llm_client, "Manuals", "ManualsSmall", 32, batch_size=2
+    )
+
+    assert copied == 5
+    assert vector_store.get_embedding_dimensions("ManualsSmall") == 32
+    documents = list(vector_store.iter_documents("ManualsSmall", include_vectors=True))
+    assert sorted(doc["text"] for doc in documents) == texts
+    assert {len(doc["vector"]) for doc in documents} == {32}
+    query = llm_client.get_query_embedding("Pump maintenance step 3", dimensions=32)
+    assert vector_store.search("ManualsSmall", query)[0]["text"] == texts[3]
+
+    with pytest.raises(ValueError):
+        reembed_collection(vector_store, llm_client, "Manuals", "ManualsSmall", 32)
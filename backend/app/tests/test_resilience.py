@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from app.core.metrics import RETRIES
+from app.core.resilience import CircuitBreaker, CircuitOpenError, call_with_retries
+from app.core.vector_store import is_transient_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def flaky(failures, error=requests.ConnectionError):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error("connection reset")
+        return "ok"
+
+    return fn, calls
+
+
+def retries(component):
+    return RETRIES.labels(component=component)._value.get()
+
+
+def test_transient_failures_are_retried_with_backoff():
+    fn, calls = flaky(2)
+    delays = []
+    before = retries("test")
+
+    result = call_with_retries(
+        fn, "test", is_transient_error, attempts=3, base_delay=0.1, sleep=delays.append
+    )
+
+    assert result == "ok"
+    assert len(calls) == 3
+    assert retries("test") - before == 2
+    # Full jitter: each delay is drawn from [0, base_delay * 2**attempt]
+    assert 0 <= delays[0] <= 0.1 and 0 <= delays[1] <= 0.2
+
+
+def test_retries_give_up_and_other_errors_are_not_retried():
+    fn, calls = flaky(5)
+    with pytest.raises(requests.ConnectionError):
+        call_with_retries(fn, "test", is_transient_error, attempts=3, sleep=id)
+    assert len(calls) == 3
+
+    fn, calls = flaky(5, error=ValueError)
+    with pytest.raises(ValueError):
+        call_with_retries(fn, "test", is_transient_error, attempts=3, sleep=id)
+    assert len(calls) == 1
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "weaviate", failure_threshold=2, reset_timeout=30, clock=clock
+    )
+    fn, calls = flaky(3)
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            call_with_retries(
+                fn, "test", is_transient_error, attempts=1, breaker=breaker, sleep=id
+            )
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        call_with_retries(fn, "test", is_transient_error, breaker=breaker, sleep=id)
+    assert len(calls) == 2  # Refused without calling the service
+    assert exc_info.value.retry_after == 30
+
+    # After the reset timeout one trial goes through; its failure reopens
+    clock.now = 31
+    assert breaker.state == "half_open"
+    with pytest.raises(requests.ConnectionError):
+        call_with_retries(
+            fn, "test", is_transient_error, attempts=1, breaker=breaker, sleep=id
+        )
+    assert breaker.state == "open"
+
+    clock.now = 62
+    assert call_with_retries(fn, "test", is_transient_error, breaker=breaker) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_is_transient_error():
+    assert is_transient_error(requests.ConnectionError())
+    assert is_transient_error(requests.ReadTimeout())
+    assert not is_transient_error(ValueError("bad query"))
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+from app.core.llm_client import LLMClient
+from app.core.llm_providers import FakeLLMProvider
+from app.core.shared_cache import MemoryCache, SQLiteCache
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer, reader = SQLiteCache(path), SQLiteCache(path)
+
+    writer.set("embedding", "k", [0.25, 0.5])
+    assert reader.get("embedding", "k") == [0.25, 0.5]
+
+    writer.set("answer", "old", "stale", ttl=-1)
+    assert reader.get("answer", "old") is None
+
+    writer.delete("embedding", "k")
+    assert reader.get("embedding", "k") is None
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_compare_and_set_detects_a_concurrent_writer(tmp_path, backend):
+    if backend == "memory":
+        first = second = MemoryCache()
+    else:
+        path = str(tmp_path / "cache.sqlite3")
+        first, second = SQLiteCache(path), SQLiteCache(path)
+
+    assert first.compare_and_set("conversation", "k", None, {"turns": [1]})
+    assert not second.compare_and_set("conversation", "k", None, {"turns": [2]})
+
+    stored = second.get("conversation", "k")
+    assert first.compare_and_set("conversation", "k", stored, {"turns": [1, 3]})
+    assert not second.compare_and_set("conversation", "k", stored, {"turns": [1, 2]})
+    assert first.get("conversation", "k") == {"turns": [1, 3]}
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("ns", "a", 1)
+    cache.set("ns", "b", 2)
+    cache.get("ns", "a")
+    cache.set("ns", "c", 3, ttl=60)
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "a") == 1 and cache.get("ns", "c") == 3
+
+
+def test_llm_client_reuses_cached_query_embeddings_and_answers(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    provider = FakeLLMProvider(embedding_dimensions=16, chat_latency_ms=50)
+    first, second = LLMClient(provider, cache), LLMClient(provider, cache)
+
+    assert first.get_query_embedding("pump") == second.get_query_embedding("pump")
+
+    context = [{"text": "Check oil weekly.", "metadata": {"filename": "pump.pdf"}}]
+    answer = first.get_completion("How often?", context)
+    start = time.perf_counter()
+    assert second.get_completion("How often?", context) == answer
+    assert time.perf_counter() - start < 0.05
+
+
+def test_sqlite_cache_evicts_oldest_rows_beyond_its_bound(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=4)
+    cache.purge_interval = 4
+    cache.set("ns", "expired", 0, ttl=-1)
+    for key in "abc":
+        cache.set("ns", key, key)
+    # The fourth write purged the expired row; rewriting "a" makes it newest
+    for key, value in [("a", "a2"), ("d", "d"), ("e", "e"), ("f", "f")]:
+        cache.set("ns", key, value)
+
+    # The eighth write evicted the two oldest rows beyond the bound
+    assert cache.get("ns", "b") is None and cache.get("ns", "c") is None
+    assert [cache.get("ns", key) for key in "adef"] == ["a2", "d", "e", "f"]
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from app.core.single_flight import SingleFlight, normalize_query
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    key = normalize_query("  How do I service the PUMP? ")
+    results = await asyncio.gather(
+        *(flight.do(key, compute) for _ in range(5)),
+        flight.do(normalize_query("how do i service the pump?"), compute),
+    )
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+
+    # Finished computations are not reused
+    await flight.do(key, compute)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_survive_leader_cancellation():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("upstream failed")
+
+    leader = asyncio.create_task(flight.do("key", fail))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", fail))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    with pytest.raises(ValueError):
+        await follower
@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+from app.core.local_vector_store import LocalVectorStore
+from app.core.snapshots import export_collection, import_snapshot
+
+
+def make_doc(text, filename="manual.pdf", chunk_index=0):
+    return {
+        "text": text,
+        "metadata": {"filename": filename, "chunk_index": chunk_index, "owner": "a"},
+    }
+
+
+@pytest.fixture
+def source(tmp_path):
+    store = LocalVectorStore(str(tmp_path / "source"))
+    store.create_collection("Manuals", "Operating manuals", {"type": "flat"}, 3)
+    store.add_documents(
+        "Manuals",
+        [make_doc("pump", chunk_index=0), make_doc("valve", chunk_index=1)]
+        + [make_doc("boiler", "other.pdf")],
+        [[1, 0, 0], [0, 1, 0], [0.9, 0.1, 0]],
+    )
+    return store
+
+
+def test_snapshot_round_trip(source, tmp_path):
+    snapshot = str(tmp_path / "snapshot")
+    manifest = export_collection(source, "Manuals", snapshot)
+    assert manifest["count"] == 3
+    assert manifest["dimensions"] == 3
+
+    vectors = np.load(tmp_path / "snapshot" / "vectors.npy", mmap_mode="r")
+    assert vectors.dtype == np.float32 and vectors.shape == (3, 3)
+    lines = (tmp_path / "snapshot" / "chunks.jsonl").read_text().splitlines()
+    assert json.loads(lines[1])["metadata"]["chunk_index"] == 1
+
+    target = LocalVectorStore(str(tmp_path / "target"))
+    assert import_snapshot(target, snapshot, batch_size=2) == 3
+    assert target.get_collection_info("Manuals")["description"] == "Operating manuals"
+    assert target.get_collection_settings("Manuals") == source.get_collection_settings(
+        "Manuals"
+    )
+    for query in ([1, 0, 0], [0, 1, 0]):
+        assert target.search("Manuals", query, limit=3) == pytest.approx(
+            source.search("Manuals", query, limit=3)
+        )
+
+
+def test_import_refuses_existing_collection(source, tmp_path):
+    snapshot = str(tmp_path / "snapshot")
+    export_collection(source, "Manuals", snapshot)
+
+    with pytest.raises(ValueError):
+        import_snapshot(source, snapshot)
+    assert import_snapshot(source, snapshot, collection="ManualsCopy") == 3
+    assert len(list(source.iter_documents("ManualsCopy"))) == 3
+
+
+def test_failed_import_leaves_no_collection(source, tmp_path):
+    snapshot = tmp_path / "snapshot"
+    export_collection(source, "Manuals", str(snapshot))
+    chunks = snapshot / "chunks.jsonl"
+    lines = chunks.read_text().splitlines()
+    target = LocalVectorStore(str(tmp_path / "target"))
+
+    # A truncated snapshot is refused before the collection is created
+    chunks.write_text("\n".join(lines[:2]) + "\n")
+    with pytest.raises(ValueError):
+        import_snapshot(target, str(snapshot))
+    assert target.list_collections() == []
+
+    # A collection left half filled by a failing import is removed
+    chunks.write_text("\n".join(lines[:2] + ["{not json"]) + "\n")
+    with pytest.raises(ValueError):
+        import_snapshot(target, str(snapshot), batch_size=2)
+    assert target.list_collections() == []
@@ -0,0 +1,120 @@
+import random
+
+from app.core.document_processor import DocumentProcessor
+from app.core.local_vector_store import LocalVectorStore
+from app.core.shared_cache import MemoryCache
+from app.core.text_cleaning import (
+    IndexFingerprints,
+    NearDuplicateIndex,
+    simhash,
+    strip_repeated_lines,
+)
+from benchmarks.corpus import VOCABULARY, build_pdf
+
+
+def paragraph(seed: int, words: int = 300) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choices(VOCABULARY, k=words))
+
+
+def test_repeated_header_and_footer_lines_are_removed():
+    body = [[f"Step {n}.{i}: check the seal." for i in range(1, 4)] for n in range(5)]
+    pages = [
+        "\n".join(["ACME Pump Manual Rev 3", *lines, f"Page {n} of 5"])
+        for n, lines in enumerate(body)
+    ]
+    cleaned = strip_repeated_lines("\f".join(pages))
+    assert cleaned.splitlines() == [line for lines in body for line in lines]
+
+    # Too few pages to tell boilerplate from content
+    assert strip_repeated_lines("Title\nA\fTitle\nB") == "Title\nA\nTitle\nB"
+
+
+def test_simhash_separates_near_and_distinct_texts():
+    text = paragraph(1)
+    edited = text.replace(text.split()[150], "gearbox", 1)
+    index = NearDuplicateIndex(max_distance=3)
+    index.add(simhash(text), "a.pdf")
+    assert index.find(simhash(edited)) == "a.pdf"
+    assert index.find(simhash(paragraph(2))) is None
+
+    restored = NearDuplicateIndex.from_json(index.to_json())
+    assert restored.find(simhash(text)) == "a.pdf"
+    restored.discard_owner("a.pdf")
+    assert len(restored) == 0
+
+
+def test_process_document_drops_boilerplate_and_duplicate_chunks():
+    processor = DocumentProcessor()
+    processor.chunk_size, processor.chunk_overlap = 100, 0
+    notice = [paragraph(9, 90)]  # The same legal notice, one page per section
+    pages = [
+        ["ACME Pump Manual Rev 3", line, "Confidential - Page 1"]
+        for line in [paragraph(n, 90) for n in range(4)] + notice * 2
+    ]
+    seen = NearDuplicateIndex()
+    chunks = processor.process_document(
+        build_pdf(pages), {"filename": "pump.pdf"}, seen
+    )
+    texts = [chunk["text"] for chunk in chunks]
+    assert not any("ACME Pump Manual" in text for text in texts)
+    assert [chunk["metadata"]["chunk_index"] for chunk in chunks] == list(
+        range(len(chunks))
+    )
+    assert len(seen) == len(chunks)
+
+    # Re-uploading the same file keeps its chunks; another file repeating
+    # them is reduced to its new content
+    again = processor.process_document(build_pdf(pages), {"filename": "pump.pdf"}, seen)
+    assert len(again) == len(chunks)
+    copy = processor.process_document(
+        build_pdf(pages[:2] + [["A new page", paragraph(42, 90), "Footer"]] * 3),
+        {"filename": "copy.pdf"},
+        seen,
+    )
+    assert len(copy) == 1
+
+
+def test_chunks_only_duplicate_documents_with_the_same_acl(tmp_path):
+    processor = DocumentProcessor()
+    processor.chunk_size, processor.chunk_overlap = 100, 0
+    vector_store = LocalVectorStore(str(tmp_path))
+    fingerprints = IndexFingerprints(MemoryCache(), vector_store)
+    content = build_pdf([[paragraph(n, 90)] for n in range(3)])
+    hr = {"owner": "admin@demo.com", "allowed_categories": ["hr"]}
+    it = {"owner": "admin@demo.com", "allowed_categories": ["it"]}
+
+    def upload(filename, acl):
+        metadata = {"filename": filename, **acl}
+        seen = fingerprints.load("Manuals", metadata)
+        chunks = processor.process_document(content, metadata, seen)
+        if chunks:
+            vector_store.add_documents("Manuals", chunks, [[1, 0]] * len(chunks))
+        fingerprints.save("Manuals", metadata, seen.owned_by(filename))
+        return chunks
+
+    stored = upload("hr.pdf", hr)
+    # The same text readable by other users is kept; under the same ACL it
+    # only repeats what is already there
+    assert len(upload("it.pdf", it)) == len(stored)
+    assert upload("hr-copy.pdf", hr) == []
+
+    # Saves merge into the latest group instead of replacing it
+    first = fingerprints.load("Manuals", {"filename": "a.pdf", **it})
+    second = fingerprints.load("Manuals", {"filename": "b.pdf", **it})
+    fingerprints.save("Manuals", {"filename": "a.pdf", **it}, [0xFF])
+    fingerprints.save("Manuals", {"filename": "b.pdf", **it}, [0xFF << 32])
+    assert len(first) == len(second) == len(stored)
+    group = fingerprints.load("Manuals", it)
+    assert group.find(0xFF) == "a.pdf" and group.find(0xFF << 32) == "b.pdf"
+
+    # Rebuilt from the stored chunks, the groups stay apart
+    rebuilt = IndexFingerprints(MemoryCache(), vector_store)
+    assert set(rebuilt.load("Manuals", hr).owners.values()) == {"hr.pdf"}
+    assert set(rebuilt.load("Manuals", it).owners.values()) == {"it.pdf"}
+
+    # Deleting a document drops its own fingerprints; other groups stay
+    # cached instead of being rebuilt from the stored chunks
+    fingerprints.discard("Manuals", {"filename": "hr.pdf", **hr})
+    assert fingerprints.load("Manuals", hr).owned_by("hr.pdf") == []
+    assert fingerprints.load("Manuals", it).find(0xFF) == "a.pdf"
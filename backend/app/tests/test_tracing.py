@@ -0,0 +1,30 @@
+import json
+
+from opentelemetry import trace
+
+from app.core import tracing
+from app.core.llm_client import LLMClient
+from app.core.llm_providers import FakeLLMProvider
+from app.core.tracing import configure_tracing, shutdown_tracing
+
+
+def test_tracing_writes_llm_spans_to_file(tmp_path):
+    global_provider = trace.get_tracer_provider()
+    trace_file = tmp_path / "traces.jsonl"
+    configure_tracing("file", str(trace_file), sample_rate=1.0, set_global=False)
+    try:
+        client = LLMClient(FakeLLMProvider(embedding_dimensions=32))
+        client.get_embeddings(["pump maintenance"])
+    finally:
+        shutdown_tracing()
+
+    spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    embed = next(span for span in spans if span["name"] == "llm.embed")
+    assert embed["attributes"]["rag.deployment"] == client.embedding_deployment
+    assert embed["attributes"]["rag.prompt_tokens"] > 0
+
+    # The file is closed and the process-wide provider was never replaced
+    assert tracing._trace_file is None
+    assert trace.get_tracer_provider() is global_provider
+    client.get_embeddings(["pump maintenance again"])
+    assert len(trace_file.read_text().splitlines()) == len(spans)
@@ -0,0 +1,94 @@
+import pytest
+from app.core import vector_store
+from app.core.shared_cache import MemoryCache
+from app.core.vector_store import VectorStoreUnavailableError, WeaviateVectorStore
+
+
+class FakeSchema:
+    def __init__(self):
+        self.classes = set()
+
+    def exists(self, class_name):
+        return class_name in self.classes
+
+    def create_class(self, class_obj):
+        if class_obj["class"] in self.classes:
+            raise ValueError(f"class name {class_obj['class']} already exists")
+        self.classes.add(class_obj["class"])
+
+
+class FakeDataObject:
+    def __init__(self):
+        self.objects = {}
+
+    def exists(self, uuid, class_name):
+        return (class_name, uuid) in self.objects
+
+    def create(self, properties, class_name, uuid):
+        self.objects[class_name, uuid] = properties
+
+    replace = create
+
+    def get_by_id(self, uuid, class_name):
+        properties = self.objects.get((class_name, uuid))
+        return {"properties": properties} if properties else None
+
+
+class UnavailableQuery:
+    def get(self, class_name, properties):
+        return self
+
+    def with_where(self, where):
+        return self
+
+    def with_limit(self, limit):
+        return self
+
+    def do(self):
+        raise VectorStoreUnavailableError("Weaviate is down")
+
+
+class FakeWeaviate:
+    """One in-memory Weaviate server shared by every store built on it."""
+
+    def __init__(self):
+        self.schema = FakeSchema()
+        self.data_object = FakeDataObject()
+        self.query = UnavailableQuery()
+
+
+@pytest.fixture(autouse=True)
+def server(monkeypatch):
+    server = FakeWeaviate()
+    monkeypatch.setattr(vector_store, "_weaviate_client", lambda timeout: server)
+    return server
+
+
+def test_missing_settings_are_not_cached():
+    # Two workers, each with its own cache, on the same Weaviate
+    reader = WeaviateVectorStore(MemoryCache())
+    writer = WeaviateVectorStore(MemoryCache())
+
+    assert reader.get_collection_settings("Manuals") == {}
+    writer.create_collection("Manuals", embedding_dimensions=3)
+
+    assert reader.get_embedding_dimensions("Manuals") == 3
+
+
+def test_create_collection_drops_cached_settings():
+    cache = MemoryCache()
+    WeaviateVectorStore(MemoryCache()).create_collection(
+        "Manuals", embedding_dimensions=3
+    )
+    store = WeaviateVectorStore(cache)
+    cache.set("collection_settings", "Manuals", {})
+
+    assert not store.create_collection("Manuals")
+    assert store.get_embedding_dimensions("Manuals") == 3
+
+
+def test_duplicate_check_does_not_hide_an_unavailable_store():
+    store = WeaviateVectorStore(MemoryCache())
+
+    with pytest.raises(VectorStoreUnavailableError):
+        store._check_duplicate("Manuals", "pump", {"filename": "manual.pdf"})
@@ -0,0 +1,104 @@
+"""Re-embed an existing collection into a new one with a different vector size.
+
+Weaviate classes cannot be renamed, so the documents are copied into a new
+collection embedded at the requested size (e.g. text-embedding-3 at 256 or
+512 dimensions). The source collection is kept unless ``--drop-source`` is
+given.
+
+Usage:
+    python -m app.tools.reembed_collection Manuals ManualsSmall --dimensions 256
+"""
+
+import argparse
+import sys
+
+from ..core.llm_client import LLMClient
+from ..core.vector_store import VectorStore, create_vector_store
+
+
+def reembed_collection(
+    vector_store: VectorStore,
+    llm_client: LLMClient,
+    source: str,
+    target: str,
+    dimensions: int,
+    batch_size: int = 100,
+) -> int:
+    """Copy ``source`` into ``target`` with freshly computed embeddings.
+
+    Returns the number of documents copied.
+    """
+    info = vector_store.get_collection_info(source)
+    if not info:
+        raise ValueError(f"Collection '{source}' does not exist")
+
+    source_settings = vector_store.get_collection_settings(source)
+    created = vector_store.create_collection(
+        target,
+        info.get("description", ""),
+        source_settings.get("vector_index") or None,
+        dimensions,
+    )
+    if not created:
+        raise ValueError(f"Collection '{target}' already exists")
+
+    copied = 0
+    batch = []
+    for document in vector_store.iter_documents(source, batch_size=batch_size):
+        batch.append({"text": document["text"], "metadata": document["metadata"]})
+        if len(batch) >= batch_size:
+            copied += _copy_batch(vector_store, llm_client, target, batch, dimensions)
+            batch = []
+    if batch:
+        copied += _copy_batch(vector_store, llm_client, target, batch, dimensions)
+    return copied
+
+
+def _copy_batch(vector_store, llm_client, target, documents, dimensions) -> int:
+    vectors = llm_client.get_embeddings(
+        [doc["text"] for doc in documents], dimensions=dimensions
+    )
+    vector_store.add_documents(target, documents, vectors)
+    print(f"Copied {len(documents)} documents into {target}")
+    return len(documents)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Collection to read from")
+    parser.add_argument("target", help="New collection to create")
+    parser.add_argument(
+        "--dimensions", type=int, required=True, help="Embedding size for the target"
+    )
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--drop-source",
+        action="store_true",
+        help="Delete the source collection after a successful copy",
+    )
+    args = parser.parse_args(argv)
+
+    vector_store = create_vector_store()
+    llm_client = LLMClient()
+    try:
+        copied = reembed_collection(
+            vector_store,
+            llm_client,
+            args.source,
+            args.target,
+            args.dimensions,
+            batch_size=args.batch_size,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Re-embedded {copied} documents from {args.source} into {args.target}")
+    if args.drop_source:
+        vector_store.delete_collection(args.source)
+        print(f"Deleted source collection {args.source}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Export a collection to a snapshot directory, or import one.
+
+Snapshots carry the stored vectors, so an import makes no embedding calls:
+use them for backups, restores and moving an index between vector store
+backends (set VECTOR_STORE_BACKEND for each run).
+
+Usage:
+    python -m app.tools.snapshot export Manuals snapshots/manuals
+    python -m app.tools.snapshot import snapshots/manuals --collection Manuals2
+"""
+
+import argparse
+import sys
+
+from ..core.snapshots import export_collection, import_snapshot
+from ..core.vector_store import create_vector_store
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write a snapshot")
+    export_parser.add_argument("collection", help="Collection to export")
+    export_parser.add_argument("path", help="Directory to write the snapshot to")
+    export_parser.add_argument("--batch-size", type=int, default=500)
+
+    import_parser = commands.add_parser("import", help="Restore a snapshot")
+    import_parser.add_argument("path", help="Snapshot directory")
+    import_parser.add_argument(
+        "--collection", help="Name of the new collection (default: as exported)"
+    )
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    vector_store = create_vector_store()
+    try:
+        if args.command == "export":
+            manifest = export_collection(
+                vector_store, args.collection, args.path, batch_size=args.batch_size
+            )
+            print(
+                f"Exported {manifest['count']} chunks from {args.collection} "
+                f"into {args.path}"
+            )
+        else:
+            added = import_snapshot(
+                vector_store,
+                args.path,
+                collection=args.collection,
+                batch_size=args.batch_size,
+            )
+            print(f"Imported {added} chunks from {args.path}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        vector_store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""Compare chunk sizes and overlaps on retrieval quality and cost.
+
+Each (chunk size, overlap) setting re-chunks and re-embeds the corpus. It is
+then scored against question/expected-source pairs with recall@k and MRR,
+and costed by chunk count, embedding tokens, index memory (vectors plus
+text) and the tokens of the completion prompt built from the top results.
+
+Questions are JSON lines:
+    {"question": "...", "sources": ["manual.pdf"], "evidence": "optional"}
+A retrieved chunk is relevant if it comes from one of ``sources`` and, when
+``evidence`` is given, contains that text. Without ``--corpus`` the harness
+uses a synthetic corpus, with questions drawn from its sentences.
+
+Embeddings come from the offline fake provider unless ``--embedder
+configured`` selects the LLM_PROVIDER deployment. ``--embedding-cache``
+keeps the vectors in a SQLite file, so later runs only embed new chunks.
+
+Usage (from the backend directory):
+    python -m benchmarks.chunking --chunk-sizes 200 350 500 800 --overlaps 0 50
+    python -m benchmarks.chunking --corpus ~/manuals --questions qa.jsonl \\
+        --embedder configured --embedding-cache data/chunking-cache.sqlite3
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Placeholders for the settings the app requires; the embedder is chosen below
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("USER_PASSWORD", "benchmark-password")
+
+from app.core.config import settings  # noqa: E402
+from app.core.document_processor import DocumentProcessor  # noqa: E402
+from app.core.llm_client import (  # noqa: E402
+    COMPLETION_SYSTEM_PROMPT,
+    LLMClient,
+    completion_prompt,
+    format_contexts,
+)
+from app.core.llm_providers import FakeLLMProvider  # noqa: E402
+from app.core.shared_cache import SharedCache, SQLiteCache, cache_key  # noqa: E402
+
+from .corpus import generate_pages  # noqa: E402
+from .run_benchmarks import git_commit  # noqa: E402
+
+CACHE_NAMESPACE = "chunk_embedding"
+
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _SPACE.sub(" ", text).strip().lower()
+
+
+class Embedder:
+    """Embeds texts as unit-length rows, reusing vectors cached earlier."""
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        dimensions: Optional[int] = None,
+        cache: Optional[SharedCache] = None,
+    ):
+        self.llm_client = llm_client
+        self.dimensions = dimensions
+        self.cache = cache
+        self.embedded = 0  # Texts sent to the provider
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        model = self.llm_client.embedding_deployment
+        keys = [cache_key(model, self.dimensions, text) for text in texts]
+        vectors = [
+            self.cache.get(CACHE_NAMESPACE, key) if self.cache else None
+            for key in keys
+        ]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = self.llm_client.get_embeddings(
+                [texts[i] for i in missing], self.dimensions
+            )
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+                if self.cache is not None:
+                    self.cache.set(CACHE_NAMESPACE, keys[i], vector)
+            self.embedded += len(missing)
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+def synthetic_corpus(
+    documents: int, pages: int, questions: int, seed: int
+) -> Tuple[List[Tuple[str, str]], List[Dict]]:
+    """(filename, text) documents and questions asking about one sentence."""
+    rng = random.Random(seed)
+    corpus = []
+    for number in range(documents):
+        lines = [line for page in generate_pages(rng, pages) for line in page]
+        corpus.append((f"synthetic-{number:03d}.txt", "\n".join(lines)))
+
+    queries = []
+    for _ in range(questions):
+        filename, text = rng.choice(corpus)
+        sentence = rng.choice(text.split("\n"))
+        words = rng.sample(sentence.rstrip(".").lower().split(), 6)
+        queries.append(
+            {
+                "question": f"What does the manual say about {' '.join(words)}?",
+                "sources": [filename],
+                "evidence": sentence,
+            }
+        )
+    return corpus, queries
+
+
+def load_corpus(directory: str, processor: DocumentProcessor) -> List[Tuple[str, str]]:
+    """Extract and clean the supported documents in ``directory``."""
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        try:
+            mime_type = processor.get_mime_type(content, name)
+            text = processor.clean_text(processor.extract_text(content, mime_type))
+        except ValueError as e:
+            print(f"Skipping {name}: {e}", file=sys.stderr)
+            continue
+        if text.strip():
+            corpus.append((name, text))
+    return corpus
+
+
+def load_questions(path: str) -> List[Dict]:
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            question = json.loads(line)
+            if not question.get("question") or not question.get("sources"):
+                raise ValueError(f"{path}:{number}: needs 'question' and 'sources'")
+            questions.append(question)
+    return questions
+
+
+def is_relevant(question: Dict, filename: str, text: str) -> bool:
+    if filename not in question["sources"]:
+        return False
+    evidence = question.get("evidence")
+    return not evidence or normalize(evidence) in normalize(text)
+
+
+def evaluate(
+    corpus: Sequence[Tuple[str, str]],
+    questions: Sequence[Dict],
+    question_vectors: np.ndarray,
+    embedder: Embedder,
+    chunk_size: int,
+    chunk_overlap: int,
+    ks: Sequence[int] = (1, 3, 5),
+    limit: int = 5,
+) -> Dict:
+    """Retrieval quality and cost of one chunking setting."""
+    processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    tokenizer = processor.tokenizer
+    chunks = [
+        (filename, chunk)
+        for filename, text in corpus
+        for chunk in processor.create_chunks(text)
+    ]
+    texts = [text for _, text in chunks]
+    vectors = embedder.embed(texts)
+
+    depth = min(max(max(ks), limit), len(chunks))
+    scores = question_vectors @ vectors.T
+    top = np.argsort(-scores, axis=1)[:, :depth]
+
+    system_tokens = len(tokenizer.encode(COMPLETION_SYSTEM_PROMPT))
+    ranks: List[Optional[int]] = []
+    prompt_tokens = []
+    for question, rows in zip(questions, top):
+        ranks.append(
+            next(
+                (
+                    rank
+                    for rank, row in enumerate(rows, 1)
+                    if is_relevant(question, *chunks[row])
+                ),
+                None,
+            )
+        )
+        context = [
+            {"text": chunks[row][1], "metadata": {"filename": chunks[row][0]}}
+            for row in rows[:limit]
+        ]
+        prompt = completion_prompt(question["question"], format_contexts(context)[0])
+        prompt_tokens.append(system_tokens + len(tokenizer.encode(prompt)))
+
+    count = len(questions) or 1
+    return {
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunks": len(chunks),
+        "embedding_tokens": sum(len(tokenizer.encode(text)) for text in texts),
+        "index_bytes": int(vectors.nbytes)
+        + sum(len(text.encode("utf-8")) for text in texts),
+        "recall": {
+            f"@{k}": round(sum(1 for r in ranks if r and r <= k) / count, 4)
+            for k in ks
+        },
+        "mrr": round(sum(1 / r for r in ranks if r) / count, 4),
+        "prompt_tokens": {
+            "mean": round(float(np.mean(prompt_tokens)), 1) if prompt_tokens else 0,
+            "p95": (
+                round(float(np.percentile(prompt_tokens, 95)), 1)
+                if prompt_tokens
+                else 0
+            ),
+        },
+    }
+
+
+def run(args) -> Dict:
+    if args.embedder == "fake":
+        dimensions = args.dimensions or settings.FAKE_LLM_EMBEDDING_DIMENSIONS
+        llm_client = LLMClient(FakeLLMProvider(embedding_dimensions=dimensions))
+    else:
+        llm_client = LLMClient()
+    cache = SQLiteCache(args.embedding_cache) if args.embedding_cache else None
+    embedder = Embedder(llm_client, args.dimensions, cache)
+
+    if args.corpus:
+        if not args.questions:
+            raise SystemExit("--corpus needs --questions")
+        corpus = load_corpus(args.corpus, DocumentProcessor())
+        questions = load_questions(args.questions)
+    else:
+        corpus, questions = synthetic_corpus(
+            args.documents, args.pages, args.synthetic_questions, args.seed
+        )
+        if args.questions:
+            questions = load_questions(args.questions)
+
+    if not corpus or not questions:
+        raise SystemExit("No documents or questions to evaluate")
+    question_vectors = embedder.embed([q["question"] for q in questions])
+    results = []
+    for chunk_size in args.chunk_sizes:
+        for chunk_overlap in args.overlaps:
+            if chunk_overlap >= chunk_size:
+                continue
+            results.append(
+                evaluate(
+                    corpus,
+                    questions,
+                    question_vectors,
+                    embedder,
+                    chunk_size,
+                    chunk_overlap,
+                    ks=args.k,
+                    limit=args.limit,
+                )
+            )
+    if cache is not None:
+        cache.close()
+
+    return {
+        "commit": git_commit(),
+        "config": {
+            "corpus": args.corpus or "synthetic",
+            "documents": len(corpus),
+            "questions": len(questions),
+            "embedder": args.embedder,
+            "embedding_deployment": llm_client.embedding_deployment,
+            "dimensions": args.dimensions,
+            "limit": args.limit,
+            "seed": args.seed,
+            "texts_embedded": embedder.embedded,
+        },
+        "current": {
+            "chunk_size": settings.CHUNK_SIZE_TOKENS,
+            "chunk_overlap": settings.CHUNK_OVERLAP_TOKENS,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate chunking settings")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[250, 500, 800])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 50, 100])
+    parser.add_argument("--corpus", help="Directory of PDF/DOCX/TXT documents")
+    parser.add_argument("--questions", help="JSON lines of questions and sources")
+    parser.add_argument("--documents", type=int, default=10, help="Synthetic")
+    parser.add_argument("--pages", type=int, default=10, help="Synthetic")
+    parser.add_argument(
+        "--synthetic-questions", type=int, default=100, help="Synthetic"
+    )
+    parser.add_argument("--embedder", choices=["fake", "configured"], default="fake")
+    parser.add_argument("--dimensions", type=int, help="Embedding size")
+    parser.add_argument("--embedding-cache", help="SQLite file for chunk vectors")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--limit", type=int, default=5, help="Chunks per prompt")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    current = report["current"]
+    for result in report["results"]:
+        setting = f"{result['chunk_size']}/{result['chunk_overlap']}"
+        if result["chunk_size"] == current["chunk_size"] and (
+            result["chunk_overlap"] == current["chunk_overlap"]
+        ):
+            setting += "*"
+        recall = " ".join(f"R{k}={v}" for k, v in result["recall"].items())
+        print(
+            f"{setting:10} chunks={result['chunks']:<6} {recall} "
+            f"MRR={result['mrr']} index={result['index_bytes'] / 2**20:.2f}MiB "
+            f"prompt={result['prompt_tokens']['mean']}",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
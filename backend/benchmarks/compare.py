@@ -0,0 +1,63 @@
+"""Compare two benchmark reports written by ``benchmarks.run_benchmarks``.
+
+Prints the p50/p95/p99 change per stage and exits with status 1 when any
+stage's p95 latency regressed by more than ``--threshold`` percent.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def percent_change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="Allowed p95 regression (%%)"
+    )
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"baseline {baseline['commit']}  ->  candidate {candidate['commit']}")
+
+    regressions = []
+    for name, after in candidate["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            print(f"{name:28} (new stage)")
+            continue
+        changes = {
+            p: percent_change(before["latency_ms"][p], after["latency_ms"][p])
+            for p in ("p50", "p95", "p99")
+        }
+        print(
+            f"{name:28} "
+            + "  ".join(
+                f"{p}={after['latency_ms'][p]:9.3f}ms ({change:+6.1f}%)"
+                for p, change in changes.items()
+            )
+        )
+        if changes["p95"] > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"p95 regressions above {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
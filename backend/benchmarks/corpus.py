@@ -0,0 +1,172 @@
+"""Synthetic PDF, DOCX and TXT documents for benchmarks.
+
+Documents are generated from a seeded random generator, so a given
+configuration always produces the same corpus.
+"""
+
+import io
+import random
+import zipfile
+from dataclasses import dataclass
+from typing import List
+from xml.sax.saxutils import escape
+
+VOCABULARY = (
+    "pump valve boiler compressor turbine bearing seal gasket lubrication "
+    "inspection maintenance schedule torque pressure temperature sensor alarm "
+    "shutdown startup procedure operator technician safety lockout tagout "
+    "hazard permit ventilation filter coolant conveyor motor gearbox alignment "
+    "vibration calibration tolerance weld inspection certificate revision "
+    "policy employee leave payroll training induction audit incident report "
+    "quality batch line shift supervisor production downtime spare part "
+    "warranty manual specification drawing assembly hydraulic pneumatic"
+).split()
+
+LINES_PER_PAGE = 40
+WORDS_PER_LINE = 12
+
+
+@dataclass
+class SyntheticDocument:
+    filename: str
+    content: bytes
+    pages: int
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(VOCABULARY, k=WORDS_PER_LINE)
+    return " ".join(words).capitalize() + "."
+
+
+def generate_pages(rng: random.Random, pages: int) -> List[List[str]]:
+    return [[_sentence(rng) for _ in range(LINES_PER_PAGE)] for _ in range(pages)]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: List[List[str]]) -> bytes:
+    """Write a minimal PDF with one Helvetica text stream per page."""
+    objects = []
+    page_ids = []
+    font_id = 3
+    next_id = 4
+    for lines in pages:
+        stream = "BT /F1 10 Tf 50 780 Td 14 TL\n"
+        stream += "".join(f"({_pdf_escape(line)}) Tj T*\n" for line in lines)
+        stream += "ET"
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects.append(
+            (content_id, f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        )
+        objects.append(
+            (
+                page_id,
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+                f"/Contents {content_id} 0 R >>",
+            )
+        )
+        page_ids.append(page_id)
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects = [
+        (1, "<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"),
+        (font_id, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"),
+    ] + objects
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id, body in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref_offset = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for obj_id in range(1, len(objects) + 1):
+        out.write(f"{offsets[obj_id]:010d} 00000 n \n".encode())
+    out.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n".encode()
+    )
+    return out.getvalue()
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    "</Types>"
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+    '2006/relationships/officeDocument" Target="word/document.xml"/>'
+    "</Relationships>"
+)
+
+
+def build_docx(pages: List[List[str]]) -> bytes:
+    """Write a minimal DOCX with one paragraph per line and page breaks."""
+    body = []
+    for number, lines in enumerate(pages):
+        if number:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        body.extend(f"<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>" for line in lines)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{''.join(body)}</w:body></w:document>"
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        docx.writestr("_rels/.rels", _RELS)
+        docx.writestr("word/document.xml", document)
+    return out.getvalue()
+
+
+def build_txt(pages: List[List[str]]) -> bytes:
+    return "\n\f\n".join("\n".join(lines) for lines in pages).encode("utf-8")
+
+
+BUILDERS = {"pdf": build_pdf, "docx": build_docx, "txt": build_txt}
+
+
+def generate_corpus(
+    documents_per_type: int = 5,
+    pages_per_document: int = 10,
+    file_types=("pdf", "docx", "txt"),
+    seed: int = 42,
+) -> List[SyntheticDocument]:
+    rng = random.Random(seed)
+    corpus = []
+    for file_type in file_types:
+        for number in range(documents_per_type):
+            pages = generate_pages(rng, pages_per_document)
+            corpus.append(
+                SyntheticDocument(
+                    filename=f"synthetic-{number:03d}.{file_type}",
+                    content=BUILDERS[file_type](pages),
+                    pages=pages_per_document,
+                )
+            )
+    return corpus
+
+
+def generate_queries(count: int = 20, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        "What is the procedure for "
+        + " ".join(rng.choices(VOCABULARY, k=4))
+        + "?"
+        for _ in range(count)
+    ]
@@ -0,0 +1,183 @@
+"""Compare the PDF and DOCX extraction backends.
+
+For every installed backend, reports pages (or documents) per second and the
+extraction quality: word-level precision, recall and F1 against the text the
+synthetic documents were generated from. Real documents can be added with
+``--corpus DIR``; having no ground truth, they are scored against the
+``--reference`` backend instead. ``--workers N`` also times per-page
+parallel PDF extraction with N processes.
+
+Usage (from the backend directory):
+    python -m benchmarks.extractors --documents 5 --pages 20
+    python -m benchmarks.extractors --corpus ~/manuals --reference pdfminer
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.extractors import (
+    DOCX_EXTRACTORS,
+    PDF_EXTRACTORS,
+    extract_pdf_parallel,
+)
+
+from .corpus import BUILDERS, generate_pages
+from .run_benchmarks import git_commit
+
+_WORD = re.compile(r"\w+")
+
+
+def word_scores(extracted: str, expected: str) -> Dict[str, float]:
+    """Precision, recall and F1 of the extracted words against the expected."""
+    got = Counter(_WORD.findall(extracted.lower()))
+    want = Counter(_WORD.findall(expected.lower()))
+    overlap = sum((got & want).values())
+    precision = overlap / sum(got.values()) if got else 0.0
+    recall = overlap / sum(want.values()) if want else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if overlap else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def synthetic_documents(
+    file_type: str, documents: int, pages: int, seed: int
+) -> List[Tuple[str, bytes, int, str]]:
+    """(name, content, pages, ground truth) for generated documents."""
+    rng = random.Random(seed)
+    corpus = []
+    for number in range(documents):
+        page_lines = generate_pages(rng, pages)
+        truth = "\n".join(line for lines in page_lines for line in lines)
+        content = BUILDERS[file_type](page_lines)
+        corpus.append((f"synthetic-{number:03d}.{file_type}", content, pages, truth))
+    return corpus
+
+
+def real_documents(directory: str, file_type: str, reference) -> List[Tuple]:
+    """(name, content, pages, reference text) for files in ``directory``."""
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(f".{file_type}"):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            content = f.read()
+        pages = reference.page_count(content) if file_type == "pdf" else 1
+        corpus.append((name, content, pages, reference.extract(content)))
+    return corpus
+
+
+def bench(extract, corpus) -> Dict:
+    pages = 0
+    elapsed = 0.0
+    scores = []
+    failures = 0
+    for _, content, page_count, expected in corpus:
+        start = time.perf_counter()
+        try:
+            text = extract(content)
+        except Exception:
+            failures += 1
+            continue
+        elapsed += time.perf_counter() - start
+        pages += page_count
+        scores.append(word_scores(text, expected))
+    result = {
+        "documents": len(corpus) - failures,
+        "failures": failures,
+        "pages": pages,
+        "seconds": round(elapsed, 4),
+        "pages_per_s": round(pages / elapsed, 2) if elapsed else None,
+    }
+    for metric in ("precision", "recall", "f1"):
+        values = [score[metric] for score in scores]
+        result[metric] = round(sum(values) / len(values), 4) if values else None
+    return result
+
+
+def run(args) -> Dict:
+    results: Dict[str, Dict] = {}
+    executor: Optional[ProcessPoolExecutor] = (
+        ProcessPoolExecutor(args.workers) if args.workers > 1 else None
+    )
+    for file_type, registry in (("pdf", PDF_EXTRACTORS), ("docx", DOCX_EXTRACTORS)):
+        available = {
+            name: extractor()
+            for name, extractor in registry.items()
+            if extractor.available()
+        }
+        corpus = synthetic_documents(file_type, args.documents, args.pages, args.seed)
+        if args.corpus:
+            reference = available.get(args.reference) or next(iter(available.values()))
+            corpus += real_documents(args.corpus, file_type, reference)
+
+        for name, extractor in available.items():
+            results[f"{file_type}.{name}"] = bench(extractor.extract, corpus)
+            if file_type == "pdf" and executor is not None:
+                results[f"pdf.{name}.parallel"] = bench(
+                    lambda content: extract_pdf_parallel(
+                        extractor, content, executor, args.workers, min_pages=2
+                    ),
+                    corpus,
+                )
+        for name in registry:
+            if name not in available:
+                results[f"{file_type}.{name}"] = {"installed": False}
+    if executor is not None:
+        executor.shutdown()
+
+    return {
+        "commit": git_commit(),
+        "config": {
+            "documents": args.documents,
+            "pages_per_document": args.pages,
+            "seed": args.seed,
+            "corpus": args.corpus,
+            "reference": args.reference if args.corpus else None,
+            "workers": args.workers,
+        },
+        "extractors": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark text extractors")
+    parser.add_argument("--documents", type=int, default=5, help="Per file type")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per document")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--corpus", help="Directory of real PDF/DOCX files to add")
+    parser.add_argument(
+        "--reference",
+        default="pdfminer",
+        help="Backend whose output scores the --corpus files",
+    )
+    parser.add_argument("--workers", type=int, default=0, help="Parallel PDF workers")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for name, result in report["extractors"].items():
+        if not result.get("installed", True):
+            print(f"{name:28} not installed", file=sys.stderr)
+            continue
+        print(
+            f"{name:28} pages/s={result['pages_per_s']!s:>9} "
+            f"precision={result['precision']} recall={result['recall']} "
+            f"f1={result['f1']} failures={result['failures']}",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
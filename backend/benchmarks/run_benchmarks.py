@@ -0,0 +1,222 @@
+"""End-to-end benchmarks for the ingest and query paths.
+
+Runs offline against the fake LLM provider and the local vector store, using
+a synthetic PDF/DOCX/TXT corpus, and writes a JSON report with throughput and
+p50/p95/p99 latency per stage. Compare two reports with
+``python -m benchmarks.compare``.
+
+Usage (from the backend directory):
+    python -m benchmarks.run_benchmarks --documents 5 --pages 10 --queries 50
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+# Select the offline backends before the app modules read their settings
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("VECTOR_STORE_BACKEND", "local")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("USER_PASSWORD", "benchmark-password")
+
+from .corpus import generate_corpus, generate_queries  # noqa: E402
+
+
+class StageTimer:
+    """Collects per-call latencies and work counts for one stage."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def measure(self, **counts):
+        start = time.perf_counter()
+        yield
+        self.latencies.append(time.perf_counter() - start)
+        for unit, count in counts.items():
+            self.counts[unit] = self.counts.get(unit, 0) + count
+
+    def summary(self) -> Dict:
+        latencies = np.array(self.latencies) * 1000
+        total = float(np.sum(self.latencies))
+        return {
+            "calls": len(self.latencies),
+            "total_s": round(total, 6),
+            "latency_ms": {
+                "mean": round(float(latencies.mean()), 3),
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p95": round(float(np.percentile(latencies, 95)), 3),
+                "p99": round(float(np.percentile(latencies, 99)), 3),
+            },
+            "throughput": {
+                f"{unit}_per_s": round(count / total, 3) if total else None
+                for unit, count in self.counts.items()
+            },
+        }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run(args) -> Dict:
+    from fastapi.testclient import TestClient
+
+    from app.core.auth import create_access_token
+    from app.core.document_processor import DocumentProcessor
+    from app.core.llm_client import LLMClient
+    from app.core.local_vector_store import LocalVectorStore
+    from app.main import app
+
+    corpus = generate_corpus(args.documents, args.pages, seed=args.seed)
+    queries = generate_queries(args.queries, seed=args.seed)
+    processor = DocumentProcessor()
+    llm_client = LLMClient()
+    store = LocalVectorStore(tempfile.mkdtemp(prefix="rag-bench-store-"))
+    stages = {
+        name: StageTimer()
+        for name in (
+            "process_document.pdf",
+            "process_document.docx",
+            "process_document.txt",
+            "get_embeddings",
+            "add_documents",
+            "get_query_embedding",
+            "search_all_collections",
+            "upload_route",
+            "query_route",
+        )
+    }
+
+    # Ingest stages, called directly
+    for document in corpus:
+        file_type = document.filename.rsplit(".", 1)[1]
+        metadata = {
+            "owner": "admin@demo.com",
+            "allowed_categories": ["operations"],
+            "allowed_users": [],
+            "filename": document.filename,
+            "upload_time": datetime.now(timezone.utc).isoformat(),
+            "size": len(document.content),
+        }
+        timer = stages[f"process_document.{file_type}"]
+        with timer.measure(pages=document.pages, documents=1):
+            chunks = processor.process_document(document.content, metadata)
+        timer.counts["chunks"] = timer.counts.get("chunks", 0) + len(chunks)
+
+        texts = [chunk["text"] for chunk in chunks]
+        with stages["get_embeddings"].measure(chunks=len(chunks)):
+            vectors = llm_client.get_embeddings(texts)
+        with stages["add_documents"].measure(chunks=len(chunks)):
+            store.add_documents("Benchmark", chunks, vectors)
+
+    # Query stages, called directly
+    for query in queries:
+        with stages["get_query_embedding"].measure(queries=1):
+            vector = llm_client.get_query_embedding(query)
+        with stages["search_all_collections"].measure(queries=1):
+            store.search_all_collections(vector)
+
+    # Routes, through the full FastAPI stack
+    client = TestClient(app)
+    token = create_access_token({"sub": "admin@demo.com", "roles": ["admin"]})
+    headers = {"Authorization": f"Bearer {token}"}
+    access = json.dumps({"access": {"categories": ["operations"], "users": []}})
+    for document in corpus:
+        with stages["upload_route"].measure(pages=document.pages, documents=1):
+            response = client.post(
+                "/api/documents/BenchmarkRoutes/upload",
+                files={"file": (document.filename, document.content)},
+                data={"access": access},
+                headers=headers,
+            )
+        response.raise_for_status()
+    for query in queries:
+        with stages["query_route"].measure(queries=1):
+            response = client.post(
+                "/api/documents/query",
+                json={"query": query, "index_name": "BenchmarkRoutes"},
+                headers=headers,
+            )
+        response.raise_for_status()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "documents_per_type": args.documents,
+            "pages_per_document": args.pages,
+            "queries": args.queries,
+            "seed": args.seed,
+            "llm_provider": os.environ["LLM_PROVIDER"],
+            "vector_store_backend": os.environ["VECTOR_STORE_BACKEND"],
+        },
+        "stages": {
+            name: timer.summary() for name, timer in stages.items() if timer.latencies
+        },
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ingest and query paths")
+    parser.add_argument("--documents", type=int, default=5, help="Documents per type")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per document")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--output",
+        help="Result file (default: benchmarks/results/<commit>-<time>.json)",
+    )
+    args = parser.parse_args(argv)
+
+    # Keep the routes' vector store away from any real data
+    os.environ.setdefault(
+        "LOCAL_VECTOR_STORE_PATH", tempfile.mkdtemp(prefix="rag-bench-routes-")
+    )
+
+    report = run(args)
+    output = args.output or os.path.join(
+        os.path.dirname(__file__),
+        "results",
+        f"{report['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for name, stage in report["stages"].items():
+        latency = stage["latency_ms"]
+        throughput = ", ".join(
+            f"{unit}={value}" for unit, value in stage["throughput"].items()
+        )
+        print(
+            f"{name:28} p50={latency['p50']:9.3f}ms p95={latency['p95']:9.3f}ms "
+            f"p99={latency['p99']:9.3f}ms  {throughput}",
+            file=sys.stderr,
+        )
+    print(f"Wrote {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
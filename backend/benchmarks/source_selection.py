@@ -0,0 +1,109 @@
+"""Time the selection of cited sources after a completion.
+
+Builds synthetic retrieval results (several chunks per document, spread over
+a few indexes with their own relevance thresholds) and reports microseconds
+per ``SourceSelector.select`` call for each result count.
+
+Usage (from the backend directory):
+    python -m benchmarks.source_selection --sources 5 20 100 --calls 2000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+from app.core.citations import SourceSelector
+
+from .run_benchmarks import git_commit
+
+SUPERSCRIPTS = "⁰¹²³⁴⁵⁶⁷⁸⁹"
+
+
+def superscript(number: int) -> str:
+    return "".join(SUPERSCRIPTS[int(digit)] for digit in str(number))
+
+
+def synthetic_sources(rng: random.Random, count: int, chunks: int) -> List[Dict]:
+    sources = []
+    for n in range(count):
+        sources.append(
+            {
+                "text": f"chunk {n}",
+                "metadata": {"filename": f"doc-{n // chunks}.pdf", "chunk_index": n},
+                "relevance": rng.uniform(0.7, 1.0),
+                "collection": f"index-{n % 3}",
+            }
+        )
+    return sources
+
+
+def synthetic_answer(rng: random.Random, documents: int) -> str:
+    cited = rng.sample(range(1, documents + 1), min(3, documents))
+    return " ".join(f"Sentence {i}{superscript(n)}." for i, n in enumerate(cited))
+
+
+def bench(selector: SourceSelector, count: int, args) -> Dict:
+    rng = random.Random(args.seed)
+    sources = synthetic_sources(rng, count, args.chunks)
+    documents = len({s["metadata"]["filename"] for s in sources})
+    answers = [synthetic_answer(rng, documents) for _ in range(32)]
+
+    cited = 0
+    start = time.perf_counter()
+    for call in range(args.calls):
+        cited += len(selector.select(answers[call % len(answers)], sources))
+    elapsed = time.perf_counter() - start
+    return {
+        "sources": count,
+        "documents": documents,
+        "us_per_call": round(elapsed / args.calls * 1e6, 3),
+        "mean_cited": round(cited / args.calls, 2),
+    }
+
+
+def run(args) -> Dict:
+    thresholds = {"index-0": 0.8, "index-1": 0.9}
+    selector = SourceSelector(
+        0.85, thresholds=thresholds.get, max_sources=args.max_sources
+    )
+    return {
+        "commit": git_commit(),
+        "config": {
+            "calls": args.calls,
+            "chunks_per_document": args.chunks,
+            "max_sources": args.max_sources,
+            "seed": args.seed,
+        },
+        "results": [bench(selector, count, args) for count in args.sources],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark source selection")
+    parser.add_argument("--sources", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--chunks", type=int, default=2, help="Chunks per document")
+    parser.add_argument("--calls", type=int, default=2000, help="Calls per size")
+    parser.add_argument("--max-sources", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for result in report["results"]:
+        print(
+            f"sources={result['sources']:<5} documents={result['documents']:<5} "
+            f"us/call={result['us_per_call']:>9} cited={result['mean_cited']}",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Gunicorn configuration for the production profile.
+
+Runs the app in several uvicorn worker processes so one slow request does
+not hold up the others. Workers, bind address and timeout come from the
+application Settings (SERVER_* environment variables).
+
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+
+import multiprocessing
+import os
+
+from app.core.config import settings
+
+bind = f"{settings.SERVER_HOST}:{settings.SERVER_PORT}"
+workers = settings.SERVER_WORKERS or multiprocessing.cpu_count() * 2 + 1
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = settings.SERVER_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    # Clear samples left by a previous run before workers start writing
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,5 +1,11 @@
-import React, { createContext, useContext, useState, useEffect } from 'react'
-import { documents } from '../lib/api'
+import React, {
+  createContext,
+  useContext,
+  useState,
+  useEffect,
+  useRef
+} from 'react'
+import { chat, documents } from '../lib/api'
 import { notifications } from '@mantine/notifications'
 import { useAuth } from './AuthContext'
 
@@ -18,6 +24,7 @@ interface ChatSession {
   id: string
   name: string
   messages: ChatMessage[]
+  serverSessionId?: string // History kept by the chat endpoint
   createdAt: Date
   updatedAt: Date
 }
@@ -33,6 +40,7 @@ interface ChatContextType {
   deleteSession: (sessionId: string) => void
   clearChat: () => void
   sendMessage: (message: string, indexName?: string) => Promise<void>
+  prefetchQuery: (message: string, indexName?: string) => void
   setCurrentSessionId: (id: string) => void
   pageType: 'chat' | 'query'
 }
@@ -52,11 +60,17 @@ export function ChatProvider ({
 
   const [currentSessionId, setCurrentSessionId] = useState<string>('')
   const [sessions, setSessions] = useState<Record<string, ChatSession>>({})
+  // Embedded-query handles by question, so asking the same question of
+  // another index does not embed it again
+  const queryHandles = useRef<Map<string, Promise<string | undefined>>>(
+    new Map()
+  )
 
   // Initialize or clear sessions based on auth state and page type
   useEffect(() => {
     // Clear existing sessions when page type changes
     setSessions({})
+    queryHandles.current.clear()
     setCurrentSessionId('')
 
     if (user) {
@@ -179,10 +193,32 @@ export function ChatProvider ({
   }
 
   const clearChat = () => {
-    updateSession(currentSessionId, { messages: [] })
+    // Start a fresh server-side history too
+    updateSession(currentSessionId, { messages: [], serverSessionId: undefined })
     setError(null)
   }
 
+  const handleKey = (message: string) =>
+    message.trim().toLowerCase().replace(/\s+/g, ' ')
+
+  // Embed a finished question for the index it will be asked of, before
+  // it is submitted
+  const prefetchQuery = (message: string, indexName?: string) => {
+    const key = handleKey(message)
+    if (pageType !== 'query' || !user || !key) return
+    if (queryHandles.current.has(key)) return
+    queryHandles.current.set(
+      key,
+      documents
+        .createQueryHandle(message.trim(), indexName)
+        .then(result => result.query_handle)
+        .catch(() => {
+          queryHandles.current.delete(key)
+          return undefined
+        })
+    )
+  }
+
   const sendMessage = async (message: string, indexName?: string) => {
     if (!message.trim() || loading) return
 
@@ -201,16 +237,38 @@ export function ChatProvider ({
     updateSession(currentSessionId, { messages: newMessages })
 
     try {
-      const result = await documents.query({
-        query: userMessage,
-        ...(indexName ? { index_name: indexName } : {})
-      })
+      const serverSessionId = sessions[currentSessionId]?.serverSessionId
+      const queryHandle =
+        pageType === 'query'
+          ? await queryHandles.current.get(handleKey(userMessage))
+          : undefined
+      const result =
+        pageType === 'chat'
+          ? await chat.send({
+              message: userMessage,
+              ...(serverSessionId ? { session_id: serverSessionId } : {}),
+              ...(indexName ? { index_name: indexName } : {})
+            })
+          : await documents.query({
+              query: userMessage,
+              ...(indexName ? { index_name: indexName } : {}),
+              ...(queryHandle ? { query_handle: queryHandle } : {})
+            })
 
       if (!result?.answer) {
         throw new Error('No response received')
       }
+      if ('query_handle' in result && result.query_handle) {
+        queryHandles.current.set(
+          handleKey(userMessage),
+          Promise.resolve(result.query_handle)
+        )
+      }
 
       updateSession(currentSessionId, {
+        ...('session_id' in result
+          ? { serverSessionId: result.session_id }
+          : {}),
         messages: [
           ...newMessages,
           {
@@ -254,6 +312,7 @@ export function ChatProvider ({
         deleteSession,
         clearChat,
         sendMessage,
+        prefetchQuery,
         setCurrentSessionId,
         pageType
       }}
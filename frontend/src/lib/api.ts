@@ -92,14 +92,34 @@ export interface Index {
   description?: string;
 }
 
+export interface VectorIndexProfile {
+  index_type?: "hnsw" | "flat";
+  ef?: number;
+  ef_construction?: number;
+  max_connections?: number;
+  compression?: "pq" | "bq";
+  pq_segments?: number;
+  pq_centroids?: number;
+  pq_training_limit?: number;
+  bq_rescore_limit?: number;
+  vector_cache_max_objects?: number;
+}
+
 export const indexes = {
   list: async () => {
     const response = await api.get("/indexes");
     return response.data;
   },
 
-  create: async (name: string, description?: string) => {
-    const response = await api.post(`/indexes/${name}`, { description });
+  create: async (
+    name: string,
+    description?: string,
+    vectorIndex?: VectorIndexProfile
+  ) => {
+    const response = await api.post(`/indexes/${name}`, {
+      description,
+      vector_index: vectorIndex,
+    });
     return response.data;
   },
 
@@ -143,6 +163,12 @@ export interface QueryRequest {
   query: string;
   index_name?: string;
   filters?: Record<string, any>;
+  query_handle?: string; // Reuses an embedding of the same query
+}
+
+export interface QueryHandleResponse {
+  query_handle: string;
+  expires_in: number;
 }
 
 export interface QueryResponse {
@@ -152,6 +178,7 @@ export interface QueryResponse {
     metadata: Record<string, any>;
     relevance?: number;
   }>;
+  query_handle?: string;
 }
 
 export interface ListDocumentsResponse {
@@ -231,6 +258,19 @@ export const documents = {
     return response.data;
   },
 
+  // Embeds a question ahead of time so searching it against any index
+  // skips the embedding call
+  createQueryHandle: async (
+    query: string,
+    indexName?: string
+  ): Promise<QueryHandleResponse> => {
+    const response = await api.post("/documents/query/handle", {
+      query,
+      ...(indexName ? { index_name: indexName } : {}),
+    });
+    return response.data;
+  },
+
   query: async (request: QueryRequest): Promise<QueryResponse> => {
     const response = await api.post("/documents/query", request);
     console.log("Full API response:", {
@@ -261,6 +301,30 @@ export const documents = {
           metadata: source.metadata || {},
         })
       ),
+      query_handle: data.query_handle || undefined,
     };
   },
 };
+
+export interface ChatRequest {
+  message: string;
+  session_id?: string;
+  index_name?: string;
+}
+
+export interface ChatResponse extends QueryResponse {
+  session_id: string;
+  standalone_query: string;
+}
+
+export const chat = {
+  // The server keeps the history; send only the new message and session id
+  send: async (request: ChatRequest): Promise<ChatResponse> => {
+    const response = await api.post("/chat", request);
+    return response.data;
+  },
+
+  deleteSession: async (sessionId: string): Promise<void> => {
+    await api.delete(`/chat/${sessionId}`);
+  },
+};
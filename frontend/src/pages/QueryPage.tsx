@@ -29,7 +29,7 @@ export default function QueryPage (): ReactElement {
     relevance?: number
   } | null>(null)
   const { user } = useAuth()
-  const { messages, loading, error, sendMessage } = useChat()
+  const { messages, loading, error, sendMessage, prefetchQuery } = useChat()
   const viewport = useRef<HTMLDivElement>(null)
 
   useEffect(() => {
@@ -41,6 +41,12 @@ export default function QueryPage (): ReactElement {
     }
   }, [messages])
 
+  // Embed the question for this index once the user leaves the field to
+  // submit it, rather than on every pause while typing
+  const handleBlur = () => {
+    if (query.trim().length >= 3) prefetchQuery(query, indexName)
+  }
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     if (!query.trim() || loading) return
@@ -68,6 +74,7 @@ export default function QueryPage (): ReactElement {
               }
               value={query}
               onChange={e => setQuery(e.target.value)}
+              onBlur={handleBlur}
               size='lg'
               required
               disabled={!user}